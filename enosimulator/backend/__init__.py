@@ -1 +1,9 @@
-from .app import FlaskApp
+from .app import ApiWorker, FlaskApp
+from .cache import ResponseCache
+from .database import Database
+from .events import EventBroker
+from .retention import Retention
+from .ringbuffer import StatsBuffer
+from .rollup import Rollup
+from .snapshots import SnapshotPublisher
+from .writer import DatabaseWriter
@@ -0,0 +1,215 @@
+import json
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from .database import Database
+from .rollup import ROLLUP_METRICS, ROLLUP_TABLES
+
+AGGREGATE_TABLES = ROLLUP_TABLES
+AGGREGATE_METRICS = ROLLUP_METRICS
+AGGREGATE_PERCENTILES = [50, 95, 99]
+# Aggregate queries take the names as a JSON array, like the batch stats queries
+AGGREGATE_QUERY = "SELECT {keys}, measuretime, {metric} FROM {table_name} WHERE name IN (SELECT value FROM json_each(?)) AND measuretime > ?"
+# The rounds overlapping the window, starting with the one running at its start
+AGGREGATE_ROUNDS_QUERY = "SELECT round_id, measuretime FROM rounds WHERE measuretime >= (SELECT COALESCE(MAX(measuretime), 0) FROM rounds WHERE measuretime <= ?) ORDER BY measuretime"
+LATEST_ID_QUERY = "SELECT MAX(id) AS id FROM {table_name}"
+
+
+def summarize(values: np.ndarray) -> Dict:
+    """
+    Return the number of samples, min, avg, max and percentiles of the given values.
+
+    Percentiles use the nearest-rank method like the rollup tables.
+
+    Args:
+        values (np.ndarray): The values to summarize.
+
+    Returns:
+        Dict: The summary of the values.
+    """
+
+    percentiles = np.percentile(values, AGGREGATE_PERCENTILES, method="inverted_cdf")
+    return {
+        "samples": int(values.size),
+        "min": float(values.min()),
+        "avg": round(float(values.mean()), 2),
+        "max": float(values.max()),
+        **{
+            f"p{percent}": float(value)
+            for percent, value in zip(AGGREGATE_PERCENTILES, percentiles)
+        },
+    }
+
+
+def aggregate(
+    database: Database,
+    table_name: str,
+    metric: str,
+    names: List[str],
+    since: int,
+    by_round: bool = False,
+) -> Dict:
+    """
+    Aggregate a metric of the raw stats of each series over a time window.
+
+    SQLite only filters the rows through the name index, the values of each series are
+    then summarized at once with NumPy. Per round, the rows of a series are sorted by
+    measure time and split where the round that was running changes.
+
+    Args:
+        database (Database): The database to read from.
+        table_name (str): The name of the raw stats table.
+        metric (str): The metric to aggregate.
+        names (List[str]): The names of the series to aggregate.
+        since (int): The earliest measure time in epoch milliseconds.
+        by_round (bool): Whether to aggregate each round separately.
+
+    Raises:
+        ValueError: If the table or metric cannot be aggregated.
+
+    Returns:
+        Dict: The summary of each series nested by the columns identifying it, or the list of summaries per round if aggregated by round.
+    """
+
+    if table_name not in AGGREGATE_TABLES or metric not in AGGREGATE_METRICS:
+        raise ValueError("Invalid table or metric for aggregation.")
+
+    keys = AGGREGATE_TABLES[table_name]
+    series: Dict[Tuple, List[Tuple[int, float]]] = dict()
+    with database.reader() as connection:
+        rows = connection.execute(
+            AGGREGATE_QUERY.format(
+                keys=",".join(keys), metric=metric, table_name=table_name
+            ),
+            (json.dumps(names), since),
+        )
+        for row in rows:
+            series.setdefault(tuple(row[: len(keys)]), []).append(
+                tuple(row[len(keys) :])
+            )
+
+    if by_round:
+        rounds = database.query(AGGREGATE_ROUNDS_QUERY, (since,))
+        round_ids = [None] + [round_["round_id"] for round_ in rounds]
+        round_starts = np.array([round_["measuretime"] for round_ in rounds])
+
+    aggregates = dict()
+    for key, points in series.items():
+        measuretimes, values = np.array(points, dtype=np.float64).T
+        if by_round:
+            order = np.argsort(measuretimes, kind="stable")
+            values = values[order]
+            # Rows measured before the first round belong to no round at all
+            buckets = np.searchsorted(round_starts, measuretimes[order], side="right")
+            splits = np.flatnonzero(np.diff(buckets)) + 1
+            summary = [
+                {"round_id": round_ids[bucket[0]], **summarize(bucket_values)}
+                for bucket, bucket_values in zip(
+                    np.split(buckets, splits), np.split(values, splits)
+                )
+            ]
+        else:
+            summary = summarize(values)
+
+        group = aggregates
+        for column in key[:-1]:
+            group = group.setdefault(column, dict())
+        group[key[-1]] = summary
+
+    return aggregates
+
+
+def lttb(x: np.ndarray, y: np.ndarray, max_points: int) -> np.ndarray:
+    """
+    Select the points of a series that preserve its shape with largest-triangle-three-buckets.
+
+    The first and last points are always kept. The points in between are split into
+    max_points - 2 buckets and from each bucket, the point forming the largest triangle
+    with the previously selected point and the average of the next bucket is kept. The
+    triangle areas of a bucket are computed at once with NumPy. Multiple metrics are
+    scaled to the same range and their areas are summed, so that one selection fits all
+    of them.
+
+    Args:
+        x (np.ndarray): The ascending x values of the series.
+        y (np.ndarray): The y values of the series, one column per metric.
+        max_points (int): The maximum number of points to keep, at least 3.
+
+    Returns:
+        np.ndarray: The ascending indices of the kept points.
+    """
+
+    n = len(x)
+    if n <= max_points:
+        return np.arange(n)
+
+    y = y.reshape(n, -1)
+    span = np.ptp(y, axis=0)
+    y = (y - y.min(axis=0)) / np.where(span == 0, 1, span)
+
+    edges = np.linspace(1, n - 1, max_points - 1).astype(int)
+    edges = np.append(edges, n)
+    selected = np.zeros(max_points, dtype=int)
+    selected[-1] = n - 1
+    previous = 0
+    for bucket in range(max_points - 2):
+        start, end, next_end = edges[bucket], edges[bucket + 1], edges[bucket + 2]
+        next_x = x[end:next_end].mean()
+        next_y = y[end:next_end].mean(axis=0)
+        areas = np.abs(
+            (x[previous] - next_x) * (y[start:end] - y[previous])
+            - (x[previous] - x[start:end])[:, None] * (next_y - y[previous])
+        ).sum(axis=1)
+        previous = start + int(np.argmax(areas))
+        selected[bucket + 1] = previous
+
+    return selected
+
+
+def downsample(
+    rows: List[Dict],
+    max_points: int,
+    metrics: List[str] = ROLLUP_METRICS,
+    x: str = "measuretime",
+) -> List[Dict]:
+    """
+    Downsample the rows of a stats series to at most max_points rows.
+
+    Args:
+        rows (List[Dict]): The rows of the series, latest first.
+        max_points (int): The maximum number of rows to keep, at least 3.
+        metrics (List[str]): The metrics whose shape is preserved.
+        x (str): The column the rows are ordered by.
+
+    Returns:
+        List[Dict]: The kept rows, latest first.
+    """
+
+    if max_points is None or len(rows) <= max_points:
+        return rows
+
+    rows = rows[::-1]
+    selected = lttb(
+        np.array([row[x] for row in rows], dtype=np.float64),
+        np.array(
+            [[row[metric] for metric in metrics] for row in rows], dtype=np.float64
+        ),
+        max_points,
+    )
+    return [rows[index] for index in selected[::-1]]
+
+
+def latest_id(database: Database, table_name: str) -> int:
+    """
+    Return the id of the latest row stored in a raw stats table.
+
+    Args:
+        database (Database): The database to read from.
+        table_name (str): The name of the raw stats table.
+
+    Returns:
+        int: The latest row id or 0 if the table is empty.
+    """
+
+    return database.query(LATEST_ID_QUERY.format(table_name=table_name))[0]["id"] or 0
@@ -1,14 +1,322 @@
+import hashlib
+import json
 import logging
+import multiprocessing
 import os
+import socket
 import sqlite3
+import sys
+from multiprocessing.connection import Connection
+from threading import Thread
 from time import time
-from typing import Dict, Tuple
+from typing import Dict, List, Tuple, Union
 
-from flask import Flask, request
+from flask import Flask, Response, request, stream_with_context
 from flask_restful import Api, Resource
 from setup import Setup
 from simulation import Simulation
-from tenacity import retry, stop_after_attempt
+from werkzeug.serving import BaseWSGIServer, make_server
+
+from .analytics import (
+    AGGREGATE_METRICS,
+    AGGREGATE_TABLES,
+    aggregate,
+    downsample,
+    latest_id,
+)
+from .cache import ResponseCache
+from .database import Database
+from .events import STREAMED_TABLES, EventBroker
+from .export import EXPORT_FORMATS, EXPORT_TABLES
+from .retention import Retention
+from .ringbuffer import BUFFERED_TABLES, StatsBuffer
+from .rollup import ROLLUP_LEVELS, Rollup
+from .snapshots import SNAPSHOT_QUERY, SnapshotPublisher
+from .writer import DatabaseWriter
+
+# The port the API is served on, the default of the Flask development server
+API_PORT = 5000
+# The port the simulation process serves Prometheus metrics on if API workers are configured
+METRICS_PORT = 5001
+# The stats history returned by the API by default in seconds
+HISTORY_WINDOW = 30 * 60
+# The bucket size in seconds of the raw stats and each rollup level
+RESOLUTIONS = {"": 0, **{level: size // 1000 for level, size in ROLLUP_LEVELS.items()}}
+
+# Constant queries so that the prepared statements cached per connection get reused
+VMINFO_QUERY = (
+    "SELECT * FROM vminfo WHERE name = ? AND measuretime > ? ORDER BY measuretime DESC"
+)
+CONTAINERINFO_QUERY = "SELECT * FROM containerinfo WHERE name = ? AND measuretime > ? ORDER BY measuretime DESC"
+CONTAINERINFO_VM_QUERY = "SELECT * FROM containerinfo WHERE vm = ? AND name = ? AND measuretime > ? ORDER BY measuretime DESC"
+ROLLUP_COLUMNS = "*, cpuusage_avg AS cpuusage, ramusage_avg AS ramusage, netrx_avg AS netrx, nettx_avg AS nettx"
+VMINFO_QUERIES = {
+    "": VMINFO_QUERY,
+    **{
+        level: f"SELECT {ROLLUP_COLUMNS} FROM vminfo_{level} WHERE name = ? AND measuretime > ? ORDER BY measuretime DESC"
+        for level in ROLLUP_LEVELS
+    },
+}
+CONTAINERINFO_QUERIES = {
+    "": CONTAINERINFO_QUERY,
+    **{
+        level: f"SELECT {ROLLUP_COLUMNS} FROM containerinfo_{level} WHERE name = ? AND measuretime > ? ORDER BY measuretime DESC"
+        for level in ROLLUP_LEVELS
+    },
+}
+CONTAINERINFO_VM_QUERIES = {
+    "": CONTAINERINFO_VM_QUERY,
+    **{
+        level: f"SELECT {ROLLUP_COLUMNS} FROM containerinfo_{level} WHERE vm = ? AND name = ? AND measuretime > ? ORDER BY measuretime DESC"
+        for level in ROLLUP_LEVELS
+    },
+}
+# The maximum number of distinct aggregate queries whose responses are cached
+AGGREGATE_CACHE_SIZE = 256
+# Batch queries take the names as a JSON array so that their statements stay constant
+BATCH_NAMES = "name IN (SELECT value FROM json_each(?))"
+VMINFO_BATCH_QUERIES = {
+    "": f"SELECT * FROM vminfo WHERE {BATCH_NAMES} AND measuretime > ? ORDER BY measuretime DESC",
+    **{
+        level: f"SELECT {ROLLUP_COLUMNS} FROM vminfo_{level} WHERE {BATCH_NAMES} AND measuretime > ? ORDER BY measuretime DESC"
+        for level in ROLLUP_LEVELS
+    },
+}
+CONTAINERINFO_BATCH_QUERIES = {
+    "": f"SELECT * FROM containerinfo WHERE {BATCH_NAMES} AND measuretime > ? ORDER BY measuretime DESC",
+    **{
+        level: f"SELECT {ROLLUP_COLUMNS} FROM containerinfo_{level} WHERE {BATCH_NAMES} AND measuretime > ? ORDER BY measuretime DESC"
+        for level in ROLLUP_LEVELS
+    },
+}
+CONTAINERINFO_VM_BATCH_QUERIES = {
+    "": f"SELECT * FROM containerinfo WHERE vm = ? AND {BATCH_NAMES} AND measuretime > ? ORDER BY measuretime DESC",
+    **{
+        level: f"SELECT {ROLLUP_COLUMNS} FROM containerinfo_{level} WHERE vm = ? AND {BATCH_NAMES} AND measuretime > ? ORDER BY measuretime DESC"
+        for level in ROLLUP_LEVELS
+    },
+}
+# Cursor queries find the rows after the cursor by row id, skipping the name indexes
+VMINFO_CURSOR_QUERY = "SELECT * FROM vminfo WHERE id > ? AND +name = ? AND measuretime > ? ORDER BY measuretime DESC"
+CONTAINERINFO_CURSOR_QUERY = "SELECT * FROM containerinfo WHERE id > ? AND +name = ? AND measuretime > ? ORDER BY measuretime DESC"
+CONTAINERINFO_VM_CURSOR_QUERY = "SELECT * FROM containerinfo WHERE id > ? AND +vm = ? AND +name = ? AND measuretime > ? ORDER BY measuretime DESC"
+VMINFO_BATCH_CURSOR_QUERY = f"SELECT * FROM vminfo WHERE id > ? AND +{BATCH_NAMES} AND measuretime > ? ORDER BY measuretime DESC"
+CONTAINERINFO_BATCH_CURSOR_QUERY = f"SELECT * FROM containerinfo WHERE id > ? AND +{BATCH_NAMES} AND measuretime > ? ORDER BY measuretime DESC"
+CONTAINERINFO_VM_BATCH_CURSOR_QUERY = f"SELECT * FROM containerinfo WHERE id > ? AND +vm = ? AND +{BATCH_NAMES} AND measuretime > ? ORDER BY measuretime DESC"
+CONTAINERLIST_QUERY = "SELECT DISTINCT vm, name FROM containerinfo ORDER BY vm, name"
+CONTAINERLIST_VM_QUERY = (
+    "SELECT DISTINCT vm, name FROM containerinfo WHERE vm = ? ORDER BY vm, name"
+)
+SCOREHISTORY_QUERY = "SELECT * FROM scorehistory WHERE round_id BETWEEN ? AND ? AND (round_id - ?) % ? = 0 ORDER BY round_id"
+SCOREHISTORY_TEAMS_QUERY = "SELECT * FROM scorehistory WHERE team IN (SELECT value FROM json_each(?)) AND round_id BETWEEN ? AND ? AND (round_id - ?) % ? = 0 ORDER BY round_id"
+# Round metrics can be filtered by these columns, each filter is skipped if omitted
+ROUND_METRICS_FILTERS = {
+    "exploitstats": ["attacker", "target", "service", "flagstore"],
+    "submissionstats": ["team"],
+}
+ROUND_METRICS_QUERY = "SELECT * FROM {table_name} WHERE round_id BETWEEN :start AND :end{filters} ORDER BY round_id"
+# The spans of a round, the latest traced round if none is given
+ROUNDTIMINGS_QUERY = "SELECT round_id, phase, name, target, starttime, duration FROM roundtimings WHERE round_id = COALESCE(?, (SELECT MAX(round_id) FROM roundtimings)) ORDER BY starttime, rowid"
+# The content type of the Prometheus text exposition format
+METRICS_MIMETYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# The fields that must be present in the rows stored in each table
+REQUIRED_FIELDS = {
+    "vminfo": [
+        "name",
+        "ip",
+        "cpu",
+        "ram",
+        "disk",
+        "status",
+        "uptime",
+        "cpuusage",
+        "ramusage",
+        "netrx",
+        "nettx",
+    ],
+    "containerinfo": [
+        "vm",
+        "name",
+        "cpuusage",
+        "ramusage",
+        "netrx",
+        "nettx",
+    ],
+}
+# The fields that may be present in the rows stored in each table, any other field is rejected
+ALLOWED_FIELDS = {
+    "vminfo": {*REQUIRED_FIELDS["vminfo"], "measuretime"},
+    "containerinfo": {
+        *REQUIRED_FIELDS["containerinfo"],
+        "blockread",
+        "blockwrite",
+        "pids",
+        "measuretime",
+    },
+}
+
+
+def history_range() -> Tuple[str, int]:
+    """
+    Parses the resolution and window parameters of a stats request.
+
+    The resolution is the time in seconds the returned stats may be apart, the window
+    is how many seconds of history to return. The coarsest table whose buckets still
+    satisfy the resolution is the cheapest to read.
+
+    Raises:
+        ValueError: If a parameter is not a valid number of seconds.
+
+    Returns:
+        Tuple[str, int]: The rollup level to read from ("" for raw stats) and the earliest measure time in epoch milliseconds.
+    """
+
+    resolution = int(request.args.get("resolution", 0))
+    window = int(request.args.get("window", HISTORY_WINDOW))
+    if resolution < 0 or window <= 0:
+        raise ValueError("Resolution and window must be positive")
+
+    level = max(
+        (level for level, size in RESOLUTIONS.items() if size <= resolution),
+        key=RESOLUTIONS.get,
+    )
+    return level, int(time() * 1000) - window * 1000
+
+
+def history_cursor() -> int:
+    """
+    Parses the since parameter of a stats request.
+
+    The since parameter is the cursor returned by the previous request. Only rows
+    stored after it are returned, together with the cursor for the next request. A
+    cursor of 0 returns the whole window.
+
+    Raises:
+        ValueError: If the cursor is not a valid row id.
+
+    Returns:
+        int: The cursor or None if the request does not use cursors.
+    """
+
+    cursor = request.args.get("since")
+    if cursor is None:
+        return None
+
+    cursor = int(cursor)
+    if cursor < 0:
+        raise ValueError("Cursor must not be negative")
+    return cursor
+
+
+def history_points() -> int:
+    """
+    Parses the max_points parameter of a stats request.
+
+    The max_points parameter is the maximum number of rows returned per series. Longer
+    series are downsampled with largest-triangle-three-buckets, which keeps the rows
+    that preserve the shape of the charted metrics.
+
+    Raises:
+        ValueError: If max_points is not a number of at least 3.
+
+    Returns:
+        int: The maximum number of rows per series or None for no limit.
+    """
+
+    max_points = request.args.get("max_points")
+    if max_points is None:
+        return None
+
+    max_points = int(max_points)
+    if max_points < 3:
+        raise ValueError("Max points must be at least 3")
+    return max_points
+
+
+def query_after(
+    database: Database, query: str, cursor_query: str, params: Tuple, cursor: int
+) -> Tuple[List[Dict], int]:
+    """
+    Runs a raw stats query, only returning the rows stored after the cursor.
+
+    Args:
+        database (Database): The database to query.
+        query (str): The query returning the whole window.
+        cursor_query (str): The query returning the rows after the cursor.
+        params (Tuple): The query parameters following the cursor.
+        cursor (int): The row id of the last row the client has.
+
+    Returns:
+        Tuple[List[Dict], int]: The rows and the cursor for the next request.
+    """
+
+    if cursor:
+        rows = database.query(cursor_query, (cursor, *params))
+    else:
+        rows = database.query(query, params)
+
+    return rows, max((row["id"] for row in rows), default=cursor)
+
+
+def batch_range() -> Tuple[List[str], int]:
+    """
+    Parses the names and limit parameters of a batch stats request.
+
+    The names are a comma separated list of the series to return, the limit is the
+    maximum number of rows returned per series.
+
+    Raises:
+        ValueError: If the limit is not a positive number.
+
+    Returns:
+        Tuple[List[str], int]: The requested names (empty for all) and the limit (None for no limit).
+    """
+
+    names = [name for name in request.args.get("names", "").split(",") if name]
+    limit = request.args.get("limit")
+    if limit is not None:
+        limit = int(limit)
+        if limit <= 0:
+            raise ValueError("Limit must be positive")
+
+    return names, limit
+
+
+def group_series(
+    rows: List[Dict], keys: List[str], limit: int = None, max_points: int = None
+) -> Dict:
+    """
+    Groups stats rows by the columns identifying their series.
+
+    Args:
+        rows (List[Dict]): The rows, latest first.
+        keys (List[str]): The columns identifying a series, outermost first.
+        limit (int): The maximum number of rows kept per series.
+        max_points (int): The maximum number of rows each series is downsampled to.
+
+    Returns:
+        Dict: The rows of each series nested by the given columns.
+    """
+
+    grouped = dict()
+    for row in rows:
+        group = grouped
+        for key in keys[:-1]:
+            group = group.setdefault(row[key], dict())
+        series = group.setdefault(row[keys[-1]], [])
+        if limit is None or len(series) < limit:
+            series.append(row)
+
+    if max_points is not None:
+        groups = [grouped]
+        for _ in keys[:-1]:
+            groups = [group for parent in groups for group in parent.values()]
+        for group in groups:
+            for name, series in group.items():
+                group[name] = downsample(series, max_points)
+
+    return grouped
 
 
 class Teams(Resource):
@@ -18,19 +326,26 @@ class Teams(Resource):
     The response contains a dictionary of team names and their respective information.
 
     For more details on the response format, see the Team.to_json() method.
+
+    The response is cached per team version and supports conditional requests.
     """
 
     def get(self):
         """Generates the response for the API endpoint."""
         with self.team_lock:
-            response = {name: team.to_json() for name, team in self.teams.items()}
-            return response
+            return self.cache.response(
+                "teams",
+                self.versions["team"],
+                lambda: {name: team.to_json() for name, team in self.teams.items()},
+            )
 
     @classmethod
-    def create_api(cls, teams, team_lock):
+    def create_api(cls, teams, team_lock, versions, cache):
         """Creates the API endpoint."""
         cls.teams = teams
         cls.team_lock = team_lock
+        cls.versions = versions
+        cls.cache = cache
         return cls
 
 
@@ -42,22 +357,29 @@ class Services(Resource):
     information.
 
     For more details on the response format, see the Service.to_json() method.
+
+    The response is cached per service version and supports conditional requests.
     """
 
     def get(self):
         """Generates the response for the API endpoint."""
         with self.service_lock:
-            response = {
-                name: service.to_json() for name, service in self.services.items()
-            }
-            return response
+            return self.cache.response(
+                "services",
+                self.versions["service"],
+                lambda: {
+                    name: service.to_json() for name, service in self.services.items()
+                },
+            )
 
     @classmethod
-    def create_api(cls, services, service_lock):
+    def create_api(cls, services, service_lock, versions, cache):
         """Creates the API endpoint."""
 
         cls.services = services
         cls.service_lock = service_lock
+        cls.versions = versions
+        cls.cache = cache
         return cls
 
 
@@ -66,6 +388,12 @@ class VMs(Resource):
     An API endpoint for VM information.
 
     The response contains a list of dictionaries of VM information.
+    With the resolution and window parameters, the stats are read from the cheapest
+    rollup table instead, which contains the min, avg, max and p95 of each metric.
+    Raw stats within the window of the ring buffer are served from memory if enabled.
+    With the since parameter, the response contains the raw rows stored after the
+    cursor and the cursor for the next request instead. With the max_points parameter,
+    longer series are downsampled to the rows that best preserve their shape.
 
     The VM information gets stored in the database via the system_analytics() method of
     the StatChecker class.
@@ -75,18 +403,32 @@ class VMs(Resource):
         """Generates the response for the API endpoint."""
 
         vm_name = request.args.get("name")
+        try:
+            level, since = history_range()
+            cursor = history_cursor()
+            max_points = history_points()
+        except ValueError:
+            return {"message": "Invalid resolution, window, cursor or max_points"}, 400
+
+        if cursor is not None and level:
+            return {"message": "Cursors are only supported for raw stats"}, 400
 
         if vm_name:
-            with FlaskApp.get_db_connection() as conn:
-                cursor = conn.cursor()
-                cursor.execute(
-                    "SELECT * FROM vminfo WHERE name = ? AND datetime(measuretime) > datetime('now', '-30 minutes') ORDER BY measuretime DESC",
-                    (vm_name,),
+            if cursor is not None:
+                rows, cursor = query_after(
+                    self.database,
+                    VMINFO_QUERY,
+                    VMINFO_CURSOR_QUERY,
+                    (vm_name, since),
+                    cursor,
                 )
-                vm_infos = cursor.fetchall()
-
-                response = [dict(vm_info) for vm_info in vm_infos]
-                return response
+                return {"rows": downsample(rows, max_points), "cursor": cursor}
+            rows = None
+            if not level and self.buffer:
+                rows = self.buffer.query("vminfo", since, name=vm_name)
+            if rows is None:
+                rows = self.database.query(VMINFO_QUERIES[level], (vm_name, since))
+            return downsample(rows, max_points)
         else:
             return {"message": "Missing VM name"}, 400
 
@@ -97,29 +439,23 @@ class VMs(Resource):
         if not data:
             return {"message": "Invalid JSON"}, 400
 
-        required_fields = [
-            "name",
-            "ip",
-            "cpu",
-            "ram",
-            "disk",
-            "status",
-            "uptime",
-            "cpuusage",
-            "ramusage",
-            "netrx",
-            "nettx",
-        ]
-        if any(field not in data for field in required_fields):
+        if not isinstance(data, dict) or data.keys() - ALLOWED_FIELDS["vminfo"]:
+            return {"message": "Unknown field"}, 400
+
+        if any(field not in data for field in REQUIRED_FIELDS["vminfo"]):
             return {"message": "Missing field"}, 400
 
-        FlaskApp.db_insert_values("vminfo", data)
+        if not self.writer.submit({"vminfo": [data]}):
+            return {"message": "Write queue full"}, 503
         return {"message": "VM info updated successfully"}, 200
 
     @classmethod
-    def create_api(cls):
+    def create_api(cls, writer, database, buffer):
         """Creates the API endpoint."""
 
+        cls.writer = writer
+        cls.database = database
+        cls.buffer = buffer
         return cls
 
 
@@ -128,18 +464,23 @@ class VMList(Resource):
     An API endpoint for VM names.
 
     The response contains a list of the names of all VMs in the simulation.
+    It is cached per ip address version and supports conditional requests.
     """
 
     def get(self):
         """Generates the response for the API endpoint."""
 
-        return self.response
+        return self.cache.response(
+            "vmlist", self.versions["ips"], lambda: self.response
+        )
 
     @classmethod
-    def create_api(cls, response):
+    def create_api(cls, response, versions, cache):
         """Creates the API endpoint."""
 
         cls.response = response
+        cls.versions = versions
+        cls.cache = cache
         return cls
 
 
@@ -148,6 +489,9 @@ class Containers(Resource):
     An API endpoint for container information.
 
     The response contains a list of dictionaries of container information.
+    Since containers on different VMs may share a name, the results can be narrowed
+    down to a single VM with the vm parameter. The resolution, window, since and
+    max_points parameters work the same way as for VM information.
 
     The container information gets stored in the database via the system_anlytics()
     method of the StatChecker class.
@@ -157,45 +501,92 @@ class Containers(Resource):
         """Generates the response for the API endpoint."""
 
         container_name = request.args.get("name")
-
-        if container_name:
-            with FlaskApp.get_db_connection() as conn:
-                cursor = conn.cursor()
-                cursor.execute(
-                    "SELECT * FROM containerinfo WHERE name = ? AND datetime(measuretime) > datetime('now', '-30 minutes') ORDER BY measuretime DESC",
-                    (container_name,),
+        vm_name = request.args.get("vm")
+        try:
+            level, since = history_range()
+            cursor = history_cursor()
+            max_points = history_points()
+        except ValueError:
+            return {"message": "Invalid resolution, window, cursor or max_points"}, 400
+
+        if cursor is not None and level:
+            return {"message": "Cursors are only supported for raw stats"}, 400
+
+        if container_name and cursor is not None:
+            if vm_name:
+                rows, cursor = query_after(
+                    self.database,
+                    CONTAINERINFO_VM_QUERY,
+                    CONTAINERINFO_VM_CURSOR_QUERY,
+                    (vm_name, container_name, since),
+                    cursor,
                 )
-                container_infos = cursor.fetchall()
-
-                response = [dict(container_info) for container_info in container_infos]
-                return response
-        else:
+            else:
+                rows, cursor = query_after(
+                    self.database,
+                    CONTAINERINFO_QUERY,
+                    CONTAINERINFO_CURSOR_QUERY,
+                    (container_name, since),
+                    cursor,
+                )
+            return {"rows": downsample(rows, max_points), "cursor": cursor}
+
+        rows = None
+        if container_name and not level and self.buffer:
+            filters = {"vm": vm_name} if vm_name else {}
+            rows = self.buffer.query(
+                "containerinfo", since, name=container_name, **filters
+            )
+
+        if rows is None and container_name and vm_name:
+            rows = self.database.query(
+                CONTAINERINFO_VM_QUERIES[level], (vm_name, container_name, since)
+            )
+        elif rows is None and container_name:
+            rows = self.database.query(
+                CONTAINERINFO_QUERIES[level], (container_name, since)
+            )
+        elif rows is None:
             return {"message": "Missing container name"}, 400
+        return downsample(rows, max_points)
 
     def post(self):
-        """Stores the container information in the database."""
+        """
+        Stores the container information in the database.
+
+        Accepts either a single container or a list of containers, which are stored in
+        a single transaction.
+        """
 
         data = request.get_json()
         if not data:
             return {"message": "Invalid JSON"}, 400
 
-        required_fields = [
-            "name",
-            "cpuusage",
-            "ramusage",
-            "netrx",
-            "nettx",
-        ]
-        if any(field not in data for field in required_fields):
+        rows = data if isinstance(data, list) else [data]
+        if any(
+            not isinstance(row, dict) or row.keys() - ALLOWED_FIELDS["containerinfo"]
+            for row in rows
+        ):
+            return {"message": "Unknown field"}, 400
+
+        if any(
+            field not in row
+            for row in rows
+            for field in REQUIRED_FIELDS["containerinfo"]
+        ):
             return {"message": "Missing field"}, 400
 
-        FlaskApp.db_insert_values("containerinfo", data)
+        if not self.writer.submit({"containerinfo": rows}):
+            return {"message": "Write queue full"}, 503
         return {"message": "Container info updated successfully"}, 200
 
     @classmethod
-    def create_api(cls):
+    def create_api(cls, writer, database, buffer):
         """Creates the API endpoint."""
 
+        cls.writer = writer
+        cls.database = database
+        cls.buffer = buffer
         return cls
 
 
@@ -203,23 +594,472 @@ class ContainerList(Resource):
     """
     An API endpoint for container names.
 
-    The response contains a list of the names of all containers in the simulation.
+    The response contains a list of the VM and name of all containers in the
+    simulation, optionally filtered by the vm parameter.
+    """
+
+    def get(self):
+        """Generates the response for the API endpoint."""
+
+        vm_name = request.args.get("vm")
+
+        if vm_name:
+            return self.database.query(CONTAINERLIST_VM_QUERY, (vm_name,))
+        return self.database.query(CONTAINERLIST_QUERY)
+
+    @classmethod
+    def create_api(cls, database):
+        """Creates the API endpoint."""
+
+        cls.database = database
+        return cls
+
+
+class VMBatch(Resource):
+    """
+    An API endpoint for the VM information of many VMs at once.
+
+    The response contains a dictionary of VM names and their respective list of VM
+    information, read with a single query. The names parameter narrows the result down
+    to a comma separated list of VMs, the limit parameter caps the number of rows per
+    VM and the resolution, window, since and max_points parameters work the same way
+    as for /vminfo. A limit cannot be combined with since, as the rows it cuts off
+    would never be returned after the cursor moved past them.
+    """
+
+    def get(self):
+        """Generates the response for the API endpoint."""
+
+        try:
+            level, since = history_range()
+            cursor = history_cursor()
+            names, limit = batch_range()
+            max_points = history_points()
+        except ValueError:
+            return {
+                "message": "Invalid resolution, window, cursor, limit or max_points"
+            }, 400
+
+        if cursor is not None and level:
+            return {"message": "Cursors are only supported for raw stats"}, 400
+        if cursor is not None and limit is not None:
+            return {"message": "Cursors are not supported with a limit"}, 400
+
+        names = names or self.vm_names
+        if cursor is not None:
+            rows, cursor = query_after(
+                self.database,
+                VMINFO_BATCH_QUERIES[""],
+                VMINFO_BATCH_CURSOR_QUERY,
+                (json.dumps(names), since),
+                cursor,
+            )
+            return {
+                "rows": group_series(rows, ["name"], limit, max_points),
+                "cursor": cursor,
+            }
+
+        rows = None
+        if not level and self.buffer:
+            rows = self.buffer.query("vminfo", since)
+            if rows is not None:
+                rows = [row for row in rows if row["name"] in names]
+        if rows is None:
+            rows = self.database.query(
+                VMINFO_BATCH_QUERIES[level], (json.dumps(names), since)
+            )
+
+        return group_series(rows, ["name"], limit, max_points)
+
+    @classmethod
+    def create_api(cls, database, buffer, vm_names):
+        """Creates the API endpoint."""
+
+        cls.database = database
+        cls.buffer = buffer
+        cls.vm_names = vm_names
+        return cls
+
+
+class ContainerBatch(Resource):
+    """
+    An API endpoint for the container information of many containers at once.
+
+    The response contains a dictionary of VM names, each mapping container names to
+    their respective list of container information, read with a single query. The names
+    and vm parameters narrow the result down to a comma separated list of containers
+    and a single VM, the other parameters work the same way as for /vminfo/batch.
+    """
+
+    def get(self):
+        """Generates the response for the API endpoint."""
+
+        vm_name = request.args.get("vm")
+        try:
+            level, since = history_range()
+            cursor = history_cursor()
+            names, limit = batch_range()
+            max_points = history_points()
+        except ValueError:
+            return {
+                "message": "Invalid resolution, window, cursor, limit or max_points"
+            }, 400
+
+        if cursor is not None and level:
+            return {"message": "Cursors are only supported for raw stats"}, 400
+        if cursor is not None and limit is not None:
+            return {"message": "Cursors are not supported with a limit"}, 400
+
+        filters = {"vm": vm_name} if vm_name else {}
+        if not names:
+            containers = (
+                self.database.query(CONTAINERLIST_VM_QUERY, (vm_name,))
+                if vm_name
+                else self.database.query(CONTAINERLIST_QUERY)
+            )
+            names = list({container["name"] for container in containers})
+
+        if cursor is not None:
+            if vm_name:
+                rows, cursor = query_after(
+                    self.database,
+                    CONTAINERINFO_VM_BATCH_QUERIES[""],
+                    CONTAINERINFO_VM_BATCH_CURSOR_QUERY,
+                    (vm_name, json.dumps(names), since),
+                    cursor,
+                )
+            else:
+                rows, cursor = query_after(
+                    self.database,
+                    CONTAINERINFO_BATCH_QUERIES[""],
+                    CONTAINERINFO_BATCH_CURSOR_QUERY,
+                    (json.dumps(names), since),
+                    cursor,
+                )
+            return {
+                "rows": group_series(rows, ["vm", "name"], limit, max_points),
+                "cursor": cursor,
+            }
+
+        rows = None
+        if not level and self.buffer:
+            rows = self.buffer.query("containerinfo", since, **filters)
+            if rows is not None:
+                rows = [row for row in rows if row["name"] in names]
+        if rows is None and vm_name:
+            rows = self.database.query(
+                CONTAINERINFO_VM_BATCH_QUERIES[level],
+                (vm_name, json.dumps(names), since),
+            )
+        elif rows is None:
+            rows = self.database.query(
+                CONTAINERINFO_BATCH_QUERIES[level], (json.dumps(names), since)
+            )
+
+        return group_series(rows, ["vm", "name"], limit, max_points)
+
+    @classmethod
+    def create_api(cls, database, buffer):
+        """Creates the API endpoint."""
+
+        cls.database = database
+        cls.buffer = buffer
+        return cls
+
+
+class Ingest(Resource):
+    """
+    An API endpoint for storing stats in bulk.
+
+    Accepts a dictionary mapping table names to lists of rows and queues all of them
+    for the database writer. The field names end up in the insert queries, so rows with
+    fields that are not columns of their table are rejected.
+
+    The stats get sent here via the system_analytics() method of the StatChecker class
+    if the Flask server is not running in the same process as the simulation.
+    """
+
+    def post(self):
+        """Queues the rows of each table to be stored in the database."""
+
+        data = request.get_json()
+        if not data or not isinstance(data, dict):
+            return {"message": "Invalid JSON"}, 400
+
+        if any(
+            table_name not in REQUIRED_FIELDS or not isinstance(rows, list)
+            for table_name, rows in data.items()
+        ):
+            return {"message": "Invalid table"}, 400
+
+        if any(
+            not isinstance(row, dict) or row.keys() - ALLOWED_FIELDS[table_name]
+            for table_name, rows in data.items()
+            for row in rows
+        ):
+            return {"message": "Unknown field"}, 400
+
+        if any(
+            field not in row
+            for table_name, rows in data.items()
+            for row in rows
+            for field in REQUIRED_FIELDS[table_name]
+        ):
+            return {"message": "Missing field"}, 400
+
+        if not self.writer.submit(data):
+            return {"message": "Write queue full"}, 503
+        return {
+            "message": "Stats stored successfully",
+            "rows": sum(len(rows) for rows in data.values()),
+        }, 200
+
+    @classmethod
+    def create_api(cls, writer):
+        """Creates the API endpoint."""
+
+        cls.writer = writer
+        return cls
+
+
+class Aggregate(Resource):
+    """
+    An API endpoint for aggregate analytics of the recorded stats.
+
+    The response contains the number of samples, min, avg, max, p50, p95 and p99 of the
+    metric parameter (cpuusage by default) of each series in the table parameter
+    (vminfo by default) over the last window seconds. The names parameter narrows the
+    result down to a comma separated list of VMs or containers, the vm parameter to the
+    containers of a VM. If the by parameter is round, each series is summarized per
+    round instead.
+
+    Responses are cached per query and latest row id of the table, so that the stats
+    are only aggregated again once new stats have been stored.
+    """
+
+    def get(self):
+        """Generates the response for the API endpoint."""
+
+        table_name = request.args.get("table", "vminfo")
+        metric = request.args.get("metric", "cpuusage")
+        by = request.args.get("by", "")
+        vm_name = request.args.get("vm")
+        try:
+            window = int(request.args.get("window", HISTORY_WINDOW))
+            names, _ = batch_range()
+        except ValueError:
+            return {"message": "Invalid window or names"}, 400
+
+        if (
+            table_name not in AGGREGATE_TABLES
+            or metric not in AGGREGATE_METRICS
+            or by not in ["", "round"]
+            or window <= 0
+        ):
+            return {"message": "Invalid table, metric, by or window"}, 400
+
+        if not names and table_name == "vminfo":
+            names = self.vm_names
+        elif not names:
+            containers = (
+                self.database.query(CONTAINERLIST_VM_QUERY, (vm_name,))
+                if vm_name
+                else self.database.query(CONTAINERLIST_QUERY)
+            )
+            names = sorted({container["name"] for container in containers})
+
+        query = json.dumps([table_name, metric, by, vm_name, window, names])
+        digest = hashlib.sha1(query.encode()).hexdigest()[:16]
+
+        def render():
+            aggregates = aggregate(
+                self.database,
+                table_name,
+                metric,
+                names,
+                int(time() * 1000) - window * 1000,
+                by == "round",
+            )
+            if vm_name and table_name == "containerinfo":
+                aggregates = {vm_name: aggregates.get(vm_name, dict())}
+            return aggregates
+
+        return self.cache.response(
+            f"aggregate-{digest}", latest_id(self.database, table_name), render
+        )
+
+    @classmethod
+    def create_api(cls, database, vm_names, cache):
+        """Creates the API endpoint."""
+
+        cls.database = database
+        cls.vm_names = vm_names
+        cls.cache = ResponseCache(cache.epoch, AGGREGATE_CACHE_SIZE)
+        return cls
+
+
+class ScoreHistory(Resource):
+    """
+    An API endpoint for the score history of the teams.
+
+    The response contains a dictionary of team names and their respective list of
+    points, gain, exploiting and patched flagstore counts and captured flags per round,
+    oldest first. The teams parameter narrows the result down to a comma separated list
+    of teams, the start and end parameters to a range of round ids and the step
+    parameter downsamples it to every step-th round from the start.
+
+    The score history gets recorded at the end of each round in the Simulation class.
+    """
+
+    def get(self):
+        """Generates the response for the API endpoint."""
+
+        teams = [team for team in request.args.get("teams", "").split(",") if team]
+        try:
+            start = int(request.args.get("start", 0))
+            end = int(request.args.get("end", 2**63 - 1))
+            step = int(request.args.get("step", 1))
+        except ValueError:
+            return {"message": "Invalid start, end or step"}, 400
+
+        if step <= 0:
+            return {"message": "Step must be positive"}, 400
+
+        if teams:
+            rows = self.database.query(
+                SCOREHISTORY_TEAMS_QUERY, (json.dumps(teams), start, end, start, step)
+            )
+        else:
+            rows = self.database.query(SCOREHISTORY_QUERY, (start, end, start, step))
+
+        return group_series(rows, ["team"])
+
+    @classmethod
+    def create_api(cls, database):
+        """Creates the API endpoint."""
+
+        cls.database = database
+        return cls
+
+
+class RoundMetrics(Resource):
+    """
+    An API endpoint for metrics recorded per round.
+
+    Serves the exploit metrics, which contain the number of exploit requests, successful
+    requests and captured flags and the min, avg, max and p95 latency in milliseconds
+    per attacker, target, service and flagstore, and the flag submission metrics, which
+    contain the number of flags, success and duration in milliseconds of each team's
+    submission. The start and end parameters narrow the result down to a range of round
+    ids, the other parameters to the rows of an attacker, target, service, flagstore or
+    team.
+
+    The metrics get recorded at the end of each round in the Simulation class.
     """
 
     def get(self):
         """Generates the response for the API endpoint."""
 
-        with FlaskApp.get_db_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute("SELECT DISTINCT name FROM containerinfo")
-            container_names = cursor.fetchall()
+        try:
+            start = int(request.args.get("start", 0))
+            end = int(request.args.get("end", 2**63 - 1))
+        except ValueError:
+            return {"message": "Invalid start or end"}, 400
+
+        params = {column: request.args.get(column) for column in self.filters}
+        return self.database.query(self.query, {"start": start, "end": end, **params})
+
+    @classmethod
+    def create_api(cls, database, table_name):
+        """Creates the API endpoint."""
+
+        filters = ROUND_METRICS_FILTERS[table_name]
+        query = ROUND_METRICS_QUERY.format(
+            table_name=table_name,
+            filters="".join(
+                f" AND (:{column} IS NULL OR {column} = :{column})"
+                for column in filters
+            ),
+        )
+        return type(
+            f"{table_name.capitalize()}Metrics",
+            (cls,),
+            {"database": database, "filters": filters, "query": query},
+        )
+
+
+class RoundTimings(Resource):
+    """
+    An API endpoint for the timings of the phases of a round.
+
+    The response contains the round id, its start in epoch milliseconds, its duration
+    and the spans of the round parameter, or of the latest traced round if omitted,
+    ordered by start. Each span contains its phase, name, target, offset from the
+    round start and duration in milliseconds, so the round can be rendered as a
+    waterfall. Phases are the spans whose name equals their phase, the others are the
+    exploit batches, VM stats and flag submissions run during a phase.
+
+    The spans get recorded at the end of each round in the Simulation class.
+    """
+
+    def get(self):
+        """Generates the response for the API endpoint."""
+
+        round_id = request.args.get("round")
+        if round_id is not None:
+            try:
+                round_id = int(round_id)
+            except ValueError:
+                return {"message": "Invalid round"}, 400
+
+        spans = self.database.query(ROUNDTIMINGS_QUERY, (round_id,))
+        if not spans:
+            return {"round_id": round_id, "start": None, "duration": 0, "spans": []}
+
+        start = min(span["starttime"] for span in spans)
+        end = max(span["starttime"] + span["duration"] for span in spans)
+        return {
+            "round_id": spans[0]["round_id"],
+            "start": start,
+            "duration": round(end - start, 2),
+            "spans": [
+                {
+                    "phase": span["phase"],
+                    "name": span["name"],
+                    "target": span["target"],
+                    "offset": span["starttime"] - start,
+                    "duration": span["duration"],
+                }
+                for span in spans
+            ],
+        }
+
+    @classmethod
+    def create_api(cls, database):
+        """Creates the API endpoint."""
+
+        cls.database = database
+        return cls
+
+
+class WriterStats(Resource):
+    """
+    An API endpoint for database writer statistics.
+
+    The response contains the queue depth and flush latencies of the database writer.
+    For more details on the response format, see the DatabaseWriter.stats() method.
+    """
+
+    def get(self):
+        """Generates the response for the API endpoint."""
 
-            return [row[0] for row in container_names]
+        return self.writer.stats()
 
     @classmethod
-    def create_api(cls):
+    def create_api(cls, writer):
         """Creates the API endpoint."""
 
+        cls.writer = writer
         return cls
 
 
@@ -230,27 +1070,205 @@ class RoundInfo(Resource):
     The response contains a dictionary of information about the current round.
 
     The round information gets updated at the start of each round in the Simulation
-    class.
+    class. Since the round duration keeps growing, the response is cached per round
+    version and second.
     """
 
     def get(self):
         """Generates the response for the API endpoint."""
 
         with self.round_info_lock:
-            return {
-                "round_id": self.simulation.round_id,
-                "remaining_rounds": self.simulation.remaining_rounds,
-                "round_duration": round(time() - self.simulation.round_start, 2),
-                "round_length": self.simulation.round_length,
-                "total_rounds": self.simulation.total_rounds,
-            }
+            return self.cache.response(
+                "roundinfo",
+                f"{self.versions['round_info']}.{int(time())}",
+                self.simulation.round_info,
+            )
+
+    @classmethod
+    def create_api(cls, simulation, round_info_lock, versions, cache):
+        """Creates the API endpoint."""
+
+        cls.simulation = simulation
+        cls.round_info_lock = round_info_lock
+        cls.versions = versions
+        cls.cache = cache
+        return cls
+
+
+class Overview(Resource):
+    """
+    An API endpoint for an overview of the simulation.
+
+    The response contains the round information, the latest stats of each VM, the
+    containers with the highest CPU usage, the team leaderboard and the totals of
+    exploited and patched flagstores and captured flags in a single dictionary.
+
+    The overview gets precomputed at the end of each round in the Simulation class and
+    is served from memory, cached per overview version.
+    """
+
+    def get(self):
+        """Generates the response for the API endpoint."""
+
+        with self.round_info_lock:
+            return self.cache.response(
+                "overview", self.versions["overview"], lambda: self.simulation.overview
+            )
 
     @classmethod
-    def create_api(cls, simulation, round_info_lock):
+    def create_api(cls, simulation, round_info_lock, versions, cache):
         """Creates the API endpoint."""
 
         cls.simulation = simulation
         cls.round_info_lock = round_info_lock
+        cls.versions = versions
+        cls.cache = cache
+        return cls
+
+
+class Perf(Resource):
+    """
+    An API endpoint for the latencies of the outbound calls of the simulation.
+
+    The response contains a percentile table of the current and of the previous round,
+    with a row for each operation, host and service. For more details on the response
+    format, see the PerfRecorder.report() method.
+    """
+
+    def get(self):
+        """Generates the response for the API endpoint."""
+
+        return self.perf.report()
+
+    @classmethod
+    def create_api(cls, perf):
+        """Creates the API endpoint."""
+
+        cls.perf = perf
+        return cls
+
+
+class Metrics(Resource):
+    """
+    An API endpoint for Prometheus metrics.
+
+    The response contains the counters and histograms of the simulation, like the round
+    phase durations, exploit results, flag submissions, outbound call latencies and
+    failures, event loop lag and queue depths, in the Prometheus text exposition format.
+    All values are kept in memory, so a scrape never queries the database. For more
+    details on the metrics, see the MetricsRegistry class.
+    """
+
+    def get(self):
+        """Generates the response for the API endpoint."""
+
+        return Response(self.metrics.render(), mimetype=METRICS_MIMETYPE)
+
+    @classmethod
+    def create_api(cls, metrics):
+        """Creates the API endpoint."""
+
+        cls.metrics = metrics
+        return cls
+
+
+class Export(Resource):
+    """
+    An API endpoint for exporting recorded stats.
+
+    The response streams the rows of the table parameter (vminfo by default) measured
+    between the start and end parameters in epoch milliseconds, each labeled with its
+    round id, in the format given by the format parameter: csv (the default) or arrow
+    for an Arrow IPC stream if pyarrow is installed.
+    """
+
+    def get(self):
+        """Generates the response for the API endpoint."""
+
+        table_name = request.args.get("table", "vminfo")
+        export_format = request.args.get("format", "csv")
+        try:
+            start = int(request.args.get("start", 0))
+            end = int(request.args.get("end", 2**63 - 1))
+        except ValueError:
+            return {"message": "Invalid start or end"}, 400
+
+        if table_name not in EXPORT_TABLES or export_format not in EXPORT_FORMATS:
+            return {"message": "Invalid table or format"}, 400
+
+        export, mimetype, extension = EXPORT_FORMATS[export_format]
+        return Response(
+            stream_with_context(export(self.database, table_name, start, end)),
+            mimetype=mimetype,
+            headers={
+                "Content-Disposition": f"attachment; filename={table_name}.{extension}"
+            },
+        )
+
+    @classmethod
+    def create_api(cls, database):
+        """Creates the API endpoint."""
+
+        cls.database = database
+        return cls
+
+
+class Snapshot(Resource):
+    """
+    An API endpoint for a snapshot of the simulation state.
+
+    Used by API worker processes in place of the teams, services, VM names, round
+    information, overview and perf endpoints. The response is the snapshot last published by the
+    SnapshotPublisher of the simulation process, cached per version like the
+    endpoints it replaces.
+    """
+
+    def get(self):
+        """Generates the response for the API endpoint."""
+
+        rows = self.database.query(SNAPSHOT_QUERY, (self.name,))
+        if not rows:
+            return {"message": "Snapshot not published yet"}, 503
+
+        return self.cache.response(
+            self.name, rows[0]["version"], lambda: json.loads(rows[0]["body"])
+        )
+
+    @classmethod
+    def create_api(cls, database, cache, name):
+        """Creates the API endpoint."""
+
+        return type(
+            f"{name.capitalize()}Snapshot",
+            (cls,),
+            {"database": database, "cache": cache, "name": name},
+        )
+
+
+class Events(Resource):
+    """
+    An API endpoint for server-sent events.
+
+    The response is an event stream that starts with the current round and team
+    information and then pushes the new vm and container stats of each collection
+    cycle, round ticks and team changes as they happen.
+    """
+
+    def get(self):
+        """Generates the response for the API endpoint."""
+
+        subscriber = self.broker.subscribe()
+        return Response(
+            stream_with_context(self.broker.stream(subscriber)),
+            mimetype="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
+
+    @classmethod
+    def create_api(cls, broker):
+        """Creates the API endpoint."""
+
+        cls.broker = broker
         return cls
 
 
@@ -273,30 +1291,183 @@ class FlaskApp:
         self.locks = locks
         self.path = os.path.dirname(os.path.abspath(__file__)).replace("\\", "/")
         self.init_db()
+        self.database = Database()
+        self.writer = DatabaseWriter(self.database)
+        self.writer.start()
+        self.rollup = Rollup(self.database, self.writer)
+        self.rollup.start()
+        self.retention = Retention(
+            self.database, self.setup.config.settings.stats_retention
+        )
+        self.retention.start()
+        self.buffer = None
+        if self.setup.config.settings.stats_ring_buffer:
+            self.buffer = StatsBuffer()
+            self.writer.subscribe(self.buffer.add, list(BUFFERED_TABLES))
+
+        self.snapshots = SnapshotPublisher(
+            self.database, self.setup, self.simulation, self.locks
+        )
+        self.broker = EventBroker(self.setup, self.simulation, self.locks)
+        self.writer.subscribe(self.broker.publish_stats, STREAMED_TABLES)
+        self.broker.start()
+
+        # Stats and rounds recorded in this process are queued directly instead of via HTTP
+        self.simulation.orchestrator.stat_checker.ingest = self.writer.submit
+        self.simulation.ingest = self.writer.submit
+        self.writer.perf = self.simulation.perf
+        self.writer.subscribe(self.simulation.tracer.write, ["roundtimings"])
+        self.simulation.metrics.collect(self.writer_metrics)
+        self.simulation.metrics.collect(
+            lambda: {"event_queue_depth": self.broker.queue_depth()}
+        )
 
         # Create RESTful API endpoints
+        self.cache = ResponseCache()
         self.api = Api(self.app)
-        ServiceApi = Services.create_api(self.setup.services, self.locks["service"])
-        TeamApi = Teams.create_api(self.setup.teams, self.locks["team"])
-        VmApi = VMs.create_api()
-        VmListApi = VMList.create_api(list(self.setup.ips.public_ip_addresses.keys()))
-        ContainerApi = Containers.create_api()
-        ContainerListApi = ContainerList.create_api()
-        RoundInfoApi = RoundInfo.create_api(self.simulation, self.locks["round_info"])
+        ServiceApi = Services.create_api(
+            self.setup.services, self.locks["service"], self.setup.versions, self.cache
+        )
+        TeamApi = Teams.create_api(
+            self.setup.teams, self.locks["team"], self.setup.versions, self.cache
+        )
+        VmApi = VMs.create_api(self.writer, self.database, self.buffer)
+        VmListApi = VMList.create_api(
+            list(self.setup.ips.public_ip_addresses.keys()),
+            self.setup.versions,
+            self.cache,
+        )
+        VmBatchApi = VMBatch.create_api(
+            self.database,
+            self.buffer,
+            list(self.setup.ips.public_ip_addresses.keys()),
+        )
+        ContainerApi = Containers.create_api(self.writer, self.database, self.buffer)
+        ContainerListApi = ContainerList.create_api(self.database)
+        ContainerBatchApi = ContainerBatch.create_api(self.database, self.buffer)
+        IngestApi = Ingest.create_api(self.writer)
+        WriterStatsApi = WriterStats.create_api(self.writer)
+        ExportApi = Export.create_api(self.database)
+        ScoreHistoryApi = ScoreHistory.create_api(self.database)
+        RoundTimingsApi = RoundTimings.create_api(self.database)
+        AggregateApi = Aggregate.create_api(
+            self.database, list(self.setup.ips.public_ip_addresses.keys()), self.cache
+        )
+        RoundInfoApi = RoundInfo.create_api(
+            self.simulation, self.locks["round_info"], self.setup.versions, self.cache
+        )
+        OverviewApi = Overview.create_api(
+            self.simulation, self.locks["round_info"], self.setup.versions, self.cache
+        )
+        PerfApi = Perf.create_api(self.simulation.perf)
+        MetricsApi = Metrics.create_api(self.simulation.metrics)
+        EventsApi = Events.create_api(self.broker)
         self.api.add_resource(TeamApi, "/teams")
         self.api.add_resource(ServiceApi, "/services")
         self.api.add_resource(VmApi, "/vminfo")
         self.api.add_resource(VmListApi, "/vmlist")
+        self.api.add_resource(VmBatchApi, "/vminfo/batch")
         self.api.add_resource(ContainerApi, "/containerinfo")
         self.api.add_resource(ContainerListApi, "/containerlist")
+        self.api.add_resource(ContainerBatchApi, "/containerinfo/batch")
+        self.api.add_resource(IngestApi, "/ingest")
+        self.api.add_resource(WriterStatsApi, "/writerstats")
+        self.api.add_resource(ExportApi, "/export")
+        self.api.add_resource(ScoreHistoryApi, "/scorehistory")
+        self.api.add_resource(RoundTimingsApi, "/roundtimings")
+        self.api.add_resource(AggregateApi, "/aggregate")
+        for table_name in ROUND_METRICS_FILTERS:
+            RoundMetricsApi = RoundMetrics.create_api(self.database, table_name)
+            self.api.add_resource(RoundMetricsApi, f"/{table_name}")
         self.api.add_resource(RoundInfoApi, "/roundinfo")
+        self.api.add_resource(OverviewApi, "/overview")
+        self.api.add_resource(PerfApi, "/perf")
+        self.api.add_resource(MetricsApi, "/metrics")
+        self.api.add_resource(EventsApi, "/events")
 
     def run(self) -> None:
-        """Starts the Flask server."""
+        """
+        Starts the Flask server.
+
+        By default, the API is served by the threaded development server in this
+        process. If API workers are configured, it is served by that many worker
+        processes sharing one listening socket instead, so that requests never compete
+        with the simulation for the GIL. The workers read the simulation state from
+        the snapshots published to the database. Server-sent events are only available
+        from the development server, while the Prometheus metrics, which only exist in
+        this process, are served on a port of their own.
+
+        On Windows, where sockets cannot be inherited, each worker receives its own
+        duplicate of the listening socket through a pipe once it is running.
+        """
 
         log = logging.getLogger("werkzeug")
         log.setLevel(logging.ERROR)
-        self.app.run(host="0.0.0.0", debug=False)
+
+        workers = self.setup.config.settings.api_workers
+        if not workers:
+            self.app.run(host="0.0.0.0", debug=False)
+            return
+
+        self.snapshots.publish()
+        self.snapshots.start()
+        self.serve_metrics()
+
+        listener = socket.create_server(("0.0.0.0", API_PORT))
+        context = multiprocessing.get_context("spawn")
+        processes = []
+        for _ in range(workers):
+            if sys.platform == "win32":
+                receiver, sender = context.Pipe(duplex=False)
+                process = context.Process(
+                    target=run_worker, args=(receiver, self.cache.epoch), daemon=True
+                )
+                process.start()
+                sender.send(listener.share(process.pid))
+            else:
+                process = context.Process(
+                    target=run_worker, args=(listener, self.cache.epoch), daemon=True
+                )
+                process.start()
+            processes.append(process)
+        for process in processes:
+            process.join()
+
+    def serve_metrics(self, port: int = METRICS_PORT) -> BaseWSGIServer:
+        """
+        Serves the Prometheus metrics of the simulation in a background thread.
+
+        Args:
+            port (int): The port the metrics are served on.
+
+        Returns:
+            BaseWSGIServer: The running server.
+        """
+
+        app = Flask(__name__)
+        Api(app).add_resource(Metrics.create_api(self.simulation.metrics), "/metrics")
+        server = make_server("0.0.0.0", port, app, threaded=True)
+        thread = Thread(target=server.serve_forever)
+        thread.daemon = True
+        thread.start()
+        return server
+
+    def writer_metrics(self) -> Dict[str, int]:
+        """
+        Return the queue depth and write statistics of the database writer as metrics.
+
+        Returns:
+            Dict[str, int]: The values by metric name.
+        """
+
+        stats = self.writer.stats()
+        return {
+            "writer_queue_depth": stats["queue_depth"],
+            "writer_rows_written_total": stats["rows_written"],
+            "writer_rows_dropped_total": stats["rows_dropped"],
+            "writer_rows_rejected_total": stats["rows_rejected"],
+            "writer_errors_total": stats["errors"],
+        }
 
     def init_db(self) -> None:
         """Initializes the database."""
@@ -309,35 +1480,92 @@ class FlaskApp:
         connection.commit()
         connection.close()
 
-    @staticmethod
-    def get_db_connection() -> sqlite3.Connection:
-        """Returns a connection to the database."""
+    def delete_db(self) -> None:
+        """Deletes the database."""
+
+        if os.path.exists("database.db"):
+            os.remove("database.db")
 
-        connection = sqlite3.connect("database.db")
-        connection.row_factory = sqlite3.Row
-        return connection
 
-    @staticmethod
-    @retry(stop=stop_after_attempt(10))
-    def db_insert_values(table_name, data) -> Tuple[str, Tuple]:
-        """Inserts values into the database."""
+class ApiWorker:
+    """
+    The Flask application of an API worker process.
 
-        value_names = ",".join(data.keys())
-        value_placeholders = ",".join(["?" for _ in data.keys()])
+    Serves the same RESTful API endpoints as the FlaskApp, except for server-sent
+    events, without access to the simulation. The teams, services, VM names, round
+    information, overview and latencies are read from the snapshots published by the simulation process, the
+    stats are read from the database and submitted stats are stored by a database
+    writer of its own.
+    """
 
-        query = f"INSERT INTO {table_name}({value_names}) VALUES ({value_placeholders})"
+    def __init__(self, epoch: str = None):
+        """Initializes the worker application."""
 
-        params = tuple([value for value in data.values()])
+        self.app = Flask(__name__)
+        self.database = Database()
+        self.writer = DatabaseWriter(self.database)
+        self.writer.start()
+        self.cache = ResponseCache(epoch)
 
-        with FlaskApp.get_db_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute(query, params)
-            conn.commit()
+        vm_list = self.database.query(SNAPSHOT_QUERY, ("vmlist",))
+        vm_names = json.loads(vm_list[0]["body"]) if vm_list else []
 
-        return query, params
+        # Create RESTful API endpoints
+        self.api = Api(self.app)
+        for name in ["teams", "services", "vmlist", "roundinfo", "overview", "perf"]:
+            SnapshotApi = Snapshot.create_api(self.database, self.cache, name)
+            self.api.add_resource(SnapshotApi, f"/{name}")
+        VmApi = VMs.create_api(self.writer, self.database, None)
+        VmBatchApi = VMBatch.create_api(self.database, None, vm_names)
+        ContainerApi = Containers.create_api(self.writer, self.database, None)
+        ContainerListApi = ContainerList.create_api(self.database)
+        ContainerBatchApi = ContainerBatch.create_api(self.database, None)
+        IngestApi = Ingest.create_api(self.writer)
+        WriterStatsApi = WriterStats.create_api(self.writer)
+        ExportApi = Export.create_api(self.database)
+        ScoreHistoryApi = ScoreHistory.create_api(self.database)
+        RoundTimingsApi = RoundTimings.create_api(self.database)
+        AggregateApi = Aggregate.create_api(self.database, vm_names, self.cache)
+        self.api.add_resource(VmApi, "/vminfo")
+        self.api.add_resource(VmBatchApi, "/vminfo/batch")
+        self.api.add_resource(ContainerApi, "/containerinfo")
+        self.api.add_resource(ContainerListApi, "/containerlist")
+        self.api.add_resource(ContainerBatchApi, "/containerinfo/batch")
+        self.api.add_resource(IngestApi, "/ingest")
+        self.api.add_resource(WriterStatsApi, "/writerstats")
+        self.api.add_resource(ExportApi, "/export")
+        self.api.add_resource(ScoreHistoryApi, "/scorehistory")
+        self.api.add_resource(RoundTimingsApi, "/roundtimings")
+        self.api.add_resource(AggregateApi, "/aggregate")
+        for table_name in ROUND_METRICS_FILTERS:
+            RoundMetricsApi = RoundMetrics.create_api(self.database, table_name)
+            self.api.add_resource(RoundMetricsApi, f"/{table_name}")
+
+    def serve(self, listener: socket.socket) -> None:
+        """
+        Serves requests accepted on the shared listening socket until terminated.
+
+        Args:
+            listener (socket.socket): The listening socket shared by all workers.
+        """
+
+        server = make_server(
+            "0.0.0.0", API_PORT, self.app, threaded=True, fd=listener.fileno()
+        )
+        server.serve_forever()
+
+
+def run_worker(listener: Union[socket.socket, Connection], epoch: str) -> None:
+    """
+    The entry point of an API worker process.
 
-    def delete_db(self) -> None:
-        """Deletes the database."""
+    Args:
+        listener (Union[socket.socket, Connection]): The listening socket shared by all workers, or on Windows the pipe it is shared through.
+        epoch (str): The epoch of the response cache of the simulation process.
+    """
 
-        if os.path.exists("database.db"):
-            os.remove("database.db")
+    if isinstance(listener, Connection):
+        listener = socket.fromshare(listener.recv())
+
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)
+    ApiWorker(epoch).serve(listener)
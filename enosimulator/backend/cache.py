@@ -0,0 +1,116 @@
+import gzip
+import json
+from dataclasses import dataclass
+from threading import Lock
+from time import time
+from typing import Callable, Dict
+
+from flask import Response, request
+
+
+@dataclass(frozen=True)
+class CachedResponse:
+    """
+    A dataclass representing the serialized body of a specific version of a resource.
+
+    Attributes:
+        version: The version of the resource the body was rendered from.
+        etag: The strong entity tag of the body.
+        body: The JSON encoded body.
+        gzipped: The gzip compressed body.
+    """
+
+    version: str
+    etag: str
+    body: bytes
+    gzipped: bytes
+
+
+class ResponseCache:
+    """
+    A Class for caching the serialized responses of versioned resources.
+
+    The simulation bumps the version of a resource whenever it mutates it, so a body
+    only has to be serialized and compressed once per version. Requests whose
+    If-None-Match header contains the current entity tag are answered with 304 Not
+    Modified without any body at all.
+
+    Entity tags contain the start time of the cache, so that tags handed out before a
+    restart of the backend never match the restarted versions. API worker processes
+    share the epoch of the simulation process so that their tags agree.
+
+    Caches of resources with an open ended number of names, such as one per query, are
+    bounded by evicting the least recently rendered response.
+
+    Attributes:
+        epoch: The start time of the cache in hexadecimal seconds.
+        max_entries: The maximum number of cached responses or None for no limit.
+        entries: The latest cached response of each resource.
+        lock: The lock used for synchronizing access to the cached responses.
+    """
+
+    def __init__(self, epoch: str = None, max_entries: int = None):
+        """Initialize the ResponseCache class."""
+
+        self.epoch = epoch or format(int(time()), "x")
+        self.max_entries = max_entries
+        self.entries: Dict[str, CachedResponse] = dict()
+        self.lock = Lock()
+
+    def response(self, name: str, version, render: Callable) -> Response:
+        """
+        Return the response of a resource for the current request.
+
+        Args:
+            name (str): The name of the resource.
+            version: The current version of the resource.
+            render (Callable): A function returning the JSON serializable resource, only called if the version is not cached yet.
+
+        Returns:
+            Response: A 304 response if the client has the current version, the possibly compressed body otherwise.
+        """
+
+        entry = self._entry(name, str(version), render)
+
+        if request.if_none_match.contains(entry.etag):
+            response = Response(status=304)
+        elif request.accept_encodings["gzip"]:
+            response = Response(entry.gzipped, mimetype="application/json")
+            response.headers["Content-Encoding"] = "gzip"
+        else:
+            response = Response(entry.body, mimetype="application/json")
+
+        response.set_etag(entry.etag)
+        response.headers["Vary"] = "Accept-Encoding"
+        return response
+
+    def _entry(self, name: str, version: str, render: Callable) -> CachedResponse:
+        """
+        Return the cached response of a resource, rendering it if it is outdated.
+
+        Args:
+            name (str): The name of the resource.
+            version (str): The current version of the resource.
+            render (Callable): A function returning the JSON serializable resource.
+
+        Returns:
+            CachedResponse: The cached response of the current version.
+        """
+
+        with self.lock:
+            entry = self.entries.get(name)
+            if entry is None or entry.version != version:
+                body = json.dumps(render()).encode()
+                entry = CachedResponse(
+                    version,
+                    f"{self.epoch}-{name}-{version}",
+                    body,
+                    gzip.compress(body),
+                )
+                # Reinserting the entry moves it to the end of the eviction order
+                self.entries.pop(name, None)
+                self.entries[name] = entry
+                if self.max_entries and len(self.entries) > self.max_entries:
+                    del self.entries[next(iter(self.entries))]
+
+        return entry
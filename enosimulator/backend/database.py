@@ -0,0 +1,228 @@
+import re
+import sqlite3
+from contextlib import contextmanager
+from queue import Empty, Full, Queue
+from threading import Lock
+from typing import Dict, Iterator, List, Tuple
+
+# Applied to every connection, journal_mode=WAL is also persisted in the database file
+PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "mmap_size": 256 * 1024 * 1024,
+    "busy_timeout": 5000,
+    "temp_store": "MEMORY",
+}
+STATEMENT_CACHE_SIZE = 256
+# The number of idle read connections kept open, further ones are closed after use
+READER_POOL_SIZE = 8
+
+# Version 1 stores measure times as integer epoch milliseconds instead of local time text,
+# version 2 adds autoincrementing row ids to the raw stats tables
+SCHEMA_VERSION = 2
+MIGRATED_TABLES = ["vminfo", "containerinfo"]
+# Migrations only create what is missing, the drop statements would wipe the other tables
+SCHEMA_DROP = re.compile(r"^DROP TABLE IF EXISTS \w+;\r?$", re.MULTILINE)
+SCHEMA_CREATE = re.compile(r"\bCREATE (TABLE|INDEX) (?!IF NOT EXISTS)")
+EPOCH_MS = "CASE WHEN typeof(measuretime) = 'text' THEN CAST(ROUND((julianday(measuretime, 'utc') - 2440587.5) * 86400000) AS INTEGER) ELSE measuretime END"
+
+
+class Database:
+    """
+    A Class for accessing the SQLite database.
+
+    Connections are tuned for concurrent access: WAL lets readers proceed while the
+    database writer commits, and synchronous=NORMAL only syncs on checkpoints. Read
+    connections are borrowed from a bounded pool, so the prepared statements cached by
+    sqlite3 are reused across requests instead of being compiled for every query, while
+    the threads started for each request never leave a connection behind.
+
+    Attributes:
+        path: The path of the SQLite database.
+        readers: The pool of idle read connections.
+        connections: The long-lived connections opened by the components of the backend.
+        lock: The lock used for synchronizing access to the list of connections.
+    """
+
+    def __init__(self, path: str = "database.db", pool_size: int = READER_POOL_SIZE):
+        """Initialize the Database class."""
+
+        self.path = path
+        self.readers = Queue(maxsize=pool_size)
+        self.connections = []
+        self.lock = Lock()
+
+    def connect(self) -> sqlite3.Connection:
+        """
+        Open a new tuned connection to the database that is closed with the database.
+
+        The connection may be handed to another thread, but must only be used by one
+        thread at a time.
+
+        Returns:
+            sqlite3.Connection: The connection to the database.
+        """
+
+        connection = self._open()
+        with self.lock:
+            self.connections.append(connection)
+        return connection
+
+    @contextmanager
+    def reader(self) -> Iterator[sqlite3.Connection]:
+        """
+        Borrow a read connection from the pool, opening a new one if none is idle.
+
+        The connection is returned to the pool afterwards, or closed if the pool is full.
+
+        Yields:
+            sqlite3.Connection: A read only connection.
+        """
+
+        try:
+            connection = self.readers.get_nowait()
+        except Empty:
+            connection = self._open()
+            connection.row_factory = sqlite3.Row
+            connection.execute("PRAGMA query_only=1")
+
+        try:
+            yield connection
+        finally:
+            try:
+                self.readers.put_nowait(connection)
+            except Full:
+                connection.close()
+
+    def query(self, query: str, params: Tuple = ()) -> List[Dict]:
+        """
+        Run a query on the read connection of the current thread.
+
+        Queries should use placeholders instead of formatting values into the query,
+        otherwise every call compiles a new statement.
+
+        Args:
+            query (str): The SQL query to run.
+            params (Tuple): The parameters of the query.
+
+        Returns:
+            List[Dict]: The resulting rows.
+        """
+
+        with self.reader() as connection:
+            return [dict(row) for row in connection.execute(query, params)]
+
+    def migrate(self, schema: str) -> bool:
+        """
+        Migrate a database created by an older version of the schema.
+
+        The stats tables are recreated with the given schema and their rows are copied
+        over in their original order, converting local time text measure times to epoch
+        milliseconds. Container stats from before they were stored per VM only ever
+        belonged to vulnbox1. All other tables and indexes of the schema are only
+        created if they are missing, so their rows are kept.
+
+        Args:
+            schema (str): The SQL script creating the current schema.
+
+        Returns:
+            bool: Whether the database was migrated.
+        """
+
+        connection = self._open()
+        try:
+            return self._migrate(connection, schema)
+        finally:
+            connection.close()
+
+    def _migrate(self, connection: sqlite3.Connection, schema: str) -> bool:
+        """
+        Migrate the database over the given connection, see the migrate method.
+
+        Args:
+            connection (sqlite3.Connection): The connection used for the migration.
+            schema (str): The SQL script creating the current schema.
+
+        Returns:
+            bool: Whether the database was migrated.
+        """
+
+        if connection.execute("PRAGMA user_version").fetchone()[0] >= SCHEMA_VERSION:
+            return False
+
+        old_columns = dict()
+        for table_name in MIGRATED_TABLES:
+            columns = [
+                row[1] for row in connection.execute(f"PRAGMA table_info({table_name})")
+            ]
+            if not columns:
+                continue
+            old_columns[table_name] = columns
+
+            # Index names are global, so the indexes of the old table have to go first
+            indexes = connection.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = ? AND sql IS NOT NULL",
+                (table_name,),
+            ).fetchall()
+            for (index_name,) in indexes:
+                connection.execute(f"DROP INDEX {index_name}")
+            connection.execute(f"ALTER TABLE {table_name} RENAME TO {table_name}_old")
+
+        connection.executescript(
+            SCHEMA_CREATE.sub(r"CREATE \1 IF NOT EXISTS ", SCHEMA_DROP.sub("", schema))
+        )
+
+        with connection:
+            for table_name, columns in old_columns.items():
+                new_columns = [
+                    row[1]
+                    for row in connection.execute(f"PRAGMA table_info({table_name})")
+                ]
+                copied = [
+                    column
+                    for column in new_columns
+                    if column in columns and column != "measuretime"
+                ]
+                values = list(copied)
+                if table_name == "containerinfo" and "vm" not in columns:
+                    copied.append("vm")
+                    values.append("'vulnbox1'")
+                copied.append("measuretime")
+                values.append(EPOCH_MS)
+
+                connection.execute(
+                    f"INSERT OR IGNORE INTO {table_name}({','.join(copied)}) SELECT {','.join(values)} FROM {table_name}_old ORDER BY rowid"
+                )
+                connection.execute(f"DROP TABLE {table_name}_old")
+
+        return True
+
+    def close(self) -> None:
+        """Close the long-lived connections and the idle read connections."""
+
+        with self.lock:
+            connections, self.connections = self.connections, []
+        while True:
+            try:
+                connections.append(self.readers.get_nowait())
+            except Empty:
+                break
+        for connection in connections:
+            connection.close()
+
+    def _open(self) -> sqlite3.Connection:
+        """
+        Open a new tuned connection to the database.
+
+        Returns:
+            sqlite3.Connection: The connection to the database.
+        """
+
+        connection = sqlite3.connect(
+            self.path,
+            check_same_thread=False,
+            cached_statements=STATEMENT_CACHE_SIZE,
+        )
+        for pragma, value in PRAGMAS.items():
+            connection.execute(f"PRAGMA {pragma}={value}")
+        return connection
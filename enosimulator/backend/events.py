@@ -0,0 +1,222 @@
+import json
+import logging
+from queue import Empty, Full, Queue
+from threading import Event, Lock, Thread
+from typing import Dict, Iterator, List
+
+from setup import Setup
+from simulation import Simulation
+
+log = logging.getLogger(__name__)
+
+# The stats tables whose new rows are pushed to the subscribers
+STREAMED_TABLES = ["vminfo", "containerinfo"]
+EVENT_INTERVAL = 1
+EVENT_QUEUE_SIZE = 100
+HEARTBEAT_INTERVAL = 15
+
+
+def format_event(event: str, data) -> str:
+    """
+    Format an event in the server-sent events wire format.
+
+    Args:
+        event (str): The name of the event.
+        data: The JSON serializable payload of the event.
+
+    Returns:
+        str: The formatted event.
+    """
+
+    return f"event: {event}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n"
+
+
+class EventBroker:
+    """
+    A Class for pushing simulation updates to server-sent event subscribers.
+
+    Instead of every dashboard polling the API, each update is formatted once and put
+    into the queue of every subscriber. New stats are pushed as they are stored by
+    the database writer, which happens once per collection cycle, while round ticks and
+    team changes are detected by comparing the simulation state every event interval.
+    The teams are only compared once their version was bumped.
+
+    Subscribers that fall behind by more than the queue size are disconnected, so a
+    slow client can never hold up the others.
+
+    Attributes:
+        setup: The setup containing the teams of the simulation.
+        simulation: The simulation whose rounds are tracked.
+        locks: The locks used for synchronizing access to the simulation state.
+        interval: The number of seconds between two checks of the simulation state.
+        subscribers: The event queues of the connected subscribers.
+        lock: The lock used for synchronizing access to the subscribers and snapshots.
+        round_info: The round information that was last pushed.
+        teams: The team information that was last pushed.
+        team_version: The version of the teams that was last compared.
+        stopped: The event used for stopping the broker thread.
+        thread: The thread checking the simulation state.
+    """
+
+    def __init__(
+        self,
+        setup: Setup,
+        simulation: Simulation,
+        locks: Dict,
+        interval: float = EVENT_INTERVAL,
+    ):
+        """Initialize the EventBroker class."""
+
+        self.setup = setup
+        self.simulation = simulation
+        self.locks = locks
+        self.interval = interval
+        self.subscribers = set()
+        self.lock = Lock()
+        self.round_info = dict()
+        self.teams = dict()
+        self.team_version = None
+        self.stopped = Event()
+        self.thread = None
+
+    def start(self) -> None:
+        """Start the broker thread if it is not running yet."""
+
+        if self.thread and self.thread.is_alive():
+            return
+
+        self.thread = Thread(target=self._run)
+        self.thread.daemon = True
+        self.thread.start()
+
+    def stop(self) -> None:
+        """Stop the broker thread."""
+
+        self.stopped.set()
+
+    def subscribe(self) -> Queue:
+        """
+        Register a new subscriber.
+
+        The subscriber starts out with the current round and team information, so that it
+        only needs to apply the following deltas.
+
+        Returns:
+            Queue: The queue receiving the formatted events of the subscriber.
+        """
+
+        subscriber = Queue(maxsize=EVENT_QUEUE_SIZE)
+        with self.lock:
+            if self.round_info:
+                subscriber.put_nowait(format_event("round", self.round_info))
+            if self.teams:
+                subscriber.put_nowait(format_event("teams", self.teams))
+            self.subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber: Queue) -> None:
+        """
+        Remove a subscriber.
+
+        Args:
+            subscriber (Queue): The queue of the subscriber.
+        """
+
+        with self.lock:
+            self.subscribers.discard(subscriber)
+
+    def queue_depth(self) -> int:
+        """
+        Return the number of events waiting in the queues of all subscribers.
+
+        Returns:
+            int: The number of queued events.
+        """
+
+        with self.lock:
+            return sum(subscriber.qsize() for subscriber in self.subscribers)
+
+    def stream(self, subscriber: Queue) -> Iterator[str]:
+        """
+        Yield the events of a subscriber until it is disconnected.
+
+        A comment is sent whenever no event was pushed for a while to keep the
+        connection alive through proxies.
+
+        Args:
+            subscriber (Queue): The queue of the subscriber.
+
+        Yields:
+            str: The formatted events.
+        """
+
+        try:
+            while subscriber in self.subscribers:
+                try:
+                    yield subscriber.get(timeout=HEARTBEAT_INTERVAL)
+                except Empty:
+                    yield ": keepalive\n\n"
+        finally:
+            self.unsubscribe(subscriber)
+
+    def publish(self, event: str, data) -> None:
+        """
+        Push an event to all subscribers.
+
+        Args:
+            event (str): The name of the event.
+            data: The JSON serializable payload of the event.
+        """
+
+        message = format_event(event, data)
+        with self.lock:
+            for subscriber in list(self.subscribers):
+                try:
+                    subscriber.put_nowait(message)
+                except Full:
+                    self.subscribers.discard(subscriber)
+
+    def publish_stats(self, batch: Dict[str, List[Dict]]) -> None:
+        """
+        Push the new rows of the streamed stats tables to all subscribers.
+
+        Args:
+            batch (Dict[str, List[Dict]]): A mapping of table names to their rows.
+        """
+
+        for table_name in STREAMED_TABLES:
+            if batch.get(table_name):
+                self.publish(table_name, batch[table_name])
+
+    def check(self) -> None:
+        """Push the round information and the teams that changed since the last check."""
+
+        with self.locks["round_info"]:
+            round_info = self.simulation.round_info()
+        if round_info["round_id"] != self.round_info.get("round_id"):
+            with self.lock:
+                self.round_info = round_info
+            self.publish("round", round_info)
+
+        with self.locks["team"]:
+            team_version = self.setup.versions["team"]
+            if team_version == self.team_version:
+                return
+            teams = {name: team.to_json() for name, team in self.setup.teams.items()}
+        self.team_version = team_version
+        changed = {
+            name: team for name, team in teams.items() if self.teams.get(name) != team
+        }
+        if changed:
+            with self.lock:
+                self.teams = teams
+            self.publish("teams", changed)
+
+    def _run(self) -> None:
+        """Check the simulation state every interval until stopped."""
+
+        while not self.stopped.wait(self.interval):
+            try:
+                self.check()
+            except Exception:
+                log.exception("Checking the simulation state failed")
@@ -0,0 +1,168 @@
+import csv
+import io
+from typing import Dict, Iterator, List, Tuple
+
+from .database import Database
+from .rollup import ROLLUP_LEVELS, ROLLUP_TABLES
+
+try:
+    import pyarrow
+except ImportError:
+    # The Arrow export is only available if pyarrow is installed
+    pyarrow = None
+
+EXPORT_TABLES = list(ROLLUP_TABLES) + [
+    f"{table_name}_{level}" for table_name in ROLLUP_TABLES for level in ROLLUP_LEVELS
+]
+# The number of rows read from the database and written out at once
+EXPORT_CHUNK_SIZE = 10_000
+# Every row is labeled with the round that was running when it was measured. Rows are
+# read in insertion order, so that SQLite never has to sort the whole table.
+EXPORT_QUERY = "SELECT (SELECT round_id FROM rounds WHERE rounds.measuretime <= {table_name}.measuretime ORDER BY rounds.measuretime DESC LIMIT 1) AS round_id, * FROM {table_name} WHERE measuretime >= ? AND measuretime < ? ORDER BY rowid"
+ARROW_TYPES = {"INTEGER": "int64", "REAL": "float64", "TEXT": "string"}
+# Marks the end of an Arrow IPC stream
+ARROW_EOS = b"\xff\xff\xff\xff\x00\x00\x00\x00"
+
+
+def export_chunks(
+    database: Database, table_name: str, start: int = 0, end: int = 2**63 - 1
+) -> Iterator[Tuple[List[str], List[Tuple]]]:
+    """
+    Read the stats of a table in chunks, so that they never have to fit into memory.
+
+    Args:
+        database (Database): The database to read from.
+        table_name (str): The name of the stats table.
+        start (int): The earliest measure time in epoch milliseconds.
+        end (int): The measure time in epoch milliseconds before which to stop.
+
+    Raises:
+        ValueError: If the table cannot be exported.
+
+    Yields:
+        Tuple[List[str], List[Tuple]]: The column names and the rows of a chunk.
+    """
+
+    if table_name not in EXPORT_TABLES:
+        raise ValueError("Invalid table for export.")
+
+    with database.reader() as connection:
+        cursor = connection.execute(
+            EXPORT_QUERY.format(table_name=table_name), (start, end)
+        )
+        columns = [description[0] for description in cursor.description]
+        try:
+            # The first chunk is yielded even if it is empty, so the columns are always known
+            rows = cursor.fetchmany(EXPORT_CHUNK_SIZE)
+            yield columns, [tuple(row) for row in rows]
+            while rows := cursor.fetchmany(EXPORT_CHUNK_SIZE):
+                yield columns, [tuple(row) for row in rows]
+        finally:
+            cursor.close()
+
+
+def export_csv(
+    database: Database, table_name: str, start: int = 0, end: int = 2**63 - 1
+) -> Iterator[str]:
+    """
+    Export the stats of a table as CSV.
+
+    Args:
+        database (Database): The database to read from.
+        table_name (str): The name of the stats table.
+        start (int): The earliest measure time in epoch milliseconds.
+        end (int): The measure time in epoch milliseconds before which to stop.
+
+    Yields:
+        str: The header followed by the rows of each chunk.
+    """
+
+    header = True
+    for columns, rows in export_chunks(database, table_name, start, end):
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        if header:
+            writer.writerow(columns)
+            header = False
+        writer.writerows(rows)
+        yield buffer.getvalue()
+
+
+def export_arrow(
+    database: Database, table_name: str, start: int = 0, end: int = 2**63 - 1
+) -> Iterator[bytes]:
+    """
+    Export the stats of a table as an Arrow IPC stream with one record batch per chunk.
+
+    The schema is derived from the declared column types instead of the data, so that
+    every batch has the same schema even if a column is empty in the first chunk.
+
+    Args:
+        database (Database): The database to read from.
+        table_name (str): The name of the stats table.
+        start (int): The earliest measure time in epoch milliseconds.
+        end (int): The measure time in epoch milliseconds before which to stop.
+
+    Raises:
+        RuntimeError: If pyarrow is not installed.
+        ValueError: If the table cannot be exported.
+
+    Yields:
+        bytes: The schema message, a record batch message per chunk and the end of stream marker.
+    """
+
+    if pyarrow is None:
+        raise RuntimeError("The Arrow export requires pyarrow.")
+    if table_name not in EXPORT_TABLES:
+        raise ValueError("Invalid table for export.")
+
+    types = {"round_id": "INTEGER", **table_types(database, table_name)}
+    schema = pyarrow.schema(
+        [
+            (column, getattr(pyarrow, ARROW_TYPES[type_])())
+            for column, type_ in types.items()
+        ]
+    )
+    yield schema.serialize().to_pybytes()
+
+    for columns, rows in export_chunks(database, table_name, start, end):
+        if not rows:
+            continue
+        batch = pyarrow.RecordBatch.from_arrays(
+            [
+                pyarrow.array([row[index] for row in rows], schema.field(column).type)
+                for index, column in enumerate(columns)
+            ],
+            schema=schema,
+        )
+        yield batch.serialize().to_pybytes()
+
+    yield ARROW_EOS
+
+
+def table_types(database: Database, table_name: str) -> Dict[str, str]:
+    """
+    Return the declared type of each column of a table.
+
+    Args:
+        database (Database): The database to read from.
+        table_name (str): The name of the table.
+
+    Returns:
+        Dict[str, str]: The declared type of each column in order.
+    """
+
+    return {
+        row["name"]: row["type"]
+        for row in database.query(f"PRAGMA table_info({table_name})")
+    }
+
+
+# The function, mimetype and file extension of each available export format
+EXPORT_FORMATS = {"csv": (export_csv, "text/csv", "csv")}
+if pyarrow is not None:
+    EXPORT_FORMATS["arrow"] = (
+        export_arrow,
+        "application/vnd.apache.arrow.stream",
+        "arrows",
+    )
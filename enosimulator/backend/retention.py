@@ -0,0 +1,120 @@
+import sqlite3
+from threading import Event, Thread
+from time import sleep, time
+from typing import Dict
+
+from .database import Database
+
+# The number of seconds stats are kept in each table, 0 keeps them forever
+RETENTION_DEFAULTS = {
+    "vminfo": 2 * 60 * 60,
+    "containerinfo": 2 * 60 * 60,
+    "vminfo_1m": 24 * 60 * 60,
+    "containerinfo_1m": 24 * 60 * 60,
+    "vminfo_10m": 0,
+    "containerinfo_10m": 0,
+}
+PRUNE_INTERVAL = 60
+PRUNE_BATCH_SIZE = 1000
+# The pause between two delete batches that lets the database writer commit
+PRUNE_PAUSE = 0.05
+
+
+class Retention:
+    """
+    A Class for pruning stats that are older than the retention of their table.
+
+    Rows are deleted in small batches, each in its own short transaction, so that the
+    database writer never waits long for the write lock. Since the stats tables are
+    append-only, the oldest rows are also the ones with the lowest rowids and each batch
+    is found at the very start of the table.
+
+    Attributes:
+        database: The database the stats are pruned from.
+        retention: The number of seconds stats are kept in each table.
+        interval: The number of seconds between two prunes.
+        batch_size: The maximum number of rows deleted in a single transaction.
+        connection: The connection used for deleting stats.
+        stopped: The event used for stopping the retention thread.
+        thread: The thread pruning the stats.
+    """
+
+    def __init__(
+        self,
+        database: Database,
+        retention: Dict[str, int],
+        interval: float = PRUNE_INTERVAL,
+        batch_size: int = PRUNE_BATCH_SIZE,
+    ):
+        """Initialize the Retention class."""
+
+        if any(table_name not in RETENTION_DEFAULTS for table_name in retention):
+            raise ValueError("Invalid table in stats retention.")
+
+        self.database = database
+        self.retention = {**RETENTION_DEFAULTS, **retention}
+        self.interval = interval
+        self.batch_size = batch_size
+        self.connection = None
+        self.stopped = Event()
+        self.thread = None
+
+    def start(self) -> None:
+        """Start the retention thread if it is not running yet."""
+
+        if self.thread and self.thread.is_alive():
+            return
+
+        self.thread = Thread(target=self._run)
+        self.thread.daemon = True
+        self.thread.start()
+
+    def stop(self) -> None:
+        """Stop the retention thread after the current prune."""
+
+        self.stopped.set()
+
+    def prune(self, now: int = None) -> Dict[str, int]:
+        """
+        Delete all stats that are older than the retention of their table.
+
+        Args:
+            now (int): The current time in epoch milliseconds.
+
+        Returns:
+            Dict[str, int]: The number of deleted rows of each table.
+        """
+
+        if self.connection is None:
+            self.connection = self.database.connect()
+
+        now = now if now is not None else int(time() * 1000)
+        deleted = dict()
+        for table_name, retention in self.retention.items():
+            if not retention:
+                continue
+
+            deleted[table_name] = 0
+            cutoff = now - retention * 1000
+            while not self.stopped.is_set():
+                with self.connection:
+                    count = self.connection.execute(
+                        f"DELETE FROM {table_name} WHERE rowid IN (SELECT rowid FROM {table_name} WHERE measuretime < ? LIMIT ?)",
+                        (cutoff, self.batch_size),
+                    ).rowcount
+                deleted[table_name] += count
+                if count < self.batch_size:
+                    break
+                sleep(PRUNE_PAUSE)
+
+        return deleted
+
+    def _run(self) -> None:
+        """Prune the stats every interval until stopped."""
+
+        while not self.stopped.wait(self.interval):
+            try:
+                self.prune()
+            except sqlite3.Error:
+                # Whatever was not pruned gets pruned in the next interval
+                continue
@@ -0,0 +1,107 @@
+from collections import deque
+from threading import Lock
+from time import time
+from typing import Dict, List, Tuple
+
+# The columns identifying the series of each table kept in memory
+BUFFERED_TABLES = {"vminfo": ["name"], "containerinfo": ["vm", "name"]}
+RING_BUFFER_WINDOW = 30 * 60
+# The maximum number of rows kept per series, regardless of the window
+RING_BUFFER_SIZE = 10_000
+
+
+class StatsBuffer:
+    """
+    A Class for keeping the latest raw stats of each series in memory.
+
+    Every row the database writer stores is also appended to the ring buffer of its
+    series as it was stored, and rows that fall out of the window are evicted. Requests
+    for raw stats that lie completely within the window are served from here without
+    touching SQLite.
+
+    Attributes:
+        window: The number of seconds of stats kept in memory.
+        size: The maximum number of rows kept per series.
+        started: The time in epoch milliseconds the buffer started receiving stats.
+        series: The ring buffer of rows of each table and series.
+        lock: The lock used for synchronizing access to the ring buffers.
+    """
+
+    def __init__(self, window: int = RING_BUFFER_WINDOW, size: int = RING_BUFFER_SIZE):
+        """Initialize the StatsBuffer class."""
+
+        self.window = window
+        self.size = size
+        self.started = int(time() * 1000)
+        self.series: Dict[Tuple, deque] = dict()
+        self.lock = Lock()
+
+    def add(self, batch: Dict[str, List[Dict]]) -> None:
+        """
+        Append the rows of the buffered tables to the ring buffers of their series.
+
+        Args:
+            batch (Dict[str, List[Dict]]): A mapping of table names to their rows.
+        """
+
+        now = int(time() * 1000)
+        with self.lock:
+            for table_name, rows in batch.items():
+                if table_name not in BUFFERED_TABLES:
+                    continue
+
+                for row in rows:
+                    row = {**row, "measuretime": row.get("measuretime", now)}
+                    key = (table_name,) + tuple(
+                        row[column] for column in BUFFERED_TABLES[table_name]
+                    )
+                    if key not in self.series:
+                        self.series[key] = deque(maxlen=self.size)
+                    self.series[key].append(row)
+
+            self._evict(now)
+
+    def query(self, table_name: str, since: int, **filters) -> List[Dict]:
+        """
+        Return the buffered rows of a table newer than since, latest first.
+
+        Args:
+            table_name (str): The name of the table.
+            since (int): The earliest measure time in epoch milliseconds.
+            **filters: The values the series columns have to match.
+
+        Returns:
+            List[Dict]: The matching rows or None if the buffer does not cover since.
+        """
+
+        if since < max(self.started, int(time() * 1000) - self.window * 1000):
+            return None
+
+        columns = BUFFERED_TABLES[table_name]
+        with self.lock:
+            rows = [
+                row
+                for key, series in self.series.items()
+                if key[0] == table_name
+                and all(
+                    key[1 + columns.index(column)] == value
+                    for column, value in filters.items()
+                )
+                for row in series
+                if row["measuretime"] > since
+            ]
+
+        return sorted(rows, key=lambda row: row["measuretime"], reverse=True)
+
+    def _evict(self, now: int) -> None:
+        """
+        Evict the rows that fell out of the window.
+
+        Args:
+            now (int): The current time in epoch milliseconds.
+        """
+
+        cutoff = now - self.window * 1000
+        for series in self.series.values():
+            while series and series[0]["measuretime"] < cutoff:
+                series.popleft()
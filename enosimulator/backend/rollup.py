@@ -0,0 +1,172 @@
+from math import ceil
+from threading import Event, Thread
+from time import time
+from typing import Dict, List, Tuple
+
+from .database import Database
+from .writer import DatabaseWriter
+
+# The bucket size in milliseconds of each rollup level
+ROLLUP_LEVELS = {"1m": 60 * 1000, "10m": 10 * 60 * 1000}
+# The columns identifying the series of each rolled up table
+ROLLUP_TABLES = {"vminfo": ["name"], "containerinfo": ["vm", "name"]}
+ROLLUP_METRICS = ["cpuusage", "ramusage", "netrx", "nettx"]
+ROLLUP_INTERVAL = 30
+# Buckets are only rolled up once stats that arrive late can no longer fall into them
+ROLLUP_LAG = 2 * 60 * 1000
+
+
+def percentile(values: List[float], percent: float) -> float:
+    """
+    Return the nearest-rank percentile of the given values.
+
+    Args:
+        values (List[float]): The values sorted in ascending order.
+        percent (float): The percentile between 0 and 100.
+
+    Returns:
+        float: The value at the given percentile.
+    """
+
+    return values[max(0, ceil(percent / 100 * len(values)) - 1)]
+
+
+class Rollup:
+    """
+    A Class for aggregating the raw stats into coarser rollup tables.
+
+    Every rollup interval, each bucket that was completed since the last run is
+    aggregated into the min, avg, max and p95 of each metric per series. The rolled up
+    rows are queued for the database writer like any other stats.
+
+    Attributes:
+        database: The database the raw stats are read from.
+        writer: The writer used for storing the rolled up rows.
+        interval: The number of seconds between two rollups.
+        watermarks: The end of the last rolled up bucket of each rollup table.
+        stopped: The event used for stopping the rollup thread.
+        thread: The thread running the rollups.
+    """
+
+    def __init__(
+        self,
+        database: Database,
+        writer: DatabaseWriter,
+        interval: float = ROLLUP_INTERVAL,
+    ):
+        """Initialize the Rollup class."""
+
+        self.database = database
+        self.writer = writer
+        self.interval = interval
+        self.watermarks = dict()
+        self.stopped = Event()
+        self.thread = None
+
+    def start(self) -> None:
+        """Start the rollup thread if it is not running yet."""
+
+        if self.thread and self.thread.is_alive():
+            return
+
+        self.thread = Thread(target=self._run)
+        self.thread.daemon = True
+        self.thread.start()
+
+    def stop(self) -> None:
+        """Stop the rollup thread after the current rollup."""
+
+        self.stopped.set()
+
+    def roll_up(self, now: int = None) -> Dict[str, List[Dict]]:
+        """
+        Aggregate all buckets that were completed since the last rollup.
+
+        The watermarks only advance once the writer accepted the rolled up rows, so
+        buckets refused because of a full write queue are rolled up again next time.
+
+        Args:
+            now (int): The current time in epoch milliseconds.
+
+        Returns:
+            Dict[str, List[Dict]]: The rolled up rows of each rollup table, empty if the writer refused them.
+        """
+
+        now = now if now is not None else int(time() * 1000)
+        batch = dict()
+        watermarks = dict()
+        for table_name, keys in ROLLUP_TABLES.items():
+            for level, size in ROLLUP_LEVELS.items():
+                rollup_table = f"{table_name}_{level}"
+                end = (now - ROLLUP_LAG) // size * size
+                start = self.watermarks.get(rollup_table)
+                if start is None:
+                    first = self.database.query(
+                        f"SELECT MIN(measuretime) AS measuretime FROM {table_name}"
+                    )[0]["measuretime"]
+                    if first is None:
+                        continue
+                    start = first // size * size
+
+                if end <= start:
+                    continue
+
+                batch[rollup_table] = self._aggregate(
+                    table_name, keys, size, start, end
+                )
+                watermarks[rollup_table] = end
+
+        batch = {table_name: rows for table_name, rows in batch.items() if rows}
+        if batch and not self.writer.submit(batch):
+            return dict()
+        self.watermarks.update(watermarks)
+        return batch
+
+    def _run(self) -> None:
+        """Roll up the raw stats every interval until stopped."""
+
+        while not self.stopped.wait(self.interval):
+            self.roll_up()
+
+    def _aggregate(
+        self, table_name: str, keys: List[str], size: int, start: int, end: int
+    ) -> List[Dict]:
+        """
+        Aggregate the raw stats of a table between start and end into buckets.
+
+        Args:
+            table_name (str): The name of the raw stats table.
+            keys (List[str]): The columns identifying a series.
+            size (int): The bucket size in milliseconds.
+            start (int): The start of the first bucket in epoch milliseconds.
+            end (int): The end of the last bucket in epoch milliseconds.
+
+        Returns:
+            List[Dict]: The rolled up rows.
+        """
+
+        rows = self.database.query(
+            f"SELECT {','.join(keys + ['measuretime'] + ROLLUP_METRICS)} FROM {table_name} WHERE measuretime >= ? AND measuretime < ?",
+            (start, end),
+        )
+
+        buckets: Dict[Tuple, List[Dict]] = dict()
+        for row in rows:
+            bucket = tuple(row[key] for key in keys) + (
+                row["measuretime"] // size * size,
+            )
+            buckets.setdefault(bucket, []).append(row)
+
+        rollup_rows = []
+        for bucket, bucket_rows in buckets.items():
+            rollup_row = dict(zip(keys + ["measuretime"], bucket))
+            rollup_row["samples"] = len(bucket_rows)
+            for metric in ROLLUP_METRICS:
+                values = sorted(row[metric] for row in bucket_rows)
+                rollup_row[f"{metric}_min"] = values[0]
+                rollup_row[f"{metric}_avg"] = round(sum(values) / len(values), 2)
+                rollup_row[f"{metric}_max"] = values[-1]
+                rollup_row[f"{metric}_p95"] = percentile(values, 95)
+            rollup_rows.append(rollup_row)
+
+        return rollup_rows
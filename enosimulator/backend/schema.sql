@@ -1,6 +1,7 @@
 DROP TABLE IF EXISTS vminfo;
 
 CREATE TABLE vminfo (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
     name TEXT NOT NULL,
     ip TEXT NOT NULL,
     cpu TEXT NOT NULL,
@@ -12,8 +13,8 @@ CREATE TABLE vminfo (
     ramusage REAL NOT NULL,
     netrx REAL NOT NULL,
     nettx REAL NOT NULL,
-    measuretime DATETIME DEFAULT (datetime('now','localtime')) NOT NULL,
-    PRIMARY KEY (name, measuretime)
+    measuretime INTEGER DEFAULT (CAST(ROUND((julianday('now') - 2440587.5) * 86400000) AS INTEGER)) NOT NULL,
+    UNIQUE (name, measuretime)
 );
 
 CREATE INDEX name_measuretime_vms ON vminfo (name, measuretime);
@@ -22,13 +23,216 @@ CREATE INDEX name_measuretime_vms ON vminfo (name, measuretime);
 DROP TABLE IF EXISTS containerinfo;
 
 CREATE TABLE containerinfo (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    vm TEXT NOT NULL,
     name TEXT NOT NULL,
     cpuusage REAL NOT NULL,
     ramusage REAL NOT NULL,
     netrx REAL NOT NULL,
     nettx REAL NOT NULL,
-    measuretime DATETIME DEFAULT (datetime('now','localtime')) NOT NULL,
+    blockread REAL NOT NULL DEFAULT 0,
+    blockwrite REAL NOT NULL DEFAULT 0,
+    pids INTEGER NOT NULL DEFAULT 0,
+    measuretime INTEGER DEFAULT (CAST(ROUND((julianday('now') - 2440587.5) * 86400000) AS INTEGER)) NOT NULL,
+    UNIQUE (vm, name, measuretime)
+);
+
+CREATE INDEX name_measuretime_containers ON containerinfo (name, measuretime);
+
+
+DROP TABLE IF EXISTS vminfo_1m;
+
+CREATE TABLE vminfo_1m (
+    name TEXT NOT NULL,
+    measuretime INTEGER NOT NULL,
+    samples INTEGER NOT NULL,
+    cpuusage_min REAL NOT NULL,
+    cpuusage_avg REAL NOT NULL,
+    cpuusage_max REAL NOT NULL,
+    cpuusage_p95 REAL NOT NULL,
+    ramusage_min REAL NOT NULL,
+    ramusage_avg REAL NOT NULL,
+    ramusage_max REAL NOT NULL,
+    ramusage_p95 REAL NOT NULL,
+    netrx_min REAL NOT NULL,
+    netrx_avg REAL NOT NULL,
+    netrx_max REAL NOT NULL,
+    netrx_p95 REAL NOT NULL,
+    nettx_min REAL NOT NULL,
+    nettx_avg REAL NOT NULL,
+    nettx_max REAL NOT NULL,
+    nettx_p95 REAL NOT NULL,
     PRIMARY KEY (name, measuretime)
 );
 
-CREATE INDEX name_measuretime_containers ON containerinfo (name, measuretime);
+
+DROP TABLE IF EXISTS vminfo_10m;
+
+CREATE TABLE vminfo_10m (
+    name TEXT NOT NULL,
+    measuretime INTEGER NOT NULL,
+    samples INTEGER NOT NULL,
+    cpuusage_min REAL NOT NULL,
+    cpuusage_avg REAL NOT NULL,
+    cpuusage_max REAL NOT NULL,
+    cpuusage_p95 REAL NOT NULL,
+    ramusage_min REAL NOT NULL,
+    ramusage_avg REAL NOT NULL,
+    ramusage_max REAL NOT NULL,
+    ramusage_p95 REAL NOT NULL,
+    netrx_min REAL NOT NULL,
+    netrx_avg REAL NOT NULL,
+    netrx_max REAL NOT NULL,
+    netrx_p95 REAL NOT NULL,
+    nettx_min REAL NOT NULL,
+    nettx_avg REAL NOT NULL,
+    nettx_max REAL NOT NULL,
+    nettx_p95 REAL NOT NULL,
+    PRIMARY KEY (name, measuretime)
+);
+
+
+DROP TABLE IF EXISTS containerinfo_1m;
+
+CREATE TABLE containerinfo_1m (
+    vm TEXT NOT NULL,
+    name TEXT NOT NULL,
+    measuretime INTEGER NOT NULL,
+    samples INTEGER NOT NULL,
+    cpuusage_min REAL NOT NULL,
+    cpuusage_avg REAL NOT NULL,
+    cpuusage_max REAL NOT NULL,
+    cpuusage_p95 REAL NOT NULL,
+    ramusage_min REAL NOT NULL,
+    ramusage_avg REAL NOT NULL,
+    ramusage_max REAL NOT NULL,
+    ramusage_p95 REAL NOT NULL,
+    netrx_min REAL NOT NULL,
+    netrx_avg REAL NOT NULL,
+    netrx_max REAL NOT NULL,
+    netrx_p95 REAL NOT NULL,
+    nettx_min REAL NOT NULL,
+    nettx_avg REAL NOT NULL,
+    nettx_max REAL NOT NULL,
+    nettx_p95 REAL NOT NULL,
+    PRIMARY KEY (vm, name, measuretime)
+);
+
+CREATE INDEX name_measuretime_containers_1m ON containerinfo_1m (name, measuretime);
+
+
+DROP TABLE IF EXISTS containerinfo_10m;
+
+CREATE TABLE containerinfo_10m (
+    vm TEXT NOT NULL,
+    name TEXT NOT NULL,
+    measuretime INTEGER NOT NULL,
+    samples INTEGER NOT NULL,
+    cpuusage_min REAL NOT NULL,
+    cpuusage_avg REAL NOT NULL,
+    cpuusage_max REAL NOT NULL,
+    cpuusage_p95 REAL NOT NULL,
+    ramusage_min REAL NOT NULL,
+    ramusage_avg REAL NOT NULL,
+    ramusage_max REAL NOT NULL,
+    ramusage_p95 REAL NOT NULL,
+    netrx_min REAL NOT NULL,
+    netrx_avg REAL NOT NULL,
+    netrx_max REAL NOT NULL,
+    netrx_p95 REAL NOT NULL,
+    nettx_min REAL NOT NULL,
+    nettx_avg REAL NOT NULL,
+    nettx_max REAL NOT NULL,
+    nettx_p95 REAL NOT NULL,
+    PRIMARY KEY (vm, name, measuretime)
+);
+
+CREATE INDEX name_measuretime_containers_10m ON containerinfo_10m (name, measuretime);
+
+
+DROP TABLE IF EXISTS rounds;
+
+CREATE TABLE rounds (
+    round_id INTEGER NOT NULL,
+    measuretime INTEGER NOT NULL
+);
+
+CREATE INDEX measuretime_rounds ON rounds (measuretime);
+
+
+DROP TABLE IF EXISTS scorehistory;
+
+CREATE TABLE scorehistory (
+    round_id INTEGER NOT NULL,
+    team TEXT NOT NULL,
+    points REAL NOT NULL,
+    gain REAL NOT NULL,
+    exploiting INTEGER NOT NULL,
+    patched INTEGER NOT NULL,
+    flags INTEGER NOT NULL,
+    measuretime INTEGER NOT NULL
+);
+
+CREATE INDEX team_round_id_scorehistory ON scorehistory (team, round_id);
+CREATE INDEX round_id_scorehistory ON scorehistory (round_id);
+
+
+DROP TABLE IF EXISTS exploitstats;
+
+CREATE TABLE exploitstats (
+    round_id INTEGER NOT NULL,
+    attacker TEXT NOT NULL,
+    target TEXT NOT NULL,
+    service TEXT NOT NULL,
+    flagstore TEXT NOT NULL,
+    requests INTEGER NOT NULL,
+    ok INTEGER NOT NULL,
+    flags INTEGER NOT NULL,
+    latency_min REAL NOT NULL,
+    latency_avg REAL NOT NULL,
+    latency_max REAL NOT NULL,
+    latency_p95 REAL NOT NULL,
+    measuretime INTEGER NOT NULL
+);
+
+CREATE INDEX round_id_exploitstats ON exploitstats (round_id);
+
+
+DROP TABLE IF EXISTS submissionstats;
+
+CREATE TABLE submissionstats (
+    round_id INTEGER NOT NULL,
+    team TEXT NOT NULL,
+    flags INTEGER NOT NULL,
+    ok INTEGER NOT NULL,
+    duration REAL NOT NULL,
+    measuretime INTEGER NOT NULL
+);
+
+CREATE INDEX round_id_submissionstats ON submissionstats (round_id);
+
+
+DROP TABLE IF EXISTS roundtimings;
+
+CREATE TABLE roundtimings (
+    round_id INTEGER NOT NULL,
+    phase TEXT NOT NULL,
+    name TEXT NOT NULL,
+    target TEXT NOT NULL,
+    starttime INTEGER NOT NULL,
+    duration REAL NOT NULL
+);
+
+CREATE INDEX round_id_roundtimings ON roundtimings (round_id);
+
+
+DROP TABLE IF EXISTS snapshots;
+
+CREATE TABLE snapshots (
+    name TEXT PRIMARY KEY,
+    version TEXT NOT NULL,
+    body TEXT NOT NULL
+);
+
+
+PRAGMA user_version = 2;
@@ -0,0 +1,160 @@
+import json
+import sqlite3
+from contextlib import nullcontext
+from threading import Event, Thread
+from time import time
+from typing import Callable, ContextManager, Dict, List, Tuple
+
+from setup import Setup
+from simulation import Simulation
+
+from .database import Database
+
+SNAPSHOT_INTERVAL = 1
+SNAPSHOT_QUERY = "SELECT version, body FROM snapshots WHERE name = ?"
+SNAPSHOT_UPSERT = "INSERT INTO snapshots(name, version, body) VALUES (?, ?, ?) ON CONFLICT(name) DO UPDATE SET version = excluded.version, body = excluded.body"
+
+
+class SnapshotPublisher:
+    """
+    A Class for publishing the in-memory simulation state to the database.
+
+    API worker processes cannot access the teams, services, round information, overview and
+    latency percentiles of the simulation process, so every snapshot interval, each resource whose version
+    changed since the last interval is rendered and stored in the snapshots table,
+    where the workers read it from.
+
+    Attributes:
+        database: The database the snapshots are stored in.
+        setup: The setup containing the ips, teams, services and their versions.
+        simulation: The simulation whose round information is published.
+        locks: The locks used for synchronizing access to the simulation state.
+        interval: The number of seconds between two publishes.
+        versions: The last published version of each snapshot.
+        connection: The connection used for storing the snapshots.
+        stopped: The event used for stopping the publisher thread.
+        thread: The thread publishing the snapshots.
+    """
+
+    def __init__(
+        self,
+        database: Database,
+        setup: Setup,
+        simulation: Simulation,
+        locks: Dict,
+        interval: float = SNAPSHOT_INTERVAL,
+    ):
+        """Initialize the SnapshotPublisher class."""
+
+        self.database = database
+        self.setup = setup
+        self.simulation = simulation
+        self.locks = locks
+        self.interval = interval
+        self.versions = dict()
+        self.connection = None
+        self.stopped = Event()
+        self.thread = None
+
+    def start(self) -> None:
+        """Start the publisher thread if it is not running yet."""
+
+        if self.thread and self.thread.is_alive():
+            return
+
+        self.thread = Thread(target=self._run)
+        self.thread.daemon = True
+        self.thread.start()
+
+    def stop(self) -> None:
+        """Stop the publisher thread."""
+
+        self.stopped.set()
+
+    def publish(self) -> List[str]:
+        """
+        Store the snapshots whose version changed since they were last published.
+
+        Returns:
+            List[str]: The names of the published snapshots.
+        """
+
+        if self.connection is None:
+            self.connection = self.database.connect()
+
+        rows = []
+        for name, (lock, version, render) in self._snapshots().items():
+            with lock:
+                current = str(version())
+                if self.versions.get(name) == current:
+                    continue
+                rows.append((name, current, json.dumps(render())))
+
+        if rows:
+            with self.connection:
+                self.connection.executemany(SNAPSHOT_UPSERT, rows)
+            self.versions.update({name: version for name, version, _ in rows})
+
+        return [name for name, _, _ in rows]
+
+    def _snapshots(self) -> Dict[str, Tuple[ContextManager, Callable, Callable]]:
+        """
+        Return the lock, version and render function of each snapshot.
+
+        The ip addresses do not change once the infrastructure is built, so they are
+        read without a lock. The round duration keeps growing, so the round information
+        is versioned per round and second like its API endpoint, while the latency
+        percentiles keep changing during a round and are versioned per second.
+
+        Returns:
+            Dict[str, Tuple[ContextManager, Callable, Callable]]: The snapshots by name.
+        """
+
+        versions = self.setup.versions
+        return {
+            "teams": (
+                self.locks["team"],
+                lambda: versions["team"],
+                lambda: {
+                    name: team.to_json() for name, team in self.setup.teams.items()
+                },
+            ),
+            "services": (
+                self.locks["service"],
+                lambda: versions["service"],
+                lambda: {
+                    name: service.to_json()
+                    for name, service in self.setup.services.items()
+                },
+            ),
+            "vmlist": (
+                nullcontext(),
+                lambda: versions["ips"],
+                lambda: list(self.setup.ips.public_ip_addresses.keys()),
+            ),
+            "roundinfo": (
+                self.locks["round_info"],
+                lambda: f"{versions['round_info']}.{int(time())}",
+                self.simulation.round_info,
+            ),
+            "overview": (
+                self.locks["round_info"],
+                lambda: versions["overview"],
+                lambda: self.simulation.overview,
+            ),
+            "perf": (
+                nullcontext(),
+                lambda: int(time()),
+                self.simulation.perf.report,
+            ),
+        }
+
+    def _run(self) -> None:
+        """Publish the changed snapshots every interval until stopped."""
+
+        while not self.stopped.wait(self.interval):
+            try:
+                self.publish()
+            except sqlite3.Error:
+                # The snapshots are published again in the next interval
+                self.versions.clear()
@@ -0,0 +1,308 @@
+import logging
+import sqlite3
+from queue import Empty, Queue
+from threading import Lock, Thread
+from time import perf_counter
+from typing import Callable, Dict, List, Tuple
+
+from .database import Database
+
+log = logging.getLogger(__name__)
+
+WRITER_QUEUE_SIZE = 10_000
+WRITER_BATCH_SIZE = 500
+WRITER_FLUSH_INTERVAL = 0.5
+
+
+def insert_query(table_name: str, value_names: Tuple[str, ...]) -> str:
+    """
+    Build the query inserting a row with the given values into a table.
+
+    Args:
+        table_name (str): The name of the table.
+        value_names (Tuple[str, ...]): The names of the columns the row has values for.
+
+    Returns:
+        str: The parameterized insert query.
+    """
+
+    value_placeholders = ",".join(["?" for _ in value_names])
+    return f"INSERT INTO {table_name}({','.join(value_names)}) VALUES ({value_placeholders})"
+
+
+class DatabaseWriter:
+    """
+    A Class for writing rows to the database from a single background thread.
+
+    Rows are put into a bounded queue without ever touching SQLite on the caller's
+    thread. The writer thread owns a long-lived connection, drains the queue and
+    groups the rows into transactions that are committed once enough rows were
+    collected or the flush interval has passed. If a transaction fails, its rows are
+    inserted one by one, so that a single bad row only costs itself and is logged.
+
+    Listeners are notified of the rows of every committed transaction as they were
+    stored, including the ids and the defaults the database filled in.
+
+    Attributes:
+        database: The database the rows are written to.
+        batch_size: The maximum number of rows written in a single transaction.
+        flush_interval: The maximum number of seconds a row waits before it is written.
+        queue: The bounded queue of rows waiting to be written.
+        connection: The long-lived connection used by the writer thread.
+        thread: The thread writing the rows to the database.
+        lock: The lock used for synchronizing access to the writer stats and queueing batches.
+        listeners: The functions notified of the stored rows and the tables they are interested in.
+        notified_tables: The tables whose stored rows are read back for the listeners.
+        rows_written: The number of rows written to the database.
+        rows_dropped: The number of rows rejected because the queue was full.
+        rows_rejected: The number of rows the database refused to store.
+        batches_written: The number of transactions committed.
+        errors: The number of transactions that failed.
+        last_flush: The duration of the last transaction in seconds.
+        max_flush: The duration of the longest transaction in seconds.
+        perf: The recorder the latency of every committed transaction is recorded to, if any.
+    """
+
+    def __init__(
+        self,
+        database: Database,
+        queue_size: int = WRITER_QUEUE_SIZE,
+        batch_size: int = WRITER_BATCH_SIZE,
+        flush_interval: float = WRITER_FLUSH_INTERVAL,
+    ):
+        """Initialize the DatabaseWriter class."""
+
+        self.database = database
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.queue = Queue(maxsize=queue_size)
+        self.connection = None
+        self.thread = None
+        self.lock = Lock()
+        self.listeners: List[Tuple[Callable[[Dict[str, List[Dict]]], None], List]] = []
+        self.notified_tables = set()
+        self.rows_written = 0
+        self.rows_dropped = 0
+        self.rows_rejected = 0
+        self.batches_written = 0
+        self.errors = 0
+        self.last_flush = 0.0
+        self.max_flush = 0.0
+        self.perf = None
+
+    def start(self) -> None:
+        """Start the writer thread if it is not running yet."""
+
+        if self.thread and self.thread.is_alive():
+            return
+
+        # The connection is only ever used by the writer thread once it is started
+        self.connection = self.database.connect()
+        self.thread = Thread(target=self._run)
+        self.thread.daemon = True
+        self.thread.start()
+
+    def subscribe(
+        self, listener: Callable[[Dict[str, List[Dict]]], None], tables: List[str]
+    ) -> None:
+        """
+        Register a function to be notified of the rows of every committed transaction.
+
+        Listeners are called on the writer thread after the commit and must not block.
+        They only receive the rows of the given tables as they were stored.
+
+        Args:
+            listener (Callable[[Dict[str, List[Dict]]], None]): The function receiving the stored rows by table name.
+            tables (List[str]): The names of the tables the listener is interested in.
+        """
+
+        self.listeners.append((listener, tables))
+        self.notified_tables.update(tables)
+
+    def submit(self, batch: Dict[str, List[Dict]]) -> bool:
+        """
+        Queue the rows of multiple tables to be written to the database.
+
+        Never blocks. A batch is either queued completely or, if the queue does not have
+        room for all of its rows, dropped and counted, so that it can be submitted again
+        without storing any row twice.
+
+        Args:
+            batch (Dict[str, List[Dict]]): A mapping of table names to their rows.
+
+        Returns:
+            bool: Whether the rows were queued.
+        """
+
+        size = sum(len(rows) for rows in batch.values())
+        with self.lock:
+            # The writer thread only ever frees up room, so the rows are sure to fit
+            if self.queue.maxsize - self.queue.qsize() < size:
+                self.rows_dropped += size
+                return False
+            for table_name, rows in batch.items():
+                for row in rows:
+                    self.queue.put_nowait((table_name, row))
+
+        return True
+
+    def join(self) -> None:
+        """Block until every queued row has been written."""
+
+        self.queue.join()
+
+    def stats(self) -> Dict:
+        """
+        Return the current queue depth and write statistics of the writer.
+
+        Returns:
+            Dict: The writer statistics with flush latencies in milliseconds.
+        """
+
+        with self.lock:
+            return {
+                "queue_depth": self.queue.qsize(),
+                "queue_size": self.queue.maxsize,
+                "rows_written": self.rows_written,
+                "rows_dropped": self.rows_dropped,
+                "rows_rejected": self.rows_rejected,
+                "batches_written": self.batches_written,
+                "errors": self.errors,
+                "last_flush_ms": round(self.last_flush * 1000, 2),
+                "max_flush_ms": round(self.max_flush * 1000, 2),
+            }
+
+    def _run(self) -> None:
+        """Drain the queue and write the rows in batches until the process exits."""
+
+        while True:
+            rows = [self.queue.get()]
+            deadline = perf_counter() + self.flush_interval
+            while len(rows) < self.batch_size:
+                try:
+                    rows.append(
+                        self.queue.get(timeout=max(0, deadline - perf_counter()))
+                    )
+                except Empty:
+                    break
+
+            self._write(rows)
+            for _ in rows:
+                self.queue.task_done()
+
+    def _write(self, rows: List) -> None:
+        """
+        Write a batch of rows to the database in a single transaction.
+
+        If the transaction fails, e.g. because a row violates a constraint of its table,
+        the rows are written one by one and only those the database refuses are dropped.
+
+        Args:
+            rows (List): The table names and rows to be written.
+        """
+
+        queries = dict()
+        for table_name, row in rows:
+            queries.setdefault((table_name, tuple(row.keys())), []).append(
+                tuple(row.values())
+            )
+
+        started = perf_counter()
+        written = dict()
+        try:
+            with self.connection:
+                for (table_name, value_names), params in queries.items():
+                    self._insert(table_name, value_names, params, written)
+            rejected = []
+        except sqlite3.Error:
+            with self.lock:
+                self.errors += 1
+            written, rejected = self._write_rows(rows)
+        duration = perf_counter() - started
+
+        with self.lock:
+            self.rows_written += len(rows) - len(rejected)
+            self.rows_rejected += len(rejected)
+            self.batches_written += 1
+            self.last_flush = duration
+            self.max_flush = max(self.max_flush, duration)
+        if self.perf is not None:
+            self.perf.record("db_write", self.database.path, "", duration)
+
+        for listener, tables in self.listeners:
+            batch = {
+                table_name: written[table_name]
+                for table_name in tables
+                if written.get(table_name)
+            }
+            if not batch:
+                continue
+            try:
+                listener(batch)
+            except Exception:
+                # A failing listener must never stop the writer thread
+                log.exception("Listener failed on the written rows")
+
+    def _write_rows(self, rows: List) -> Tuple[Dict[str, List[Dict]], List]:
+        """
+        Write rows to the database one by one in a single transaction.
+
+        A failing insert only undoes itself, so the other rows are still committed.
+        Every rejected row is logged with the reason it was rejected.
+
+        Args:
+            rows (List): The table names and rows to be written.
+
+        Returns:
+            Tuple[Dict[str, List[Dict]], List]: The stored rows for the listeners and the table names and rows that were not written.
+        """
+
+        written, rejected = dict(), []
+        try:
+            with self.connection:
+                for table_name, row in rows:
+                    try:
+                        self._insert(
+                            table_name,
+                            tuple(row.keys()),
+                            [tuple(row.values())],
+                            written,
+                        )
+                    except sqlite3.Error as e:
+                        log.warning("Dropped row of %s %s: %s", table_name, row, e)
+                        rejected.append((table_name, row))
+        except sqlite3.Error as e:
+            log.error("Dropped %d rows: %s", len(rows), e)
+            return dict(), rows
+        return written, rejected
+
+    def _insert(
+        self,
+        table_name: str,
+        value_names: Tuple[str, ...],
+        params: List[Tuple],
+        written: Dict[str, List[Dict]],
+    ) -> None:
+        """
+        Insert rows with the same columns into a table.
+
+        The rows of the tables listeners are interested in are inserted one at a time
+        and read back as they were stored, all others in a single statement.
+
+        Args:
+            table_name (str): The name of the table.
+            value_names (Tuple[str, ...]): The names of the columns the rows have values for.
+            params (List[Tuple]): The values of each row.
+            written (Dict[str, List[Dict]]): The stored rows by table name, extended in place.
+        """
+
+        query = insert_query(table_name, value_names)
+        if table_name not in self.notified_tables:
+            self.connection.executemany(query, params)
+            return
+
+        stored = written.setdefault(table_name, [])
+        for values in params:
+            cursor = self.connection.execute(f"{query} RETURNING *", values)
+            columns = [column[0] for column in cursor.description]
+            stored.extend(dict(zip(columns, row)) for row in cursor.fetchall())
@@ -1,15 +1,31 @@
+from importlib import import_module
 from threading import Lock
+from typing import Callable
 
-from backend import FlaskApp
 from dependency_injector import containers, providers
-from httpx import AsyncClient
 from rich.console import Console
 from setup import Setup
 from setup.setup_helper import SetupHelper, TeamGenerator
-from simulation import FlagSubmitter, Orchestrator, Simulation, StatChecker
 from types_ import Config, Secrets
 
 
+def lazy(path: str) -> Callable:
+    """
+    Returns a factory that imports the class at the given dotted path on first use.
+
+    The simulation and backend modules pull in paramiko, httpx, flask and friends,
+    which are not needed when only destroying a setup, so we avoid importing them
+    until a provider is actually called.
+    """
+
+    module_name, _, class_name = path.rpartition(".")
+
+    def factory(*args, **kwargs):
+        return getattr(import_module(module_name), class_name)(*args, **kwargs)
+
+    return factory
+
+
 class SetupContainer(containers.DeclarativeContainer):
     """
     Container for setup related classes.
@@ -54,45 +70,67 @@ class SimulationContainer(containers.DeclarativeContainer):
     locks = providers.Dependency(instance_of=dict)
 
     console = providers.Singleton(Console)
-    client = providers.Singleton(AsyncClient)
+    client = providers.Singleton(lazy("httpx.AsyncClient"))
     config = providers.Singleton(Config.from_, configuration.config)
     secrets = providers.Singleton(Secrets.from_, configuration.secrets)
+    metrics = providers.Singleton(lazy("simulation.MetricsRegistry"))
+    perf = providers.Singleton(lazy("simulation.PerfRecorder"), metrics=metrics)
+    tracer = providers.Singleton(
+        lazy("simulation.RoundTracer"), config=config, metrics=metrics
+    )
 
     flag_submitter = providers.Singleton(
-        FlagSubmitter,
+        lazy("simulation.FlagSubmitter"),
         setup=setup_container.setup,
         console=console,
+        perf=perf,
         verbose=configuration.verbose,
         debug=configuration.debug,
     )
 
+    telemetry_collector = providers.Singleton(
+        lazy("simulation.TelemetryCollector"),
+        config=config,
+        secrets=secrets,
+        console=console,
+        metrics=metrics,
+    )
+
     stat_checker = providers.Singleton(
-        StatChecker,
+        lazy("simulation.StatChecker"),
         config=config,
         secrets=secrets,
         client=client,
         console=console,
+        perf=perf,
+        tracer=tracer,
+        telemetry=telemetry_collector,
         verbose=configuration.verbose,
     )
 
     orchestrator = providers.Singleton(
-        Orchestrator,
+        lazy("simulation.Orchestrator"),
         setup=setup_container.setup,
         locks=locks,
         client=client,
         flag_submitter=flag_submitter,
         stat_checker=stat_checker,
         console=console,
+        perf=perf,
+        metrics=metrics,
         verbose=configuration.verbose,
         debug=configuration.debug,
     )
 
     simulation = providers.Singleton(
-        Simulation,
+        lazy("simulation.Simulation"),
         setup=setup_container.setup,
         orchestrator=orchestrator,
         locks=locks,
         console=console,
+        perf=perf,
+        metrics=metrics,
+        tracer=tracer,
         verbose=configuration.verbose,
         debug=configuration.debug,
     )
@@ -110,7 +148,7 @@ class BackendContainer(containers.DeclarativeContainer):
     locks = providers.Dependency(instance_of=dict)
 
     flask_app = providers.Singleton(
-        FlaskApp,
+        lazy("backend.FlaskApp"),
         setup=setup_container.setup,
         simulation=simulation_container.simulation,
         locks=locks,
@@ -19,6 +19,7 @@ retry() {
 echo -e "\n\033[32m[+] Configuring checker ...\033[0m"
 retry scp -F ${ssh_config} ./data/checker.sh checker:/home/groot/checker.sh
 retry scp -F ${ssh_config} ./config/services.txt checker:/home/groot/services.txt
+retry scp -F ${ssh_config} ./data/telemetry.py checker:/home/groot/telemetry.py
 retry ssh -F ${ssh_config} checker "chmod +x checker.sh && ./checker.sh" >./logs/checker_config.log 2>&1 &
 
 wait -n
@@ -27,4 +28,5 @@ echo -e "\n\033[32m[+] Configuring engine ...\033[0m"
 retry scp -F ${ssh_config} ./data/engine.sh engine:/home/groot/engine.sh
 retry scp -F ${ssh_config} ./data/docker-compose.yml engine:/home/groot/docker-compose.yml
 retry scp -F ${ssh_config} ./config/ctf.json engine:/home/groot/ctf.json
+retry scp -F ${ssh_config} ./data/telemetry.py engine:/home/groot/telemetry.py
 retry ssh -F ${ssh_config} engine "chmod +x engine.sh && ./engine.sh" | tee ./logs/engine_config.log 2>&1
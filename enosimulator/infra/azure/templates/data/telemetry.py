@@ -0,0 +1,94 @@
+#! /usr/bin/env python3
+
+"""
+A lightweight telemetry agent that runs on the simulation VMs.
+
+The agent samples system counters and Docker container stats at a fixed interval and
+writes them to stdout in compact batches of JSON lines. The simulator starts it over a
+single long-lived SSH session per VM and reads the batches as they arrive.
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+
+def system_sample():
+    """Reads the raw system counters of the VM."""
+
+    with open("/proc/stat") as f:
+        cpu = [int(value) for value in f.readline().split()[1:]]
+    with open("/proc/meminfo") as f:
+        mem = {line.split(":")[0]: int(line.split()[1]) for line in f}
+    netrx, nettx = 0, 0
+    with open("/proc/net/dev") as f:
+        for line in f:
+            interface, _, counters = line.partition(":")
+            if interface.strip() == "eth0":
+                counters = counters.split()
+                netrx, nettx = int(counters[0]), int(counters[8])
+    with open("/proc/uptime") as f:
+        uptime = float(f.read().split()[0])
+    disk = os.statvfs("/")
+
+    return {
+        "cpu": cpu,
+        "memtotal": mem["MemTotal"],
+        "memavailable": mem["MemAvailable"],
+        "netrx": netrx,
+        "nettx": nettx,
+        "uptime": uptime,
+        "cores": os.cpu_count(),
+        "disk": disk.f_blocks * disk.f_frsize,
+    }
+
+
+def container_sample():
+    """Reads the Docker container stats of the VM."""
+
+    try:
+        return subprocess.run(
+            ["docker", "stats", "--no-stream", "--format", "{{json .}}"],
+            capture_output=True,
+            text=True,
+            timeout=30,
+        ).stdout
+    except (OSError, subprocess.TimeoutExpired):
+        return ""
+
+
+def main():
+    """Samples stats until the simulator closes the connection."""
+
+    parser = argparse.ArgumentParser(description="enosimulator telemetry agent")
+    parser.add_argument("--interval", type=float, default=5)
+    parser.add_argument("--batch-size", type=int, default=1)
+    args = parser.parse_args()
+
+    batch = []
+    while True:
+        started = time.time()
+        batch.append(
+            {
+                "time": started,
+                "system": system_sample(),
+                "containers": container_sample(),
+            }
+        )
+
+        if len(batch) >= args.batch_size:
+            try:
+                sys.stdout.write(json.dumps(batch, separators=(",", ":")) + "\n")
+                sys.stdout.flush()
+            except BrokenPipeError:
+                return
+            batch = []
+
+        time.sleep(max(0, args.interval - (time.time() - started)))
+
+
+if __name__ == "__main__":
+    main()
@@ -74,3 +74,8 @@ DISK_USAGE=$(df -h / | awk 'NR==2 {print $5}' | cut -d'%' -f1)
 if [ "$DISK_USAGE" -gt "$THRESHOLD" ]; then
   docker system prune -a -f
 fi
+
+# Install the telemetry agent that streams system and docker stats to the simulator
+if [ -f "/home/groot/telemetry.py" ]; then
+  sudo install -m 0755 "/home/groot/telemetry.py" /usr/local/bin/enosimulator-telemetry
+fi
@@ -19,6 +19,7 @@ retry() {
 echo -e "\n\033[32m[+] Configuring checker ...\033[0m"
 retry scp -F ${ssh_config} ./data/checker.sh checker:/root/checker.sh
 retry scp -F ${ssh_config} ./config/services.txt checker:/root/services.txt
+retry scp -F ${ssh_config} ./data/telemetry.py checker:/root/telemetry.py
 retry ssh -F ${ssh_config} checker "chmod +x checker.sh && ./checker.sh" >./logs/checker_config.log 2>&1 &
 
 wait -n
@@ -27,4 +28,5 @@ echo -e "\n\033[32m[+] Configuring engine ...\033[0m"
 retry scp -F ${ssh_config} ./data/engine.sh engine:/root/engine.sh
 retry scp -F ${ssh_config} ./data/docker-compose.yml engine:/root/docker-compose.yml
 retry scp -F ${ssh_config} ./config/ctf.json engine:/root/ctf.json
+retry scp -F ${ssh_config} ./data/telemetry.py engine:/root/telemetry.py
 retry ssh -F ${ssh_config} engine "chmod +x engine.sh && ./engine.sh" | tee ./logs/engine_config.log 2>&1
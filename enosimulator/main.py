@@ -4,7 +4,6 @@ import os
 import sys
 from threading import Thread
 
-from containers import Application
 from dotenv import load_dotenv
 
 
@@ -89,6 +88,9 @@ async def main() -> None:
     sys.path.append("../..")
     args = get_args()
 
+    # Imported after argument parsing so that e.g. --help does not pay for the containers
+    from containers import Application
+
     application = Application()
     application.configuration.config.from_json(args.config)
     application.configuration.secrets.from_json(args.secrets)
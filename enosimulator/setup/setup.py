@@ -5,8 +5,6 @@ from subprocess import CalledProcessError, run
 from typing import Dict
 
 import aiofiles
-import jsons
-from requests import get
 from rich.console import Console
 from rich.table import Table
 from types_ import Config, IpAddresses, Secrets, Service, SimulationType, VMType
@@ -28,6 +26,7 @@ class Setup:
         setup_path: A string containing the path to the setup directory for the chosen location.
         setup_helper: A SetupHelper object used for generating the infrastructure.
         console: A Console object used for printing to the console.
+        versions: A dictionary containing the number of mutations of the ips, teams, services, round info and overview, which is bumped while holding the corresponding lock.
     """
 
     def __init__(
@@ -49,6 +48,13 @@ class Setup:
         self.setup_path = f"{dir_path}/../infra/{self.config.setup.location}"
         self.setup_helper = setup_helper
         self.console = console
+        self.versions = {
+            "ips": 0,
+            "team": 0,
+            "service": 0,
+            "round_info": 0,
+            "overview": 0,
+        }
         if (
             self.config.settings.simulation_type
             == SimulationType.BASIC_STRESS_TEST.value
@@ -96,6 +102,8 @@ class Setup:
             )
             ctf_json["services"].append(new_service)
             self.services[service] = Service.from_(new_service)
+        self.versions["team"] += 1
+        self.versions["service"] += 1
 
         # Create ctf.json
         await create_file(f"{self.setup_path}/config/ctf.json")
@@ -120,6 +128,7 @@ class Setup:
         public_ips, private_ips = await self.setup_helper.get_ip_addresses()
         self.ips.public_ip_addresses = public_ips
         self.ips.private_ip_addresses = private_ips
+        self.versions["ips"] += 1
 
         # Add ip addresses for checkers to ctf.json
         ctf_json = await parse_json(f"{self.setup_path}/config/ctf.json")
@@ -303,6 +312,9 @@ class Setup:
         If an infrastructure has already been configured the configure step is skipped.
         """
 
+        import jsons
+        from requests import get
+
         try:
             r = get(
                 f"http://{self.ips.public_ip_addresses[VMType.ENGINE.value]}:5001/scoreboard/attack.json"
@@ -123,6 +123,9 @@ class HetznerConverter(TemplateConverter):
             lines.append(
                 f"retry scp -F ${{ssh_config}} ./config/services.txt vulnbox{vulnbox_id}:/root/services.txt\n"
             )
+            lines.append(
+                f"retry scp -F ${{ssh_config}} ./data/telemetry.py vulnbox{vulnbox_id}:/root/telemetry.py\n"
+            )
             lines.append(
                 f'retry ssh -F ${{ssh_config}} vulnbox{vulnbox_id} "chmod +x vulnbox.sh && ./vulnbox.sh" > ./logs/vulnbox{vulnbox_id}_config.log 2>&1 &\n'
             )
@@ -287,6 +290,10 @@ class HetznerConverter(TemplateConverter):
             f"{self.setup_path}/templates/data/docker-compose.yml",
             f"{self.setup_path}/data/docker-compose.yml",
         )
+        await copy_file(
+            f"{self.setup_path}/templates/data/telemetry.py",
+            f"{self.setup_path}/data/telemetry.py",
+        )
 
         # Configure github personal access token
         PAT_LINE = 22
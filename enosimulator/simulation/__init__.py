@@ -1,4 +1,8 @@
 from .flagsubmitter import FlagSubmitter
+from .metrics import MetricsRegistry
 from .orchestrator import Orchestrator
+from .perf import PerfRecorder
 from .simulation import Simulation
 from .statchecker import StatChecker
+from .telemetry import TelemetryCollector
+from .tracing import RoundTracer
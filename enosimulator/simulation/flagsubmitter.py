@@ -5,6 +5,8 @@ from rich.console import Console
 from setup import Setup
 from types_ import SetupVariant, VMType
 
+from .perf import PerfRecorder
+
 
 class FlagSubmitter:
     """
@@ -20,6 +22,7 @@ class FlagSubmitter:
         verbose: Whether to print verbose output.
         debug: Whether to print debug output.
         console: The console used for printing.
+        perf: The recorder for the latencies of outbound calls.
         usernames: The SSH usernames according to the chosen setup location.
     """
 
@@ -27,6 +30,7 @@ class FlagSubmitter:
         self,
         setup: Setup,
         console: Console,
+        perf: PerfRecorder,
         verbose: bool = False,
         debug: bool = False,
     ):
@@ -38,6 +42,7 @@ class FlagSubmitter:
         self.verbose = verbose
         self.debug = debug
         self.console = console
+        self.perf = perf
         self.usernames = {
             SetupVariant.AZURE: "groot",
             SetupVariant.HETZNER: "root",
@@ -59,18 +64,21 @@ class FlagSubmitter:
         SUBMISSION_ENDPOINT_PORT = 1337
         flag_str = "\n".join(flags) + "\n"
 
-        with paramiko.SSHClient() as client:
+        vm_name, team_address = self._private_to_public_ip(team_address)
+        with self.perf.measure(
+            "flag_submission", vm_name
+        ), paramiko.SSHClient() as client:
             client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-            vm_name, team_address = self._private_to_public_ip(team_address)
-            client.connect(
-                hostname=team_address,
-                username=self.usernames[
-                    SetupVariant.from_str(self.config.setup.location)
-                ],
-                pkey=paramiko.RSAKey.from_private_key_file(
-                    self.secrets.vm_secrets.ssh_private_key_path
-                ),
-            )
+            with self.perf.measure("ssh_connect", vm_name):
+                client.connect(
+                    hostname=team_address,
+                    username=self.usernames[
+                        SetupVariant.from_str(self.config.setup.location)
+                    ],
+                    pkey=paramiko.RSAKey.from_private_key_file(
+                        self.secrets.vm_secrets.ssh_private_key_path
+                    ),
+                )
             transport = client.get_transport()
             with transport.open_channel(
                 "direct-tcpip",
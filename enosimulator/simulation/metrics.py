@@ -0,0 +1,203 @@
+from bisect import bisect_left
+from contextlib import contextmanager
+from threading import Lock
+from time import perf_counter
+from typing import Callable, Dict, Iterator, List, Tuple
+
+METRICS_PREFIX = "enosimulator_"
+# The upper bounds of the histogram buckets in seconds, above the Prometheus client defaults
+METRICS_BUCKETS = [0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120]
+# The type and help text of every exported metric
+METRICS = {
+    "round_duration_seconds": (
+        "histogram",
+        "Duration of a round without the wait for the next round.",
+    ),
+    "round_phase_seconds": ("histogram", "Duration of each phase of a round."),
+    "call_duration_seconds": (
+        "histogram",
+        "Latency of outbound calls by operation, host and service.",
+    ),
+    "call_errors_total": (
+        "counter",
+        "Outbound calls that failed, like SSH connects, by operation, host and service.",
+    ),
+    "exploit_requests_total": ("counter", "Exploit requests sent by service."),
+    "exploit_results_total": (
+        "counter",
+        "Exploit results by service and checker task result.",
+    ),
+    "flags_submitted_total": ("counter", "Flags submitted successfully by team."),
+    "flag_submission_failures_total": ("counter", "Failed flag submissions by team."),
+    "event_loop_lag_seconds": (
+        "histogram",
+        "Delay of the simulation event loop beyond a scheduled wakeup.",
+    ),
+    "writer_queue_depth": ("gauge", "Rows waiting in the database writer queue."),
+    "writer_rows_written_total": ("counter", "Rows written by the database writer."),
+    "writer_rows_dropped_total": (
+        "counter",
+        "Rows rejected because the database writer queue was full.",
+    ),
+    "writer_rows_rejected_total": (
+        "counter",
+        "Rows the database refused to store, e.g. because of a constraint violation.",
+    ),
+    "writer_errors_total": ("counter", "Database writer transactions that failed."),
+    "event_queue_depth": (
+        "gauge",
+        "Events waiting in the queues of all server-sent event subscribers.",
+    ),
+}
+
+
+def format_labels(labels: Tuple[Tuple[str, str], ...]) -> str:
+    """
+    Format labels for the Prometheus text exposition format.
+
+    Args:
+        labels (Tuple[Tuple[str, str], ...]): The sorted names and values of the labels.
+
+    Returns:
+        str: The labels in braces or an empty string if there are none.
+    """
+
+    if not labels:
+        return ""
+    escaped = (
+        (name, value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for name, value in labels
+    )
+    return "{" + ",".join(f'{name}="{value}"' for name, value in escaped) + "}"
+
+
+class MetricsRegistry:
+    """
+    A Class for collecting the counters and histograms exported to Prometheus.
+
+    Every metric is updated in memory by the code it instruments, so rendering the
+    metrics for a scrape only formats the current values. Histograms count each value
+    in the first bucket whose upper bound it does not exceed and are made cumulative
+    while rendering. Values owned by other components, like queue depths, are read from
+    their collectors at scrape time.
+
+    Attributes:
+        lock: The lock used for synchronizing access to the metrics.
+        counters: The value of each counter by name and labels.
+        histograms: The bucket counts, sum and count of each histogram by name and labels.
+        collectors: The functions returning the current values of metrics owned by other components.
+    """
+
+    def __init__(self):
+        """Initialize the MetricsRegistry class."""
+
+        self.lock = Lock()
+        self.counters: Dict[Tuple[str, Tuple], float] = dict()
+        self.histograms: Dict[Tuple[str, Tuple], List] = dict()
+        self.collectors: List[Callable[[], Dict[str, float]]] = []
+
+    def inc(self, name: str, value: float = 1, **labels: str) -> None:
+        """
+        Increment a counter.
+
+        Args:
+            name (str): The name of the counter without prefix.
+            value (float): The amount to increment the counter by.
+            **labels (str): The labels of the counter.
+        """
+
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name: str, value: float, **labels: str) -> None:
+        """
+        Count a value in a histogram.
+
+        Args:
+            name (str): The name of the histogram without prefix.
+            value (float): The observed value in seconds.
+            **labels (str): The labels of the histogram.
+        """
+
+        key = (name, tuple(sorted(labels.items())))
+        bucket = bisect_left(METRICS_BUCKETS, value)
+        with self.lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = [
+                    [0] * (len(METRICS_BUCKETS) + 1),
+                    0.0,
+                    0,
+                ]
+            histogram[0][bucket] += 1
+            histogram[1] += value
+            histogram[2] += 1
+
+    @contextmanager
+    def time(self, name: str, **labels: str) -> Iterator[None]:
+        """
+        Count how long the wrapped code takes in a histogram, even if it fails.
+
+        Args:
+            name (str): The name of the histogram without prefix.
+            **labels (str): The labels of the histogram.
+        """
+
+        started = perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, perf_counter() - started, **labels)
+
+    def collect(self, collector: Callable[[], Dict[str, float]]) -> None:
+        """
+        Register a function returning the current values of metrics without labels.
+
+        Args:
+            collector (Callable[[], Dict[str, float]]): The function returning the values by metric name.
+        """
+
+        self.collectors.append(collector)
+
+    def render(self) -> str:
+        """
+        Render all metrics in the Prometheus text exposition format.
+
+        Returns:
+            str: The metrics with their type and help text.
+        """
+
+        samples: Dict[str, List[str]] = {name: [] for name in METRICS}
+        for collector in self.collectors:
+            for name, value in collector().items():
+                samples[name].append(f"{METRICS_PREFIX}{name} {value}")
+
+        with self.lock:
+            for (name, labels), value in sorted(self.counters.items()):
+                samples[name].append(
+                    f"{METRICS_PREFIX}{name}{format_labels(labels)} {value}"
+                )
+            for (name, labels), (counts, total, count) in sorted(
+                self.histograms.items()
+            ):
+                cumulative = 0
+                for bound, bucket_count in zip(METRICS_BUCKETS + ["+Inf"], counts):
+                    cumulative += bucket_count
+                    bucket_labels = format_labels(labels + (("le", str(bound)),))
+                    samples[name].append(
+                        f"{METRICS_PREFIX}{name}_bucket{bucket_labels} {cumulative}"
+                    )
+                samples[name].append(
+                    f"{METRICS_PREFIX}{name}_sum{format_labels(labels)} {total}"
+                )
+                samples[name].append(
+                    f"{METRICS_PREFIX}{name}_count{format_labels(labels)} {count}"
+                )
+
+        lines = []
+        for name, (metric_type, description) in METRICS.items():
+            lines.append(f"# HELP {METRICS_PREFIX}{name} {description}")
+            lines.append(f"# TYPE {METRICS_PREFIX}{name} {metric_type}")
+            lines.extend(samples[name])
+        return "\n".join(lines) + "\n"
@@ -1,29 +1,26 @@
 import asyncio
+from math import ceil
+from time import perf_counter
 from typing import Dict, List, Tuple
+from urllib.parse import urlsplit
 
 import jsons
-from bs4 import BeautifulSoup
 from enochecker_core import (
     CheckerInfoMessage,
     CheckerResultMessage,
     CheckerTaskMessage,
     CheckerTaskResult,
 )
-from httpx import AsyncClient
+from httpx import AsyncClient, HTTPError, Response
 from rich.console import Console
 from rich.panel import Panel
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.support.ui import WebDriverWait
 from setup import Setup
 from tenacity import retry, stop_after_attempt
-from types_ import SimulationType, Team, VMType
-from webdriver_manager.chrome import ChromeDriverManager
+from types_ import Service, SimulationType, Team, VMType
 
 from .flagsubmitter import FlagSubmitter
+from .metrics import MetricsRegistry
+from .perf import PerfRecorder
 from .statchecker import StatChecker
 from .util import (
     REQUEST_TIMEOUT,
@@ -60,7 +57,10 @@ class Orchestrator:
         client: The HTTP client used for sending requests.
         flag_submitter: The flag submitter used for submitting flags.
         stat_checker: The stat checker used for collecting system analytics.
+        exploit_samples: The attacker, target, service, flagstore, success, flag and duration of each exploit request sent since the exploit metrics were last collected.
         console: The console used for printing.
+        perf: The recorder for the latencies of outbound calls.
+        metrics: The registry of the metrics exported to Prometheus.
     """
 
     def __init__(
@@ -71,6 +71,8 @@ class Orchestrator:
         flag_submitter: FlagSubmitter,
         stat_checker: StatChecker,
         console: Console,
+        perf: PerfRecorder,
+        metrics: MetricsRegistry,
         verbose: bool = False,
         debug: bool = False,
     ):
@@ -86,7 +88,10 @@ class Orchestrator:
         self.client = client
         self.flag_submitter = flag_submitter
         self.stat_checker = stat_checker
+        self.exploit_samples: List[Tuple] = []
         self.console = console
+        self.perf = perf
+        self.metrics = metrics
 
     async def update_team_info(self) -> None:
         """
@@ -122,6 +127,7 @@ class Orchestrator:
                             team.patched[info.service_name].update(
                                 {f"Flagstore{flagstore_id}": False}
                             )
+                    self.setup.versions["team"] += 1
 
     async def get_round_info(self) -> int:
         """
@@ -134,9 +140,10 @@ class Orchestrator:
             int: The current round's ID.
         """
 
-        attack_info_text = await self.client.get(
-            f"http://{self.setup.ips.public_ip_addresses[VMType.ENGINE.value]}:5001/scoreboard/attack.json"
-        )
+        with self.perf.measure("attack_info", VMType.ENGINE.value):
+            attack_info_text = await self.client.get(
+                f"http://{self.setup.ips.public_ip_addresses[VMType.ENGINE.value]}:5001/scoreboard/attack.json"
+            )
         if attack_info_text.status_code != 200:
             return None
 
@@ -161,6 +168,7 @@ class Orchestrator:
                 for team in self.setup.teams.values():
                     team.points = team_scores[team.name][0]
                     team.gain = team_scores[team.name][1]
+                self.setup.versions["team"] += 1
 
     def container_stats(self, addresses: Dict[str, str]) -> Dict[str, Panel]:
         """
@@ -188,6 +196,54 @@ class Orchestrator:
 
         return self.stat_checker.check_system(addresses)
 
+    def exploit_metrics(self) -> List[Dict]:
+        """
+        Summarize the exploit requests sent since the exploit metrics were last collected.
+
+        Returns:
+            List[Dict]: The number of requests, successful requests and flags and the min, avg, max and p95 latency in milliseconds per attacker, target, service and flagstore.
+        """
+
+        samples, self.exploit_samples = self.exploit_samples, []
+        groups = dict()
+        for attacker, target, service, flagstore, ok, flag, duration in samples:
+            groups.setdefault((attacker, target, service, flagstore), []).append(
+                (ok, flag, duration)
+            )
+
+        metrics = []
+        for (attacker, target, service, flagstore), results in groups.items():
+            latencies = sorted(duration * 1000 for _, _, duration in results)
+            metrics.append(
+                {
+                    "attacker": attacker,
+                    "target": target,
+                    "service": service,
+                    "flagstore": flagstore,
+                    "requests": len(results),
+                    "ok": sum(ok for ok, _, _ in results),
+                    "flags": sum(flag for _, flag, _ in results),
+                    "latency_min": round(latencies[0], 2),
+                    "latency_avg": round(sum(latencies) / len(latencies), 2),
+                    "latency_max": round(latencies[-1], 2),
+                    "latency_p95": round(
+                        latencies[max(0, ceil(0.95 * len(latencies)) - 1)], 2
+                    ),
+                }
+            )
+
+        return metrics
+
+    def latest_stats(self) -> Dict[str, Dict]:
+        """
+        Get the latest system and Docker container statistics of each VM.
+
+        Returns:
+            Dict[str, Dict]: The latest vminfo row of each VM and containerinfo row of each container by VM.
+        """
+
+        return self.stat_checker.latest_stats
+
     async def exploit(
         self, round_id: int, team: Team, all_teams: List[Team]
     ) -> List[str]:
@@ -242,7 +298,10 @@ class Orchestrator:
         """
 
         checker_address = service.checkers[0]
-        response = await self.client.get(f"{checker_address}/service")
+        with self.perf.measure(
+            "checker_info", urlsplit(checker_address).hostname, service.name
+        ):
+            response = await self.client.get(f"{checker_address}/service")
         if response.status_code != 200:
             raise Exception(f"Failed to get {service.name}-info")
         info = jsons.loads(
@@ -290,6 +349,16 @@ class Orchestrator:
             Dict[str, Tuple[float, float]]: A dictionary mapping team names to tuples containing the team's points and gain.
         """
 
+        # Selenium and friends take a while to import, so we only load them once the scoreboard is actually needed
+        from bs4 import BeautifulSoup
+        from selenium import webdriver
+        from selenium.webdriver.chrome.options import Options
+        from selenium.webdriver.chrome.service import Service as ChromeService
+        from selenium.webdriver.common.by import By
+        from selenium.webdriver.support import expected_conditions as EC
+        from selenium.webdriver.support.ui import WebDriverWait
+        from webdriver_manager.chrome import ChromeDriverManager
+
         team_scores = dict()
         scoreboard_url = f"http://{self.setup.ips.public_ip_addresses[VMType.ENGINE.value]}:5001/scoreboard"
 
@@ -299,12 +368,12 @@ class Orchestrator:
         options.add_argument("--disable-dev-shm-usage")
         options.add_experimental_option("excludeSwitches", ["enable-logging"])
         driver = webdriver.Chrome(
-            service=Service(ChromeDriverManager().install()), options=options
+            service=ChromeService(ChromeDriverManager().install()), options=options
         )
-        driver.get(scoreboard_url)
-
-        wait = WebDriverWait(driver, 10)
-        wait.until(EC.visibility_of_element_located((By.CLASS_NAME, "otherrow")))
+        with self.perf.measure("scoreboard", VMType.ENGINE.value):
+            driver.get(scoreboard_url)
+            wait = WebDriverWait(driver, 10)
+            wait.until(EC.visibility_of_element_located((By.CLASS_NAME, "otherrow")))
 
         soup = BeautifulSoup(driver.page_source, "html.parser")
         rows = soup.find_all("tr", class_="otherrow")
@@ -407,34 +476,97 @@ class Orchestrator:
                     )
                     self.console.log(exploit_request)
 
-                    exploit_task = task_group.create_task(
-                        self.client.post(
-                            exploit_checker_address,
-                            data=req_to_json(exploit_request),
-                            headers={"Content-Type": "application/json"},
-                            timeout=REQUEST_TIMEOUT,
-                        )
+                exploit_task = task_group.create_task(
+                    self._timed_exploit_request(
+                        exploit_checker_address, exploit_request
                     )
-                    tasks.append(exploit_task)
-
-        results = [task.result() for task in tasks]
+                )
+                tasks.append(((team_name, service, flagstore), exploit_task))
 
         flags = []
-        for r in results:
+        for (team_name, service, flagstore), task in tasks:
+            response, duration = task.result()
+            self.perf.record(
+                "exploit", exploit_checker_ip, service, duration, response is None
+            )
+            self.metrics.inc("exploit_requests_total", service=service)
+            ok, flag = False, False
+            exploit_result = self._parse_exploit_result(response)
+            if exploit_result is not None:
+                self.metrics.inc(
+                    "exploit_results_total",
+                    service=service,
+                    result=CheckerTaskResult(exploit_result.result).value,
+                )
+
+                if CheckerTaskResult(exploit_result.result) is not CheckerTaskResult.OK:
+                    if self.debug:
+                        self.console.print(exploit_result.message)
+                else:
+                    if self.debug:
+                        self.console.log(
+                            f"[bold green]:triangular_flag:: {exploit_result.flag}\n"
+                        )
+                    flags.append(exploit_result.flag)
+                    ok, flag = True, bool(exploit_result.flag)
+
+            self.exploit_samples.append(
+                (team.name, team_name, service, flagstore, ok, flag, duration)
+            )
+
+        return flags
+
+    def _parse_exploit_result(self, response: Response) -> CheckerResultMessage:
+        """
+        Parse the result of an exploit checker task.
+
+        Args:
+            response (Response): The response of the checker or None if the request failed.
+
+        Returns:
+            CheckerResultMessage: The result or None if there is no valid result.
+        """
+
+        if response is None:
+            return None
+
+        try:
             exploit_result = jsons.loads(
-                r.content,
+                response.content,
                 CheckerResultMessage,
                 key_transformer=jsons.KEY_TRANSFORMER_SNAKECASE,
             )
+            CheckerTaskResult(exploit_result.result)
+        except (jsons.DeserializationError, ValueError) as e:
+            if self.debug:
+                self.console.print(f"[bold red]Invalid exploit result: {e}")
+            return None
+        return exploit_result
 
-            if CheckerTaskResult(exploit_result.result) is not CheckerTaskResult.OK:
-                if self.debug:
-                    self.console.print(exploit_result.message)
-            else:
-                if self.debug:
-                    self.console.log(
-                        f"[bold green]:triangular_flag:: {exploit_result.flag}\n"
-                    )
-                flags.append(exploit_result.flag)
+    async def _timed_exploit_request(
+        self, address: str, exploit_request: CheckerTaskMessage
+    ) -> Tuple[Response, float]:
+        """
+        Send an exploit checker task request and measure how long it took.
 
-        return flags
+        Args:
+            address (str): The address of the checker.
+            exploit_request (CheckerTaskMessage): The exploit checker task request.
+
+        Returns:
+            Tuple[Response, float]: The response or None if the request failed and its duration in seconds.
+        """
+
+        started = perf_counter()
+        try:
+            response = await self.client.post(
+                address,
+                data=req_to_json(exploit_request),
+                headers={"Content-Type": "application/json"},
+                timeout=REQUEST_TIMEOUT,
+            )
+            if response.status_code != 200:
+                response = None
+        except HTTPError:
+            response = None
+        return response, perf_counter() - started
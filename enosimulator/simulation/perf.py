@@ -0,0 +1,243 @@
+from contextlib import contextmanager
+from threading import Lock
+from time import perf_counter
+from typing import Dict, Iterator, List, Tuple
+
+from .metrics import MetricsRegistry
+
+# Each power of two is split into this many buckets, bounding the relative error to 1/16
+HISTOGRAM_SUB_BUCKETS = 16
+PERF_PERCENTILES = [50, 90, 99, 99.9]
+
+
+class LatencyHistogram:
+    """
+    A Class for recording latencies in an HDR-style log-linear histogram.
+
+    Latencies are counted in microsecond buckets. Latencies below the number of sub
+    buckets are counted exactly, every larger power of two is split into the same number
+    of equally wide buckets, so the memory stays bounded while every percentile is
+    accurate to a few percent.
+
+    Attributes:
+        counts: The number of latencies counted in each bucket by its lowest value.
+        count: The number of recorded latencies.
+        total: The sum of all recorded latencies in microseconds.
+        min: The lowest recorded latency in microseconds.
+        max: The highest recorded latency in microseconds.
+    """
+
+    def __init__(self):
+        """Initialize the LatencyHistogram class."""
+
+        self.counts: Dict[int, int] = dict()
+        self.count = 0
+        self.total = 0
+        self.min = None
+        self.max = None
+
+    def record(self, seconds: float) -> None:
+        """
+        Record a latency.
+
+        Args:
+            seconds (float): The latency in seconds.
+        """
+
+        micros = max(0, round(seconds * 1_000_000))
+        bucket, _ = self.bucket(micros)
+        self.counts[bucket] = self.counts.get(bucket, 0) + 1
+        self.count += 1
+        self.total += micros
+        self.min = micros if self.min is None else min(self.min, micros)
+        self.max = micros if self.max is None else max(self.max, micros)
+
+    @staticmethod
+    def bucket(micros: int) -> Tuple[int, int]:
+        """
+        Return the bucket a latency is counted in.
+
+        Args:
+            micros (int): The latency in microseconds.
+
+        Returns:
+            Tuple[int, int]: The lowest value and the width of the bucket.
+        """
+
+        if micros < HISTOGRAM_SUB_BUCKETS:
+            return micros, 1
+        shift = micros.bit_length() - HISTOGRAM_SUB_BUCKETS.bit_length()
+        return micros >> shift << shift, 1 << shift
+
+    def percentile(self, percent: float) -> float:
+        """
+        Return the highest latency equivalent to the given percentile.
+
+        Args:
+            percent (float): The percentile between 0 and 100.
+
+        Returns:
+            float: The latency in milliseconds or None if nothing was recorded.
+        """
+
+        if not self.count:
+            return None
+
+        rank = max(1, percent / 100 * self.count)
+        seen = 0
+        for bucket in sorted(self.counts):
+            seen += self.counts[bucket]
+            if seen >= rank:
+                _, width = self.bucket(bucket)
+                return min(bucket + width - 1, self.max) / 1000
+        return self.max / 1000
+
+    def summary(self) -> Dict:
+        """
+        Return the number of latencies and their min, mean, max and percentiles.
+
+        Returns:
+            Dict: The summary with latencies in milliseconds.
+        """
+
+        return {
+            "count": self.count,
+            "min": self.min / 1000 if self.count else None,
+            "mean": round(self.total / self.count / 1000, 3) if self.count else None,
+            "max": self.max / 1000 if self.count else None,
+            **{
+                f"p{percent:g}": self.percentile(percent)
+                for percent in PERF_PERCENTILES
+            },
+        }
+
+
+class PerfRecorder:
+    """
+    A Class for recording the latency of every outbound call of the simulation.
+
+    Calls are labeled by operation, host and service, each label getting its own
+    histogram. The histograms are rotated at the start of every round, so that the
+    latencies of the running and of the previous round can be told apart. Every latency
+    and failure is also counted in the cumulative metrics exported to Prometheus.
+
+    Attributes:
+        metrics: The registry the latencies and failures are exported with.
+        lock: The lock used for synchronizing access to the histograms.
+        round_id: The round the current histograms belong to.
+        histograms: The histograms of the current round by label.
+        previous_round_id: The round the previous histograms belong to.
+        previous: The histograms of the previous round by label.
+    """
+
+    def __init__(self, metrics: MetricsRegistry):
+        """Initialize the PerfRecorder class."""
+
+        self.metrics = metrics
+        self.lock = Lock()
+        self.round_id = None
+        self.histograms: Dict[Tuple[str, str, str], LatencyHistogram] = dict()
+        self.previous_round_id = None
+        self.previous: Dict[Tuple[str, str, str], LatencyHistogram] = dict()
+
+    @contextmanager
+    def measure(
+        self, operation: str, host: str = "", service: str = ""
+    ) -> Iterator[None]:
+        """
+        Record how long the wrapped call takes and whether it failed.
+
+        Args:
+            operation (str): The kind of call, e.g. exploit or ssh_connect.
+            host (str): The host that was called.
+            service (str): The service that was called.
+        """
+
+        started = perf_counter()
+        error = True
+        try:
+            yield
+            error = False
+        finally:
+            self.record(operation, host, service, perf_counter() - started, error)
+
+    def record(
+        self,
+        operation: str,
+        host: str,
+        service: str,
+        seconds: float,
+        error: bool = False,
+    ) -> None:
+        """
+        Record the latency of a call.
+
+        Args:
+            operation (str): The kind of call.
+            host (str): The host that was called.
+            service (str): The service that was called.
+            seconds (float): The latency in seconds.
+            error (bool): Whether the call failed.
+        """
+
+        label = (operation, host or "", service or "")
+        with self.lock:
+            histogram = self.histograms.get(label)
+            if histogram is None:
+                histogram = self.histograms[label] = LatencyHistogram()
+            histogram.record(seconds)
+
+        labels = dict(zip(["operation", "host", "service"], label))
+        self.metrics.observe("call_duration_seconds", seconds, **labels)
+        if error:
+            self.metrics.inc("call_errors_total", **labels)
+
+    def rotate(self, round_id: int) -> None:
+        """
+        Start recording the latencies of a new round.
+
+        Args:
+            round_id (int): The ID of the new round.
+        """
+
+        with self.lock:
+            self.previous_round_id, self.previous = self.round_id, self.histograms
+            self.round_id, self.histograms = round_id, dict()
+
+    def report(self) -> Dict:
+        """
+        Return the percentile tables of the current and the previous round.
+
+        Returns:
+            Dict: The round IDs and a row per label with its latencies in milliseconds for both rounds.
+        """
+
+        with self.lock:
+            return {
+                "round_id": self.round_id,
+                "current": self._table(self.histograms),
+                "previous_round_id": self.previous_round_id,
+                "previous": self._table(self.previous),
+            }
+
+    @staticmethod
+    def _table(histograms: Dict[Tuple[str, str, str], LatencyHistogram]) -> List[Dict]:
+        """
+        Return a percentile table row for each label, sorted by label.
+
+        Args:
+            histograms (Dict[Tuple[str, str, str], LatencyHistogram]): The histograms by label.
+
+        Returns:
+            List[Dict]: The labels and summaries of the histograms.
+        """
+
+        return [
+            {
+                "operation": operation,
+                "host": host,
+                "service": service,
+                **histograms[operation, host, service].summary(),
+            }
+            for operation, host, service in sorted(histograms)
+        ]
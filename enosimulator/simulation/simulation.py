@@ -3,8 +3,8 @@ import os
 import random
 import sys
 from concurrent.futures import ThreadPoolExecutor
-from time import time
-from typing import Dict, List, Tuple
+from time import perf_counter, time
+from typing import Callable, Dict, List, Tuple
 
 from rich.columns import Columns
 from rich.console import Console
@@ -13,9 +13,17 @@ from rich.table import Table
 from setup import Setup
 from types_ import SimulationType, Team
 
+from .metrics import MetricsRegistry
 from .orchestrator import Orchestrator
+from .perf import PerfRecorder
+from .tracing import RoundTracer
 from .util import async_lock
 
+# The number of containers with the highest CPU usage listed in the overview
+OVERVIEW_TOP_CONTAINERS = 10
+# The number of seconds between two measurements of the event loop lag
+EVENT_LOOP_LAG_INTERVAL = 0.5
+
 
 class Simulation:
     """
@@ -37,11 +45,16 @@ class Simulation:
         verbose: Whether to print verbose output.
         debug: Whether to print debug output.
         console: The console used for printing.
+        perf: The recorder for the latencies of outbound calls.
+        metrics: The registry of the metrics exported to Prometheus.
+        tracer: The tracer recording the phases of each round.
         round_id: The current round ID.
         round_start: The time the current round started.
         round_length: The length of a round in seconds.
         total_rounds: The total number of rounds in the simulation.
         remaining_rounds: The number of rounds remaining in the simulation.
+        overview: The summary of the simulation state precomputed at the end of each round, with the round information updated at its start.
+        ingest: The function queueing the start, score history and timings of each round for the database if the Flask server runs in the same process.
     """
 
     def __init__(
@@ -50,6 +63,9 @@ class Simulation:
         orchestrator: Orchestrator,
         locks: Dict,
         console: Console,
+        perf: PerfRecorder,
+        metrics: MetricsRegistry,
+        tracer: RoundTracer,
         verbose: bool,
         debug: bool,
     ):
@@ -61,6 +77,9 @@ class Simulation:
         self.verbose = verbose
         self.debug = debug
         self.console = console
+        self.perf = perf
+        self.metrics = metrics
+        self.tracer = tracer
         self.round_id = 0
         self.round_start = 0
         self.round_length = setup.config.ctf_json.round_length_in_seconds
@@ -68,6 +87,8 @@ class Simulation:
             60 // setup.config.ctf_json.round_length_in_seconds
         )
         self.remaining_rounds = self.total_rounds
+        self.overview = dict()
+        self.ingest: Callable[[Dict[str, List[Dict]]], bool] = None
 
     async def run(self) -> None:
         """
@@ -88,35 +109,111 @@ class Simulation:
         await self.orchestrator.update_team_info()
         await self._scoreboard_available()
 
-        for round_ in range(self.total_rounds):
+        lag_monitor = asyncio.get_event_loop().create_task(self._monitor_event_loop())
+        try:
+            for round_ in range(self.total_rounds):
+                with self.metrics.time("round_duration_seconds"):
+                    await self._run_round(round_)
+                self._record_timings()
+
+                round_duration = time() - self.round_start
+                if round_duration < self.round_length:
+                    await asyncio.sleep(self.round_length - round_duration)
+        finally:
+            lag_monitor.cancel()
+
+    async def _run_round(self, round_: int) -> None:
+        """
+        Run a single round of the simulation, tracing each of its phases.
+
+        Args:
+            round_ (int): The number of rounds that were run before.
+        """
+
+        with self.tracer.span("round_info"):
             async with async_lock(self.locks["round_info"]):
                 self.round_start = time()
                 self.remaining_rounds = self.total_rounds - round_
                 self.round_id = await self.orchestrator.get_round_info()
+                self.setup.versions["round_info"] += 1
+                self._start_overview()
+            self.perf.rotate(self.round_id)
+            self.tracer.start_round(self.round_id)
+
+        if self.ingest:
+            self.ingest(
+                {
+                    "rounds": [
+                        {
+                            "round_id": self.round_id,
+                            "measuretime": int(self.round_start * 1000),
+                        }
+                    ]
+                }
+            )
 
+        with self.tracer.span("state_update"):
             info_messages = await self._update_teams()
             self.info(info_messages)
 
+        with self.tracer.span("scoreboard"):
             self.orchestrator.parse_scoreboard()
 
-            # Send out exploit tasks while collecting system analytics
+        # Send out exploit tasks while collecting system analytics
+        with self.tracer.span("exploits"):
             exploit_task = asyncio.get_event_loop().create_task(
                 self._exploit_all_teams()
             )
-            container_panels, system_panels = self._system_analytics()
-
-            # Submit collected flags
+            with self.tracer.span("stats"):
+                container_panels, system_panels = self._system_analytics()
             flags = await exploit_task
-            self._submit_all_flags(flags)
 
-            # Print system analytics and store them in the database
+        # Submit collected flags
+        with self.tracer.span("submission"):
+            submissions = self._submit_all_flags(flags)
+            self._record_scores(flags)
+            self._record_metrics(submissions)
+
+        # Print system analytics and store them in the database
+        with self.tracer.span("printing"):
             self._print_system_analytics(container_panels, system_panels)
+        with self.tracer.span("analytics_upload"):
             await self.orchestrator.collect_system_analytics()
+            await self._update_overview(flags)
+
+    async def _monitor_event_loop(self) -> None:
+        """
+        Measure how late the event loop wakes up from a sleep until cancelled.
+
+        A blocking call in the simulation delays every other task on the event loop, so
+        the time a wakeup is late by is counted as the event loop lag.
+        """
+
+        while True:
+            started = perf_counter()
+            await asyncio.sleep(EVENT_LOOP_LAG_INTERVAL)
+            self.metrics.observe(
+                "event_loop_lag_seconds",
+                max(0.0, perf_counter() - started - EVENT_LOOP_LAG_INTERVAL),
+            )
+
+    def round_info(self) -> Dict:
+        """
+        Return information about the current round.
+
+        The caller has to hold the round info lock.
+
+        Returns:
+            Dict: The round ID, remaining rounds, round duration, round length and total rounds.
+        """
 
-            round_end = time()
-            round_duration = round_end - self.round_start
-            if round_duration < self.round_length:
-                await asyncio.sleep(self.round_length - round_duration)
+        return {
+            "round_id": self.round_id,
+            "remaining_rounds": self.remaining_rounds,
+            "round_duration": round(time() - self.round_start, 2),
+            "round_length": self.round_length,
+            "total_rounds": self.total_rounds,
+        }
 
     def info(self, info_messages: List[str]) -> None:
         """
@@ -345,6 +442,7 @@ class Simulation:
                             team_name, variant, service, flagstore
                         )
                         info_messages.append(info_message)
+                self.setup.versions["team"] += 1
 
         return info_messages
 
@@ -369,11 +467,7 @@ class Simulation:
 
         async with asyncio.TaskGroup() as task_group:
             tasks = [
-                task_group.create_task(
-                    self.orchestrator.exploit(
-                        self.round_id, team, self.setup.teams.values()
-                    )
-                )
+                task_group.create_task(self._exploit_team(team))
                 for team in self.setup.teams.values()
             ]
 
@@ -385,6 +479,22 @@ class Simulation:
 
         return team_flags
 
+    async def _exploit_team(self, team: Team) -> List[str]:
+        """
+        A helper method to send out the exploit requests of a team as a traced batch.
+
+        Args:
+            team (Team): The team to exploit for.
+
+        Returns:
+            List[str]: The flags the team collected.
+        """
+
+        with self.tracer.span("exploit_batch", "exploits", team.name):
+            return await self.orchestrator.exploit(
+                self.round_id, team, self.setup.teams.values()
+            )
+
     def _system_analytics(self) -> Tuple[Dict[str, Panel], Dict[str, List[Panel]]]:
         """
         A helper method to collect system analytics.
@@ -405,7 +515,7 @@ class Simulation:
 
         return container_panels, system_panels
 
-    def _submit_all_flags(self, team_flags: List) -> None:
+    def _submit_all_flags(self, team_flags: List) -> List[Dict]:
         """
         A helper method to submit flags.
 
@@ -414,14 +524,212 @@ class Simulation:
 
         Args:
             team_flags (List): A list containing the team's IP address and the flags that were collected.
+
+        Returns:
+            List[Dict]: The number of flags, success and duration in milliseconds of each team's submission.
         """
 
         with ThreadPoolExecutor(
             max_workers=self.setup.config.settings.teams
         ) as executor:
-            for team_address, flags in team_flags:
-                if flags:
-                    executor.submit(self.orchestrator.submit_flags, team_address, flags)
+            submissions = [
+                executor.submit(self._submit_flags, team_address, flags)
+                for team_address, flags in team_flags
+                if flags
+            ]
+
+        return [submission.result() for submission in submissions]
+
+    def _submit_flags(self, team_address: str, flags: List[str]) -> Dict:
+        """
+        A helper method to submit the flags of a team and measure how long it took.
+
+        Args:
+            team_address (str): The IP address of the team's VM.
+            flags (List[str]): The flags to submit.
+
+        Returns:
+            Dict: The number of flags, success and duration in milliseconds of the submission.
+        """
+
+        team_names = {team.address: team.name for team in self.setup.teams.values()}
+        team_name = team_names.get(team_address, team_address)
+
+        started = perf_counter()
+        with self.tracer.span("submit", "submission", team_name):
+            try:
+                self.orchestrator.submit_flags(team_address, flags)
+                ok = True
+            except Exception:
+                # A failed submission must not stop the simulation, it is only counted
+                ok = False
+
+        if ok:
+            self.metrics.inc("flags_submitted_total", len(flags), team=team_name)
+        else:
+            self.metrics.inc("flag_submission_failures_total", team=team_name)
+        return {
+            "team": team_name,
+            "flags": len(flags),
+            "ok": ok,
+            "duration": round((perf_counter() - started) * 1000, 2),
+        }
+
+    def _record_timings(self) -> None:
+        """
+        A helper method to queue the spans of the finished round for the database and the trace file.
+        """
+
+        spans = self.tracer.flush()
+        if self.ingest and spans:
+            self.ingest({"roundtimings": spans})
+
+    def _record_metrics(self, submissions: List[Dict]) -> None:
+        """
+        A helper method to queue the exploit and flag submission metrics of the current round.
+
+        The exploit metrics are collected from the orchestrator even if they are not
+        stored, so that its samples never pile up.
+
+        Args:
+            submissions (List[Dict]): The number of flags, success and duration in milliseconds of each team's submission.
+        """
+
+        exploits = self.orchestrator.exploit_metrics()
+        if not self.ingest:
+            return
+
+        labels = {"round_id": self.round_id, "measuretime": int(time() * 1000)}
+        self.ingest(
+            {
+                "exploitstats": [{**labels, **row} for row in exploits],
+                "submissionstats": [{**labels, **row} for row in submissions],
+            }
+        )
+
+    def _record_scores(self, team_flags: List) -> None:
+        """
+        A helper method to queue the score history of the current round.
+
+        The points and gain parsed from the scoreboard are overwritten every round, so
+        they are appended to the score history together with the number of flagstores
+        each team is exploiting and has patched and the number of flags it captured.
+
+        Args:
+            team_flags (List): A list containing the team's IP address and the flags that were collected.
+        """
+
+        if not self.ingest:
+            return
+
+        flag_counts = {address: len(flags) for address, flags in team_flags}
+        measuretime = int(time() * 1000)
+        with self.locks["team"]:
+            rows = [
+                {
+                    "round_id": self.round_id,
+                    "team": team.name,
+                    "points": team.points,
+                    "gain": team.gain,
+                    "exploiting": sum(
+                        exploiting
+                        for flagstores in team.exploiting.values()
+                        for exploiting in flagstores.values()
+                    ),
+                    "patched": sum(
+                        patched
+                        for flagstores in team.patched.values()
+                        for patched in flagstores.values()
+                    ),
+                    "flags": flag_counts.get(team.address, 0),
+                    "measuretime": measuretime,
+                }
+                for team in self.setup.teams.values()
+            ]
+        self.ingest({"scorehistory": rows})
+
+    def _start_overview(self) -> None:
+        """
+        A helper method to update the round information of the overview at the start of
+        a round.
+
+        Until the first round is over, the overview only lists the VMs without stats, so
+        that the dashboard has something to show right away.
+
+        The caller has to hold the round info lock.
+        """
+
+        self.overview = {
+            "vms": {vm_name: dict() for vm_name in self.setup.ips.public_ip_addresses},
+            "top_containers": [],
+            "leaderboard": [],
+            "totals": {"exploiting": 0, "patched": 0, "flags": 0},
+            **self.overview,
+            "round": self.round_info(),
+        }
+        self.setup.versions["overview"] += 1
+
+    async def _update_overview(self, team_flags: List) -> None:
+        """
+        A helper method to precompute the overview of the current round.
+
+        The overview contains the round information, the latest stats of each VM, the
+        containers with the highest CPU usage, the team leaderboard and the totals of
+        exploited and patched flagstores and captured flags, so that the Flask server
+        can serve all of it from memory in a single response.
+
+        Args:
+            team_flags (List): A list containing the team's IP address and the flags that were collected.
+        """
+
+        async with async_lock(self.locks["team"]):
+            teams = list(self.setup.teams.values())
+            leaderboard = sorted(
+                (
+                    {"name": team.name, "points": team.points, "gain": team.gain}
+                    for team in teams
+                ),
+                key=lambda team: team["points"],
+                reverse=True,
+            )
+            exploiting = sum(
+                exploiting
+                for team in teams
+                for flagstores in team.exploiting.values()
+                for exploiting in flagstores.values()
+            )
+            patched = sum(
+                patched
+                for team in teams
+                for flagstores in team.patched.values()
+                for patched in flagstores.values()
+            )
+
+        latest_stats = self.orchestrator.latest_stats()
+        containers = [
+            stats
+            for vm_containers in latest_stats["containerinfo"].values()
+            for stats in vm_containers.values()
+        ]
+        overview = {
+            "vms": {
+                vm_name: latest_stats["vminfo"].get(vm_name, dict())
+                for vm_name in self.setup.ips.public_ip_addresses
+            },
+            "top_containers": sorted(
+                containers, key=lambda stats: stats["cpuusage"], reverse=True
+            )[:OVERVIEW_TOP_CONTAINERS],
+            "leaderboard": leaderboard,
+            "totals": {
+                "exploiting": exploiting,
+                "patched": patched,
+                "flags": sum(len(flags) for _, flags in team_flags),
+            },
+        }
+
+        async with async_lock(self.locks["round_info"]):
+            self.overview = {"round": self.round_info(), **overview}
+            self.setup.versions["overview"] += 1
 
     def _print_system_analytics(self, container_panels, system_panels) -> None:
         """
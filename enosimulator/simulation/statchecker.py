@@ -1,12 +1,50 @@
+import json
 from concurrent.futures import ThreadPoolExecutor
-from typing import Dict, List, Tuple
+from typing import Callable, Dict, List, Tuple
 
 import paramiko
 from httpx import AsyncClient
 from rich.console import Console
 from rich.panel import Panel
+from rich.table import Table
 from types_ import Config, Secrets, SetupVariant
 
+from .perf import PerfRecorder
+from .telemetry import TelemetryCollector
+from .tracing import RoundTracer
+from .util import measure_time, to_bytes
+
+# Reads all raw counters needed for the system stats in a single exec without any sampling delay
+SYSTEM_STATS_PROBE = """python3 -c '
+import json, os
+with open("/proc/stat") as f:
+    cpu = [int(value) for value in f.readline().split()[1:]]
+with open("/proc/meminfo") as f:
+    mem = {line.split(":")[0]: int(line.split()[1]) for line in f}
+netrx, nettx = 0, 0
+with open("/proc/net/dev") as f:
+    for line in f:
+        interface, _, counters = line.partition(":")
+        if interface.strip() == "eth0":
+            counters = counters.split()
+            netrx, nettx = int(counters[0]), int(counters[8])
+with open("/proc/uptime") as f:
+    uptime = float(f.read().split()[0])
+disk = os.statvfs("/")
+print(json.dumps({
+    "cpu": cpu,
+    "memtotal": mem["MemTotal"],
+    "memavailable": mem["MemAvailable"],
+    "netrx": netrx,
+    "nettx": nettx,
+    "uptime": uptime,
+    "cores": os.cpu_count(),
+    "disk": disk.f_blocks * disk.f_frsize,
+}))
+'"""
+DOCKER_STATS_COMMAND = "docker stats --no-stream --format '{{json .}}'"
+EMPTY_PROBE = {"cpu": [0] * 8, "netrx": 0, "nettx": 0, "uptime": 0}
+
 
 class StatChecker:
     """
@@ -15,15 +53,25 @@ class StatChecker:
     Connects to the VMs via SSH.
     After connecting, the stats are collected and sent to the Flask server.
 
+    If a telemetry interval is configured, the stats are instead taken from the samples
+    streamed by the telemetry agents running on the VMs.
+
     Attributes:
         config: The configuration file supplied by the user.
         secrets: The secrets file supplied by the user.
         verbose: Whether to print verbose output.
         vm_count: The number of VMs in the simulation.
         vm_stats: The stats of the VMs.
+        probes: The raw counters of the last system stats probe for each VM.
         container_stats: The stats of the containers.
+        telemetry: The collector for the stats pushed by the telemetry agents.
+        telemetry_rows: The telemetry samples of each table that have not been sent to the Flask server yet.
+        latest_stats: The latest stats of each VM and of each container by VM that were sent to the Flask server.
+        ingest: The function queueing stats for the database if the Flask server runs in the same process.
         client: The HTTP client used for sending the stats to the Flask server.
         console: The console used for printing.
+        perf: The recorder for the latencies of outbound calls.
+        tracer: The tracer recording the stats of each VM as part of the round phases.
         usernames: The SSH usernames according to the chosen setup location.
     """
 
@@ -33,6 +81,9 @@ class StatChecker:
         secrets: Secrets,
         client: AsyncClient,
         console: Console,
+        perf: PerfRecorder,
+        tracer: RoundTracer,
+        telemetry: TelemetryCollector,
         verbose: bool = False,
     ):
         """Initialize the StatChecker class."""
@@ -42,9 +93,16 @@ class StatChecker:
         self.verbose = verbose
         self.vm_count = config.settings.teams + 2
         self.vm_stats = dict()
+        self.probes = dict()
         self.container_stats = dict()
+        self.telemetry = telemetry
+        self.telemetry_rows = {"vminfo": [], "containerinfo": []}
+        self.latest_stats = {"vminfo": dict(), "containerinfo": dict()}
+        self.ingest: Callable[[Dict[str, List[Dict]]], bool] = None
         self.client = client
         self.console = console
+        self.perf = perf
+        self.tracer = tracer
         self.usernames = {
             SetupVariant.AZURE: "groot",
             SetupVariant.HETZNER: "root",
@@ -62,10 +120,17 @@ class StatChecker:
             Dict[str, Panel]: The stats of the containers inside of a Panel for better formatting.
         """
 
+        if self.telemetry.enabled:
+            return self._telemetry_container_stats(ip_addresses)
+
         futures = dict()
         with ThreadPoolExecutor(max_workers=self.vm_count) as executor:
             for name, ip_address in ip_addresses.items():
-                future = executor.submit(self._container_stats, name, ip_address)
+                # Spans decorate the stats functions, so each VM is traced in its thread
+                traced = self.tracer.span("container_stats", "stats", name)
+                future = executor.submit(
+                    traced(self._container_stats), name, ip_address
+                )
                 futures[name] = future
 
         container_stat_panels = {
@@ -85,10 +150,14 @@ class StatChecker:
             Dict[str, List[Panel]]: The system stats of the VM as a list of Panels for better formatting.
         """
 
+        if self.telemetry.enabled:
+            return self._telemetry_system_stats(ip_addresses)
+
         futures = dict()
         with ThreadPoolExecutor(max_workers=self.vm_count) as executor:
             for name, ip_address in ip_addresses.items():
-                future = executor.submit(self._system_stats, name, ip_address)
+                traced = self.tracer.span("system_stats", "stats", name)
+                future = executor.submit(traced(self._system_stats), name, ip_address)
                 futures[name] = future
 
         system_stat_panels = {name: future.result() for name, future in futures.items()}
@@ -99,22 +168,63 @@ class StatChecker:
         """
         A method for sending the system and Docker stats to the Flask server.
 
-        The stats are sent to the Flask server once every round.
+        The stats are sent to the Flask server once every round as a single batch. If
+        the Flask server runs in the same process, the batch is queued for its database
+        writer directly instead of going through the HTTP loopback.
         """
 
         FLASK_PORT = 5000
+        rows = self._analytics_rows()
+        if not any(rows.values()):
+            return
+
+        # Rows are in the order they were measured, so the last row of each VM wins
+        for row in rows["vminfo"]:
+            self.latest_stats["vminfo"][row["name"]] = row
+        for row in rows["containerinfo"]:
+            self.latest_stats["containerinfo"].setdefault(row["vm"], dict())[
+                row["name"]
+            ] = row
+
+        if self.ingest:
+            self.ingest(rows)
+        else:
+            await self.client.post(f"http://localhost:{FLASK_PORT}/ingest", json=rows)
+
+    def _analytics_rows(self) -> Dict[str, List[Dict]]:
+        """
+        A method for collecting the rows of each table that have not been sent to the
+        Flask server yet.
+
+        Returns:
+            Dict[str, List[Dict]]: A mapping of table names to their rows.
+        """
+
+        if self.telemetry.enabled:
+            rows, self.telemetry_rows = self.telemetry_rows, {
+                "vminfo": [],
+                "containerinfo": [],
+            }
+            return rows
+
+        vm_rows = []
         for stats in self.vm_stats.values():
+            # Without rates after a counter reset, the VM is skipped until its next probe
+            if stats["ramusage"] is not None and stats["cpuusage"] is None:
+                continue
             if any(stat is None for stat in stats.values()):
                 stats["status"] = "offline"
                 stats["uptime"] = 0
-            await self.client.post(f"http://localhost:{FLASK_PORT}/vminfo", json=stats)
-
-        # We currently only want to collect analytics on the containers of vulnbox1 since it has all the service containers
-        container_stats = self.container_stats["vulnbox1"]
-        for stats in container_stats.values():
-            await self.client.post(
-                f"http://localhost:{FLASK_PORT}/containerinfo", json=stats
-            )
+            vm_rows.append(stats)
+
+        return {
+            "vminfo": vm_rows,
+            "containerinfo": [
+                stats
+                for container_stats in self.container_stats.values()
+                for stats in container_stats.values()
+            ],
+        }
 
     def _container_stats(self, vm_name: str, ip_address: str) -> Panel:
         """
@@ -130,23 +240,64 @@ class StatChecker:
 
         with paramiko.SSHClient() as client:
             client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-            client.connect(
-                hostname=ip_address,
-                username=self.usernames[
-                    SetupVariant.from_str(self.config.setup.location)
-                ],
-                pkey=paramiko.RSAKey.from_private_key_file(
-                    self.secrets.vm_secrets.ssh_private_key_path
-                ),
-            )
-            _, stdout, _ = client.exec_command("docker stats --no-stream")
-            container_stats_blank = stdout.read().decode("utf-8")
+            with self.perf.measure("ssh_connect", vm_name):
+                client.connect(
+                    hostname=ip_address,
+                    username=self.usernames[
+                        SetupVariant.from_str(self.config.setup.location)
+                    ],
+                    pkey=paramiko.RSAKey.from_private_key_file(
+                        self.secrets.vm_secrets.ssh_private_key_path
+                    ),
+                )
+            with self.perf.measure("ssh_exec", vm_name, "docker_stats"):
+                _, stdout, _ = client.exec_command(DOCKER_STATS_COMMAND)
+                container_stats_blank = stdout.read().decode("utf-8")
+
+        container_stats = self._parse_container_stats(vm_name, container_stats_blank)
+        self._save_container_stats(vm_name, container_stats)
+
+        return self._beautify_container_stats(container_stats)
+
+    def _telemetry_container_stats(
+        self, ip_addresses: Dict[str, str]
+    ) -> Dict[str, Panel]:
+        """
+        A method for processing the Docker container stats streamed by the telemetry
+        agents since the last round.
 
-            self._save_container_stats(vm_name, container_stats_blank)
+        Args:
+            ip_addresses (Dict[str, str]): A mapping of VM names to IP addresses for the VMs to be checked.
+
+        Returns:
+            Dict[str, Panel]: The latest stats of the containers inside of a Panel for better formatting.
+        """
+
+        self.telemetry.start(ip_addresses)
+        samples = self.telemetry.drain_container_samples()
+
+        container_stat_panels = dict()
+        for name in ip_addresses:
+            container_stats = dict()
+            for sample_time, container_stats_blank in samples.get(name, []):
+                container_stats = self._parse_container_stats(
+                    name, container_stats_blank
+                )
+                self.telemetry_rows["containerinfo"].extend(
+                    {**stats, "measuretime": measure_time(sample_time)}
+                    for stats in container_stats.values()
+                )
+
+            self._save_container_stats(name, container_stats)
+            container_stat_panels[name] = self._beautify_container_stats(
+                container_stats
+            )
 
-        return self._beautify_container_stats(container_stats_blank)
+        return container_stat_panels
 
-    def _save_container_stats(self, vm_name: str, container_stats: str) -> None:
+    def _save_container_stats(
+        self, vm_name: str, container_stats: Dict[str, Dict]
+    ) -> None:
         """
         A method for saving the Docker container stats as an attribute of the
         StatChecker class.
@@ -155,80 +306,82 @@ class StatChecker:
 
         Args:
             vm_name (str): The name of the VM to be checked.
+            container_stats (Dict[str, Dict]): The parsed Docker container stats of the VM.
+        """
+
+        self.container_stats[vm_name] = container_stats
+
+    def _parse_container_stats(
+        self, vm_name: str, container_stats: str
+    ) -> Dict[str, Dict]:
+        """
+        A method for parsing the raw Docker container stats of a VM.
+
+        The raw stats are expected to contain one JSON object per container as printed
+        by docker stats with --format '{{json .}}'. Network and block I/O are normalized
+        to kB, regardless of the units chosen by docker.
+
+        Args:
+            vm_name (str): The name of the VM the containers are running on.
             container_stats (str): The raw Docker container stats of the VM.
+
+        Returns:
+            Dict[str, Dict]: A mapping of container names to their stats.
         """
 
         stats = dict()
-        lines = container_stats.splitlines()
-        for i, line in enumerate(lines):
-            if i == 0:
+        for line in container_stats.splitlines():
+            try:
+                container = json.loads(line)
+                network_rx, network_tx = container["NetIO"].split(" / ")
+                block_read, block_write = container["BlockIO"].split(" / ")
+
+                stats[container["Name"]] = {
+                    "vm": vm_name,
+                    "name": container["Name"],
+                    "cpuusage": round(float(container["CPUPerc"].rstrip("%")), 2),
+                    "ramusage": round(float(container["MemPerc"].rstrip("%")), 2),
+                    "netrx": round(to_bytes(network_rx) / 1024, 2),
+                    "nettx": round(to_bytes(network_tx) / 1024, 2),
+                    "blockread": round(to_bytes(block_read) / 1024, 2),
+                    "blockwrite": round(to_bytes(block_write) / 1024, 2),
+                    "pids": int(container["PIDs"]),
+                }
+            except (ValueError, KeyError):
+                # Containers that are starting or stopping report incomplete stats
                 continue
-            parts = line.split()
-            name = parts[1]
-            cpu_usage = parts[2]
-            cpu_usage = round(float(cpu_usage[:-1]), 2)
-            ram_usage = parts[6]
-            ram_usage = round(float(ram_usage[:-1]), 2)
-            network_rx = "".join((c if c in "0123456789." else "") for c in parts[7])
-            network_rx = round(float(network_rx) * (1024 if "MB" in parts[7] else 1), 2)
-            network_tx = "".join((c if c in "0123456789." else "") for c in parts[9])
-            network_tx = round(float(network_tx) * (1024 if "MB" in parts[9] else 1), 2)
-
-            stats[name] = {
-                "name": name,
-                "cpuusage": cpu_usage,
-                "ramusage": ram_usage,
-                "netrx": network_rx,
-                "nettx": network_tx,
-            }
 
-        self.container_stats[vm_name] = stats
+        return stats
 
-    def _beautify_container_stats(self, container_stats_blank: str) -> Panel:
+    def _beautify_container_stats(self, container_stats: Dict[str, Dict]) -> Panel:
         """
         A method for beautifying the Docker container stats.
 
         Args:
-            container_stats_blank (str): The raw Docker container stats of the VM.
+            container_stats (Dict[str, Dict]): The parsed Docker container stats of the VM.
 
         Returns:
             Panel: The stats of the containers inside of a Panel for better formatting.
         """
 
-        def _beautify_line(line: str):
-            """
-            A method for beautifying a single line of the Docker container stats.
-
-            Args:
-                line (str): A single line of the Docker container stats.
-
-            Returns:
-                str: The beautified line.
-            """
-
-            word_index = 0
-            words = line.split(" ")
-            for i, word in enumerate(words):
-                if word and word_index == 0:
-                    word = "[yellow]" + word
-                    words[i] = word
-                    word_index += 1
-                elif word and word_index == 1:
-                    word = word + "[/yellow]"
-                    words[i] = word
-                    break
-
-            return " ".join(words)
-
-        container_stats = []
-        for line_number, line in enumerate(container_stats_blank.splitlines()):
-            if line_number == 0:
-                container_stats.append(f"[b]{line}[/b]")
-            else:
-                line = _beautify_line(line)
-                container_stats.append(line)
-
-        return Panel("\n".join(container_stats), expand=True)
+        table = Table(expand=True, box=None)
+        table.add_column("NAME", style="yellow")
+        table.add_column("CPU %")
+        table.add_column("MEM %")
+        table.add_column("NET RX / TX")
+        table.add_column("BLOCK R / W")
+        table.add_column("PIDS")
+        for stats in container_stats.values():
+            table.add_row(
+                stats["name"],
+                f"{stats['cpuusage']:.2f}%",
+                f"{stats['ramusage']:.2f}%",
+                f"{stats['netrx']:.2f} kB / {stats['nettx']:.2f} kB",
+                f"{stats['blockread']:.2f} kB / {stats['blockwrite']:.2f} kB",
+                str(stats["pids"]),
+            )
+
+        return Panel(table, expand=True)
 
     def _system_stats(self, vm_name: str, ip_address: str) -> List[Panel]:
         """
@@ -244,28 +397,24 @@ class StatChecker:
 
         with paramiko.SSHClient() as client:
             client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-            client.connect(
-                hostname=ip_address,
-                username=self.usernames[
-                    SetupVariant.from_str(self.config.setup.location)
-                ],
-                pkey=paramiko.RSAKey.from_private_key_file(
-                    self.secrets.vm_secrets.ssh_private_key_path
-                ),
-            )
-            _, stdout, _ = client.exec_command(
-                "free -m | grep Mem | awk '{print ($3/$2)*100}' &&"
-                + "free -m | grep Mem | awk '{print $2}' &&"
-                + "free -m | grep Mem | awk '{print $3}' &&"
-                + "sar 1 2 | grep 'Average' | sed 's/^.* //' | awk '{print 100 - $1}' &&"
-                + "nproc &&"
-                + "df -h / | awk 'NR == 2 {print $2}'"
-            )
-            system_stats = stdout.read().decode("utf-8")
-            _, stdout, _ = client.exec_command(
-                "sar -n DEV 1 1 | grep 'Average' | grep 'eth0' | awk '{print $5, $6}'"
-            )
-            network_usage = stdout.read().decode("utf-8")
+            with self.perf.measure("ssh_connect", vm_name):
+                client.connect(
+                    hostname=ip_address,
+                    username=self.usernames[
+                        SetupVariant.from_str(self.config.setup.location)
+                    ],
+                    pkey=paramiko.RSAKey.from_private_key_file(
+                        self.secrets.vm_secrets.ssh_private_key_path
+                    ),
+                )
+            with self.perf.measure("ssh_exec", vm_name, "system_stats"):
+                _, stdout, _ = client.exec_command(SYSTEM_STATS_PROBE)
+                system_stats = stdout.read().decode("utf-8")
+
+        try:
+            probe = json.loads(system_stats)
+        except ValueError:
+            probe = None
 
         (
             ram_percent,
@@ -276,7 +425,7 @@ class StatChecker:
             disk_size,
             network_rx,
             network_tx,
-        ) = self._parse_system_stats(system_stats, network_usage)
+        ) = self._parse_system_stats(vm_name, probe)
 
         self._save_system_stats(
             vm_name,
@@ -300,59 +449,134 @@ class StatChecker:
             network_tx,
         )
 
-    def _parse_system_stats(self, system_stats: str, network_usage: str) -> Tuple:
+    def _telemetry_system_stats(
+        self, ip_addresses: Dict[str, str]
+    ) -> Dict[str, List[Panel]]:
         """
-        A method for parsing the system stats from the raw output of the commands
-        executed on the VM.
+        A method for processing the system stats streamed by the telemetry agents since
+        the last round.
 
         Args:
-            system_stats (str): The raw system stats of the VM.
-            network_usage (str): The raw network usage stats of the VM.
+            ip_addresses (Dict[str, str]): A mapping of VM names to IP addresses for the VMs to be checked.
 
         Returns:
-            Tuple: The parsed system stats.
+            Dict[str, List[Panel]]: The latest system stats of the VM as a list of Panels for better formatting.
         """
 
-        if system_stats:
-            [
+        self.telemetry.start(ip_addresses)
+        samples = self.telemetry.drain_system_samples()
+
+        system_stat_panels = dict()
+        for name, ip_address in ip_addresses.items():
+            parsed_samples = [
+                (sample_time, self._parse_system_stats(name, probe))
+                for sample_time, probe in samples.get(name, [])
+            ]
+            (
                 ram_percent,
                 ram_total,
                 ram_used,
                 cpu_usage,
                 cpu_cores,
                 disk_size,
-            ] = system_stats.splitlines()
-            ram_percent = round(float(ram_percent.strip()), 2)
-            ram_total = round(float(ram_total.strip()) / 1024, 2)
-            ram_used = round(float(ram_used.strip()) / 1024, 2)
-            cpu_usage = round(float(cpu_usage.strip()), 2)
-            cpu_cores = int(cpu_cores.strip())
-            disk_size = float(disk_size.strip()[:-1])
+                network_rx,
+                network_tx,
+            ) = (
+                parsed_samples[-1][1] if parsed_samples else (None,) * 8
+            )
 
-        else:
-            ram_percent, ram_total, ram_used, cpu_usage, cpu_cores, disk_size = (
-                None,
-                None,
-                None,
-                None,
-                None,
-                None,
+            self._save_system_stats(
+                name,
+                ip_address,
+                ram_percent,
+                ram_total,
+                cpu_usage,
+                cpu_cores,
+                disk_size,
+                network_rx,
+                network_tx,
+            )
+
+            if not parsed_samples:
+                self.telemetry_rows["vminfo"].append(
+                    {**self.vm_stats[name], "status": "offline", "uptime": 0}
+                )
+            for sample_time, sample_stats in parsed_samples:
+                # Samples without rates after a counter reset are skipped
+                if sample_stats[3] is None:
+                    continue
+                self.telemetry_rows["vminfo"].append(
+                    {
+                        **self.vm_stats[name],
+                        "cpuusage": sample_stats[3],
+                        "ramusage": sample_stats[0],
+                        "netrx": sample_stats[6],
+                        "nettx": sample_stats[7],
+                        "measuretime": measure_time(sample_time),
+                    }
+                )
+
+            system_stat_panels[name] = self._beautify_system_stats(
+                ram_percent,
+                ram_total,
+                ram_used,
+                cpu_usage,
+                cpu_cores,
+                network_rx,
+                network_tx,
             )
 
-        if network_usage:
-            [network_rx, network_tx] = network_usage.splitlines()[-1].split(" ")
-            network_rx = float(network_rx.strip())
-            network_tx = float(network_tx.strip())
+        return system_stat_panels
+
+    def _parse_system_stats(self, vm_name: str, probe: Dict) -> Tuple:
+        """
+        A method for parsing the system stats from the raw counters read on the VM.
+
+        CPU usage and network rates are computed from the difference between the
+        counters of this probe and the previous one for the same VM. For the first probe
+        of a VM this yields the average since boot. If a counter went backwards, e.g.
+        after a reboot or a wrap, the probe only becomes the new base and no rates are
+        returned.
+
+        Args:
+            vm_name (str): The name of the VM that was probed.
+            probe (Dict): The raw system counters of the VM or None if the probe failed.
+
+        Returns:
+            Tuple: The parsed system stats.
+        """
+
+        if not probe:
+            return (None,) * 8
+
+        prev_probe = self.probes.get(vm_name, EMPTY_PROBE)
+        self.probes[vm_name] = probe
+
+        ram_total = probe["memtotal"] / 1024**2
+        ram_used = (probe["memtotal"] - probe["memavailable"]) / 1024**2
+        ram_percent = round(ram_used / ram_total * 100, 2)
+
+        # The fields of /proc/stat are user, nice, system, idle, iowait, irq, softirq, steal
+        cpu_total = sum(probe["cpu"][:8]) - sum(prev_probe["cpu"][:8])
+        cpu_idle = sum(probe["cpu"][3:5]) - sum(prev_probe["cpu"][3:5])
+        elapsed = probe["uptime"] - prev_probe["uptime"]
+        received = probe["netrx"] - prev_probe["netrx"]
+        sent = probe["nettx"] - prev_probe["nettx"]
+
+        if min(cpu_total, cpu_idle, elapsed, received, sent) < 0:
+            cpu_usage, network_rx, network_tx = None, None, None
         else:
-            network_rx, network_tx = None, None
+            cpu_usage = round((1 - cpu_idle / cpu_total) * 100, 2) if cpu_total else 0.0
+            network_rx = round(received / 1024 / elapsed, 2) if elapsed else 0.0
+            network_tx = round(sent / 1024 / elapsed, 2) if elapsed else 0.0
 
         return (
             ram_percent,
-            ram_total,
-            ram_used,
+            round(ram_total, 2),
+            round(ram_used, 2),
             cpu_usage,
-            cpu_cores,
-            disk_size,
+            probe["cores"],
+            round(probe["disk"] / 1024**3, 2),
             network_rx,
             network_tx,
         )
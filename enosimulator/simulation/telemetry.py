@@ -0,0 +1,184 @@
+import json
+from threading import Lock, Thread
+from typing import Dict, List, Tuple
+
+import paramiko
+from rich.console import Console
+from types_ import Config, Secrets, SetupVariant
+
+from .metrics import MetricsRegistry
+
+TELEMETRY_AGENT = "/usr/local/bin/enosimulator-telemetry"
+TELEMETRY_BATCH_SIZE = 2
+
+
+class TelemetryCollector:
+    """
+    A Class for collecting the stats pushed by the telemetry agents running on the VMs.
+
+    For each VM, a single SSH session is opened that starts the telemetry agent and stays
+    open for the rest of the simulation. The agent samples system and Docker stats at
+    the configured interval and streams them back in batches, which are buffered here
+    until the StatChecker drains them. A stream that fails is reported on the console
+    and counted as a call error, then restarted the next time the stats are collected.
+
+    Attributes:
+        config: The configuration file supplied by the user.
+        secrets: The secrets file supplied by the user.
+        console: The console to print failed streams to.
+        metrics: The registry failed streams are counted in.
+        interval: The interval in seconds at which the agents sample stats.
+        enabled: Whether stats should be collected via telemetry agents instead of SSH polling.
+        system_samples: The buffered system stat samples of each VM.
+        container_samples: The buffered Docker container stat samples of each VM.
+        lock: The lock used for synchronizing access to the sample buffers and streams.
+        streams: The threads reading the telemetry stream of each VM.
+        usernames: The SSH usernames according to the chosen setup location.
+    """
+
+    def __init__(
+        self,
+        config: Config,
+        secrets: Secrets,
+        console: Console,
+        metrics: MetricsRegistry,
+    ):
+        """Initialize the TelemetryCollector class."""
+
+        self.config = config
+        self.secrets = secrets
+        self.console = console
+        self.metrics = metrics
+        self.interval = config.settings.telemetry_interval
+        self.enabled = self.interval > 0
+        self.system_samples = dict()
+        self.container_samples = dict()
+        self.lock = Lock()
+        self.streams = dict()
+        self.usernames = {
+            SetupVariant.AZURE: "groot",
+            SetupVariant.HETZNER: "root",
+            SetupVariant.LOCAL: "root",
+        }
+
+    def start(self, ip_addresses: Dict[str, str]) -> None:
+        """
+        Start streaming telemetry from the given VMs.
+
+        VMs that are already streaming are skipped, while streams that were interrupted
+        get restarted. Safe to call from multiple threads at once.
+
+        Args:
+            ip_addresses (Dict[str, str]): A mapping of VM names to IP addresses for the VMs to be monitored.
+        """
+
+        with self.lock:
+            for name, ip_address in ip_addresses.items():
+                if name in self.streams and self.streams[name].is_alive():
+                    continue
+
+                stream = Thread(target=self._stream, args=(name, ip_address))
+                stream.daemon = True
+                stream.start()
+                self.streams[name] = stream
+
+    def drain_system_samples(self) -> Dict[str, List[Tuple[float, Dict]]]:
+        """
+        Return and clear the system stat samples received since the last call.
+
+        Returns:
+            Dict[str, List[Tuple[float, Dict]]]: A mapping of VM names to lists of sample times and raw system counters.
+        """
+
+        with self.lock:
+            samples, self.system_samples = self.system_samples, dict()
+        return samples
+
+    def drain_container_samples(self) -> Dict[str, List[Tuple[float, str]]]:
+        """
+        Return and clear the Docker container stat samples received since the last
+        call.
+
+        Returns:
+            Dict[str, List[Tuple[float, str]]]: A mapping of VM names to lists of sample times and raw Docker stats.
+        """
+
+        with self.lock:
+            samples, self.container_samples = self.container_samples, dict()
+        return samples
+
+    def _stream(self, vm_name: str, ip_address: str) -> None:
+        """
+        Start the telemetry agent on a VM and buffer the batches it sends until the
+        connection is closed.
+
+        The agent streams until the simulation ends, so a stream that ends, e.g. because
+        the agent is missing or exited, is reported like a failed connection.
+
+        Args:
+            vm_name (str): The name of the VM to be monitored.
+            ip_address (str): The IP address of the VM to be monitored.
+        """
+
+        try:
+            with paramiko.SSHClient() as client:
+                client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+                client.connect(
+                    hostname=ip_address,
+                    username=self.usernames[
+                        SetupVariant.from_str(self.config.setup.location)
+                    ],
+                    pkey=paramiko.RSAKey.from_private_key_file(
+                        self.secrets.vm_secrets.ssh_private_key_path
+                    ),
+                )
+                client.get_transport().set_keepalive(30)
+                _, stdout, _ = client.exec_command(
+                    f"{TELEMETRY_AGENT} --interval {self.interval} --batch-size {TELEMETRY_BATCH_SIZE}"
+                )
+
+                for line in stdout:
+                    self._buffer(vm_name, line)
+
+                exit_status = stdout.channel.recv_exit_status()
+                raise RuntimeError(f"Telemetry agent exited with status {exit_status}")
+
+        except Exception as e:
+            # The stream gets restarted the next time start() is called
+            self.metrics.inc(
+                "call_errors_total", operation="telemetry", host=ip_address, service=""
+            )
+            self.console.print(f"[bold red]Telemetry stream of {vm_name} failed: {e}")
+
+    def _buffer(self, vm_name: str, line: str) -> None:
+        """
+        Buffer a batch of samples received from a telemetry agent, skipping malformed
+        samples.
+
+        Args:
+            vm_name (str): The name of the VM that sent the batch.
+            line (str): A batch of samples in JSON format.
+        """
+
+        try:
+            batch = json.loads(line)
+        except ValueError:
+            return
+        if not isinstance(batch, list):
+            return
+
+        with self.lock:
+            for sample in batch:
+                try:
+                    sample_time = sample["time"]
+                    system = sample["system"]
+                    containers = sample["containers"]
+                except (KeyError, TypeError):
+                    continue
+
+                self.system_samples.setdefault(vm_name, []).append(
+                    (sample_time, system)
+                )
+                self.container_samples.setdefault(vm_name, []).append(
+                    (sample_time, containers)
+                )
@@ -0,0 +1,111 @@
+import json
+from contextlib import contextmanager
+from threading import Lock
+from time import perf_counter, time
+from typing import Dict, Iterator, List
+
+from types_ import Config
+
+from .metrics import MetricsRegistry
+
+
+class RoundTracer:
+    """
+    A Class for tracing how long each phase of a round and its sub-operations take.
+
+    Each traced block becomes a span with its round, phase, name, target, start time in
+    epoch milliseconds and duration in milliseconds. A span without a phase is a phase
+    of its own, whose duration is also counted in the round phase metrics. Spans are
+    collected in memory and stored once per round. The trace file is appended to by
+    the database writer thread once the spans were stored, so tracing never blocks the
+    event loop.
+
+    Attributes:
+        metrics: The registry the phase durations are exported with.
+        path: The JSON lines file the spans are appended to, disabled if empty.
+        lock: The lock used for synchronizing access to the spans.
+        round_id: The round new spans belong to.
+        spans: The spans collected since they were last flushed.
+    """
+
+    def __init__(self, config: Config, metrics: MetricsRegistry):
+        """Initialize the RoundTracer class."""
+
+        self.metrics = metrics
+        self.path = config.settings.trace_file
+        self.lock = Lock()
+        self.round_id = 0
+        self.spans: List[Dict] = []
+
+    @contextmanager
+    def span(self, name: str, phase: str = None, target: str = "") -> Iterator[None]:
+        """
+        Trace the wrapped code, even if it fails.
+
+        Like any context manager created with contextmanager, a span can also decorate a
+        function to trace each of its calls, e.g. in the threads of an executor.
+
+        Args:
+            name (str): The name of the phase or sub-operation.
+            phase (str): The phase a sub-operation belongs to, None for a phase.
+            target (str): The team or VM a sub-operation was run for.
+        """
+
+        start = time()
+        started = perf_counter()
+        try:
+            yield
+        finally:
+            duration = perf_counter() - started
+            if phase is None:
+                self.metrics.observe("round_phase_seconds", duration, phase=name)
+            with self.lock:
+                self.spans.append(
+                    {
+                        "round_id": self.round_id,
+                        "phase": phase or name,
+                        "name": name,
+                        "target": target,
+                        "starttime": int(start * 1000),
+                        "duration": round(duration * 1000, 2),
+                    }
+                )
+
+    def start_round(self, round_id: int) -> None:
+        """
+        Assign the spans ending from now on to a new round.
+
+        Args:
+            round_id (int): The ID of the new round.
+        """
+
+        with self.lock:
+            self.round_id = round_id
+
+    def flush(self) -> List[Dict]:
+        """
+        Return and clear the collected spans.
+
+        Returns:
+            List[Dict]: The spans collected since the last flush, in the order they ended.
+        """
+
+        with self.lock:
+            spans, self.spans = self.spans, []
+        return spans
+
+    def write(self, batch: Dict[str, List[Dict]]) -> None:
+        """
+        Append stored spans to the trace file.
+
+        Called by the database writer with the spans of the roundtimings table it stored.
+
+        Args:
+            batch (Dict[str, List[Dict]]): A mapping of table names to their stored rows.
+        """
+
+        if not self.path:
+            return
+
+        with open(self.path, "a") as f:
+            f.writelines(json.dumps(span) + "\n" for span in batch["roundtimings"])
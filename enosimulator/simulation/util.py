@@ -11,6 +11,18 @@ from types_ import IpAddresses
 
 CHAIN_ID_PREFIX = secrets.token_hex(20)
 REQUEST_TIMEOUT = 10
+BYTE_UNITS = {
+    "B": 1,
+    "kB": 1000,
+    "KB": 1000,
+    "MB": 1000**2,
+    "GB": 1000**3,
+    "TB": 1000**4,
+    "KiB": 1024,
+    "MiB": 1024**2,
+    "GiB": 1024**3,
+    "TiB": 1024**4,
+}
 _pool = ThreadPoolExecutor()
 
 
@@ -147,3 +159,33 @@ def private_to_public_ip(ip_addresses: IpAddresses) -> Dict[str, str]:
         ]
         for team_name in ip_addresses.private_ip_addresses
     }
+
+
+def measure_time(timestamp: float) -> int:
+    """
+    Convert a unix timestamp to the representation the database uses for measure times.
+
+    Args:
+        timestamp: Unix timestamp in seconds.
+
+    Returns:
+        The timestamp in epoch milliseconds.
+    """
+
+    return int(timestamp * 1000)
+
+
+def to_bytes(size: str) -> float:
+    """
+    Convert a human readable size as printed by docker (e.g. 12.3MB or 4.883MiB) to
+    bytes.
+
+    Args:
+        size: Human readable size.
+
+    Returns:
+        The size in bytes.
+    """
+
+    number = size.rstrip("BKMGTiBkb")
+    return float(number) * BYTE_UNITS[size[len(number) :]]
@@ -1,4 +1,4 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from typing import Dict, List
 
 from aenum import Enum
@@ -267,6 +267,11 @@ class ConfigSettings:
     checker_ports: List[int]
     simulation_type: str
     scoreboard_file: str
+    telemetry_interval: int = 0
+    stats_retention: Dict[str, int] = field(default_factory=dict)
+    stats_ring_buffer: bool = False
+    api_workers: int = 0
+    trace_file: str = "roundtimings.jsonl"
 
     @staticmethod
     def from_(settings):
@@ -303,6 +308,40 @@ class ConfigSettings:
         if not type(settings["scoreboard-file"]) is str:
             raise ValueError("Invalid checker ports in config file.")
 
+        if (
+            not type(settings.get("telemetry-interval", 0)) is int
+            or settings.get("telemetry-interval", 0) < 0
+        ):
+            raise ValueError("Invalid telemetry interval in config file.")
+
+        if not type(settings.get("stats-retention", {})) is dict or any(
+            table_name
+            not in [
+                "vminfo",
+                "containerinfo",
+                "vminfo_1m",
+                "containerinfo_1m",
+                "vminfo_10m",
+                "containerinfo_10m",
+            ]
+            or not type(retention) is int
+            or retention < 0
+            for table_name, retention in settings.get("stats-retention", {}).items()
+        ):
+            raise ValueError("Invalid stats retention in config file.")
+
+        if not type(settings.get("stats-ring-buffer", False)) is bool:
+            raise ValueError("Invalid stats ring buffer in config file.")
+
+        if (
+            not type(settings.get("api-workers", 0)) is int
+            or settings.get("api-workers", 0) < 0
+        ):
+            raise ValueError("Invalid api workers in config file.")
+
+        if not type(settings.get("trace-file", "roundtimings.jsonl")) is str:
+            raise ValueError("Invalid trace file in config file.")
+
         new_settings = ConfigSettings(
             duration_in_minutes=settings["duration-in-minutes"],
             teams=settings["teams"],
@@ -310,6 +349,11 @@ class ConfigSettings:
             checker_ports=settings["checker-ports"],
             simulation_type=settings["simulation-type"],
             scoreboard_file=settings["scoreboard-file"],
+            telemetry_interval=settings.get("telemetry-interval", 0),
+            stats_retention=settings.get("stats-retention", {}),
+            stats_ring_buffer=settings.get("stats-ring-buffer", False),
+            api_workers=settings.get("api-workers", 0),
+            trace_file=settings.get("trace-file", "roundtimings.jsonl"),
         )
         return new_settings
 
@@ -0,0 +1,29 @@
+import { NextRequest } from "next/server"
+
+const URL = process.env.API_URL || "http://127.0.0.1:5000"
+
+export const dynamic = "force-dynamic"
+
+// Forwards the requests of client components to the backend api, streaming the
+// response so that server-sent events reach the browser as they are pushed
+export async function GET(
+   request: NextRequest,
+   { params }: { params: { path: string[] } }
+) {
+   try {
+      const res = await fetch(
+         `${URL}/${params.path.join("/")}${request.nextUrl.search}`,
+         { cache: "no-store", signal: request.signal }
+      )
+      return new Response(res.body, {
+         status: res.status,
+         headers: {
+            "Content-Type":
+               res.headers.get("Content-Type") || "application/json",
+            "Cache-Control": "no-cache",
+         },
+      })
+   } catch (e) {
+      return Response.json({ message: "Backend unavailable" }, { status: 502 })
+   }
+}
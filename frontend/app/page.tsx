@@ -1,4 +1,5 @@
 import SimulationProgress from "@/components/overview/progress"
+import RoundTimings from "@/components/overview/roundtimings"
 import VMCharts from "@/components/overview/vmcharts"
 import VMStats from "@/components/overview/vmstats"
 
@@ -15,6 +16,7 @@ export default function Home() {
                <SimulationProgress />
                <VMStats />
                <VMCharts />
+               <RoundTimings />
             </div>
          </div>
       </main>
@@ -10,13 +10,12 @@ import {
    YAxis,
 } from "recharts"
 
-function getTimestamp(date: string) {
-   const timestamp = date.split(" ")[1]
-   return timestamp
+function getTimestamp(date: number) {
+   return new Date(date).toLocaleTimeString("en-GB")
 }
 
 interface Datum {
-   date: string
+   date: number
    percentage: string
 }
 
@@ -1,63 +1,27 @@
 import ContainerSelect from "@/components/containers/containerselect"
+import { MAX_POINTS, flattenContainers } from "@/lib/stats"
 
 const URL = process.env.API_URL || "http://127.0.0.1:5000"
 
-async function getContainerList() {
+async function getData() {
    try {
-      const res = await fetch(`${URL}/containerlist`, {
+      const res = await fetch(`${URL}/containerinfo/batch?since=0&max_points=${MAX_POINTS}`, {
          next: { revalidate: 0 },
       })
-      const containerList = eval(await res.text())
-      return containerList
+      const data = await res.json()
+      return { rows: flattenContainers(data.rows), cursor: data.cursor }
    } catch (e) {
-      return []
+      return { rows: {}, cursor: 0 }
    }
 }
 
-async function getData(containerName: string) {
-   try {
-      const res = await fetch(`${URL}/containerinfo?name=${containerName}`, {
-         next: { revalidate: 0 },
-      })
-      const dataList = eval(await res.text())
-      return dataList
-   } catch (e) {
-      return []
-   }
-}
-
-function filterData(data: any) {
-   const cpuData = data.map((item: any) => ({
-      date: item.measuretime,
-      percentage: item.cpuusage,
-   }))
-   const ramData = data.map((item: any) => ({
-      date: item.measuretime,
-      percentage: item.ramusage,
-   }))
-   const netData = data.map((item: any) => ({
-      date: item.measuretime,
-      rx: item.netrx,
-      tx: item.nettx,
-   }))
-
-   return { cpuData, ramData, netData }
-}
-
 export default async function ContainerCharts() {
-   const containerList = await getContainerList()
-   const containerData: any = {}
-
-   await Promise.all(
-      containerList.map(async (containerName: string) => {
-         containerData[containerName] = filterData(await getData(containerName))
-      })
-   )
+   const data = await getData()
 
    return (
       <ContainerSelect
-         containerList={containerList}
-         containerData={containerData}
+         containerList={Object.keys(data.rows).sort()}
+         initialData={data}
       />
    )
 }
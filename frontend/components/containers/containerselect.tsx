@@ -11,11 +11,23 @@ import {
    DropdownMenuSeparator,
    DropdownMenuTrigger,
 } from "@components/ui/dropdown-menu"
+import { chartData, flattenContainers } from "@/lib/stats"
+import useStats from "@/lib/usestats"
 
 import { useState } from "react"
 
-export default function ContainerSelect({ containerList, containerData }: any) {
+function containerName(row: any) {
+   return `${row.vm}/${row.name}`
+}
+
+export default function ContainerSelect({ containerList, initialData }: any) {
    const [selectedContainer, setSelectedContainer] = useState(containerList[0])
+   const containerData = useStats(
+      "containerinfo",
+      containerName,
+      initialData,
+      flattenContainers
+   )
 
    return containerList.length > 0 && containerData ? (
       <div className="mt-8">
@@ -42,7 +54,9 @@ export default function ContainerSelect({ containerList, containerData }: any) {
             </DropdownMenuContent>
          </DropdownMenu>
          <div>
-            <ContainerChart data={containerData[selectedContainer]} />
+            <ContainerChart
+               data={chartData(containerData[selectedContainer] || [])}
+            />
          </div>
       </div>
    ) : (
@@ -3,27 +3,34 @@
 import { Card, CardContent } from "@/components/ui/card"
 import { Progress } from "@/components/ui/progress"
 import { Separator } from "@/components/ui/separator"
-import { useEffect, useState } from "react"
+import useEvent from "@/lib/events"
+import { useCallback, useEffect, useState } from "react"
+
+function secondsLeft(data: any) {
+   return Math.max(Math.round(data.round_length - data.round_duration), 0)
+}
+
+export default function SimulationProgressClient({ data: initialData }: any) {
+   const [data, setData] = useState(initialData)
+   const [countdown, setCountdown] = useState(secondsLeft(initialData))
+
+   const onRound = useCallback((round: any) => {
+      setData(round)
+      setCountdown(secondsLeft(round))
+   }, [])
+   useEvent("round", onRound)
 
-export default function SimulationProgressClient({ data }: any) {
    const remainingRoundsNormed = Math.round(
       ((data.total_rounds - data.remaining_rounds) / data.total_rounds) * 100
    )
-   const remainingSeconds = Math.round(data.round_length - data.round_duration)
-   const [countdown, setCountdown] = useState(remainingSeconds)
 
    useEffect(() => {
       const countdownInterval = setInterval(() => {
-         if (countdown > 0) {
-            setCountdown(countdown - 1)
-         } else {
-            clearInterval(countdownInterval)
-            window.location.reload()
-         }
+         setCountdown((countdown: number) => Math.max(countdown - 1, 0))
       }, 1000)
 
       return () => clearInterval(countdownInterval)
-   }, [countdown])
+   }, [])
 
    return (
       <div className="container mx-auto mt-12 mb-8">
@@ -0,0 +1,74 @@
+import { Card, CardContent } from "@/components/ui/card"
+import { Separator } from "@/components/ui/separator"
+
+const URL = process.env.API_URL || "http://127.0.0.1:5000"
+
+async function getData() {
+   try {
+      const res = await fetch(`${URL}/roundtimings`, {
+         next: { revalidate: 0 },
+      })
+      return res.json()
+   } catch (e) {
+      return {}
+   }
+}
+
+export default async function RoundTimings() {
+   const data = await getData()
+   const spans = data.spans || []
+   const duration = data.duration || 1
+
+   return (
+      spans.length > 0 && (
+         <div className="container mx-auto mt-12 mb-8">
+            <Card>
+               <CardContent>
+                  <div className="mt-8">
+                     <h4 className="font-medium leading-none">
+                        Round {data.round_id} Timings
+                     </h4>
+                     <Separator className="my-4" />
+                     <div className="space-y-1 text-sm">
+                        {spans.map((span: any, index: number) => {
+                           const isPhase = span.name === span.phase
+                           return (
+                              <div key={index} className="flex items-center">
+                                 <div
+                                    className={
+                                       isPhase
+                                          ? "w-56 shrink-0 truncate font-medium"
+                                          : "w-56 shrink-0 truncate pl-4 text-muted-foreground"
+                                    }
+                                 >
+                                    {isPhase
+                                       ? span.name
+                                       : `${span.name} ${span.target}`}
+                                 </div>
+                                 <div className="relative h-4 flex-1">
+                                    <div
+                                       className={
+                                          isPhase
+                                             ? "absolute h-4 rounded bg-primary"
+                                             : "absolute h-4 rounded bg-primary/50"
+                                       }
+                                       style={{
+                                          left: `${(span.offset / duration) * 100}%`,
+                                          width: `max(${(span.duration / duration) * 100}%, 2px)`,
+                                       }}
+                                    />
+                                 </div>
+                                 <div className="w-24 shrink-0 text-right">
+                                    {Math.round(span.duration)} ms
+                                 </div>
+                              </div>
+                           )
+                        })}
+                     </div>
+                  </div>
+               </CardContent>
+            </Card>
+         </div>
+      )
+   )
+}
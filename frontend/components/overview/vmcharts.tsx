@@ -1,4 +1,5 @@
 import VMSelect from "@/components/overview/vmchartselect"
+import { MAX_POINTS } from "@/lib/stats"
 
 const URL = process.env.API_URL || "http://127.0.0.1:5000"
 
@@ -14,45 +15,20 @@ async function getVmList() {
    }
 }
 
-async function getData(vmName: string) {
+async function getData() {
    try {
-      const res = await fetch(`${URL}/vminfo?name=${vmName}`, {
+      const res = await fetch(`${URL}/vminfo/batch?since=0&max_points=${MAX_POINTS}`, {
          next: { revalidate: 0 },
       })
-      const dataList = eval(await res.text())
-      return dataList
+      const data = await res.json()
+      return data
    } catch (e) {
-      return []
+      return { rows: {}, cursor: 0 }
    }
 }
 
-function filterData(data: any) {
-   const cpuData = data.map((item: any) => ({
-      date: item.measuretime,
-      percentage: item.cpuusage,
-   }))
-   const ramData = data.map((item: any) => ({
-      date: item.measuretime,
-      percentage: item.ramusage,
-   }))
-   const netData = data.map((item: any) => ({
-      date: item.measuretime,
-      rx: item.netrx,
-      tx: item.nettx,
-   }))
-
-   return { cpuData, ramData, netData }
-}
-
 export default async function VMCharts() {
-   const vmList = await getVmList()
-   const vmData: any = {}
-
-   await Promise.all(
-      vmList.map(async (vmName: string) => {
-         vmData[vmName] = filterData(await getData(vmName))
-      })
-   )
+   const [vmList, data] = await Promise.all([getVmList(), getData()])
 
-   return <VMSelect vmList={vmList} vmData={vmData} />
+   return <VMSelect vmList={vmList} initialData={data} />
 }
@@ -11,11 +11,18 @@ import {
    DropdownMenuSeparator,
    DropdownMenuTrigger,
 } from "@components/ui/dropdown-menu"
+import { chartData } from "@/lib/stats"
+import useStats from "@/lib/usestats"
 
 import { useState } from "react"
 
-export default function VMSelect({ vmList, vmData }: any) {
+function vmName(row: any) {
+   return row.name
+}
+
+export default function VMSelect({ vmList, initialData }: any) {
    const [selectedVm, setSelectedVm] = useState(vmList[0])
+   const vmData = useStats("vminfo", vmName, initialData)
 
    return vmList.length > 0 && vmData ? (
       <div>
@@ -40,7 +47,7 @@ export default function VMSelect({ vmList, vmData }: any) {
          </DropdownMenu>
 
          <div>
-            <VMChart data={vmData[selectedVm]} />
+            <VMChart data={chartData(vmData[selectedVm] || [])} />
          </div>
       </div>
    ) : (
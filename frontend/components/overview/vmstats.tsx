@@ -1,30 +1,5 @@
 import VMCard from "@components/overview/vmcard"
-
-const URL = process.env.API_URL || "http://127.0.0.1:5000"
-
-async function getVmList() {
-   try {
-      const res = await fetch(`${URL}/vmlist`, {
-         next: { revalidate: 0 },
-      })
-      const vmList = eval(await res.text())
-      return vmList
-   } catch (e) {
-      return []
-   }
-}
-
-async function getData(vmName: string) {
-   try {
-      const res = await fetch(`${URL}/vminfo?name=${vmName}`, {
-         next: { revalidate: 0 },
-      })
-      const dataList = eval(await res.text())
-      return dataList[0]
-   } catch (e) {
-      return {}
-   }
-}
+import { getOverview } from "@/lib/overview"
 
 function filterVmJson(data: any) {
    const filteredData = {
@@ -40,14 +15,14 @@ function filterVmJson(data: any) {
 }
 
 export default async function VMStats() {
-   const vmList = await getVmList()
+   const vms = (await getOverview()).vms || {}
+   const vmList = Object.keys(vms)
    const vmData: any = {}
 
-   await Promise.all(
-      vmList.map(async (vmName: string) => {
-         vmData[vmName] = filterVmJson(await getData(vmName))
-      })
-   )
+   vmList.forEach((vmName: string) => {
+      // VMs are listed without stats until the first round is over
+      vmData[vmName] = filterVmJson({ name: vmName, ...vms[vmName] })
+   })
 
    return (
       <div className="container mx-auto mt-12 mb-8">
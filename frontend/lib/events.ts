@@ -0,0 +1,49 @@
+"use client"
+
+import { useEffect } from "react"
+
+// The server-sent events all client components share a single connection to
+let source: EventSource | null = null
+let subscribers = 0
+
+function connect() {
+   const eventSource = new EventSource("/api/events")
+   let opened = false
+   // Every open after the first is a reconnect, events pushed in between were missed
+   eventSource.addEventListener("open", () => {
+      if (opened) {
+         eventSource.dispatchEvent(new Event("reconnect"))
+      }
+      opened = true
+   })
+   return eventSource
+}
+
+function subscribe(event: string, listener: (e: MessageEvent) => void) {
+   if (!source) {
+      source = connect()
+   }
+   subscribers += 1
+   source.addEventListener(event, listener)
+
+   return () => {
+      source?.removeEventListener(event, listener)
+      subscribers -= 1
+      if (subscribers === 0) {
+         source?.close()
+         source = null
+      }
+   }
+}
+
+export default function useEvent(event: string, handler: (data: any) => void) {
+   useEffect(() => {
+      return subscribe(event, (e: MessageEvent) => handler(JSON.parse(e.data)))
+   }, [event, handler])
+}
+
+export function useReconnect(handler: () => void) {
+   useEffect(() => {
+      return subscribe("reconnect", () => handler())
+   }, [handler])
+}
@@ -0,0 +1,13 @@
+const URL = process.env.API_URL || "http://127.0.0.1:5000"
+
+// Fetched by several server components, the request is deduplicated per render
+export async function getOverview() {
+   try {
+      const res = await fetch(`${URL}/overview`, {
+         next: { revalidate: 0 },
+      })
+      return res.json()
+   } catch (e) {
+      return {}
+   }
+}
@@ -0,0 +1,51 @@
+// The stats history shown in the charts in milliseconds, matching the API default
+export const HISTORY_WINDOW = 30 * 60 * 1000
+// The maximum number of points per chart series the API downsamples the history to
+export const MAX_POINTS = 500
+
+export function flattenContainers(rows: any) {
+   const containerRows: any = {}
+   Object.entries(rows).forEach(([vmName, containers]: [string, any]) => {
+      Object.entries(containers).forEach(([containerName, series]) => {
+         containerRows[`${vmName}/${containerName}`] = series
+      })
+   })
+   return containerRows
+}
+
+// Merges new rows into the stats, skipping rows that are already present and keeping
+// each series ordered from the newest to the oldest row
+export function mergeStats(stats: any, newStats: any) {
+   const cutoff = Date.now() - HISTORY_WINDOW
+   const merged: any = {}
+   new Set([...Object.keys(stats), ...Object.keys(newStats)]).forEach((key) => {
+      const seen = new Set((stats[key] || []).map((item: any) => item.id))
+      merged[key] = [
+         ...(newStats[key] || []).filter(
+            (item: any) => item.id === undefined || !seen.has(item.id)
+         ),
+         ...(stats[key] || []),
+      ]
+         .filter((item: any) => item.measuretime > cutoff)
+         .sort((a: any, b: any) => b.measuretime - a.measuretime)
+   })
+   return merged
+}
+
+export function chartData(data: any) {
+   const cpuData = data.map((item: any) => ({
+      date: item.measuretime,
+      percentage: item.cpuusage,
+   }))
+   const ramData = data.map((item: any) => ({
+      date: item.measuretime,
+      percentage: item.ramusage,
+   }))
+   const netData = data.map((item: any) => ({
+      date: item.measuretime,
+      rx: item.netrx,
+      tx: item.nettx,
+   }))
+
+   return { cpuData, ramData, netData }
+}
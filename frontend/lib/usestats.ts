@@ -0,0 +1,61 @@
+"use client"
+
+import useEvent, { useReconnect } from "@/lib/events"
+import { MAX_POINTS, mergeStats } from "@/lib/stats"
+import { useCallback, useRef, useState } from "react"
+
+function groupRows(rows: any[], seriesName: (row: any) => string) {
+   const grouped: any = {}
+   rows.forEach((row) => {
+      const name = seriesName(row)
+      grouped[name] = [
+         { ...row, measuretime: row.measuretime ?? Date.now() },
+         ...(grouped[name] || []),
+      ]
+   })
+   return grouped
+}
+
+function sameRows(rows: any) {
+   return rows
+}
+
+export default function useStats(
+   table: string,
+   seriesName: (row: any) => string,
+   initialData: any,
+   batchRows: (rows: any) => any = sameRows
+) {
+   const [stats, setStats] = useState(initialData.rows)
+   // The id of the newest row received, from which the rows missed while the events
+   // were disconnected are fetched
+   const cursor = useRef(initialData.cursor || 0)
+
+   const onRows = useCallback(
+      (rows: any[]) => {
+         rows.forEach((row) => {
+            cursor.current = Math.max(cursor.current, row.id || 0)
+         })
+         setStats((stats: any) => mergeStats(stats, groupRows(rows, seriesName)))
+      },
+      [seriesName]
+   )
+   useEvent(table, onRows)
+
+   const onReconnect = useCallback(async () => {
+      try {
+         const res = await fetch(
+            `/api/${table}/batch?since=${cursor.current}&max_points=${MAX_POINTS}`
+         )
+         if (!res.ok) {
+            return
+         }
+         const data = await res.json()
+         cursor.current = Math.max(cursor.current, data.cursor)
+         setStats((stats: any) => mergeStats(stats, batchRows(data.rows)))
+      } catch (e) {}
+   }, [table, batchRows])
+   useReconnect(onReconnect)
+
+   return stats
+}
@@ -6,6 +6,7 @@ from dependency_injector import providers
 from pyfakefs.fake_filesystem_unittest import Patcher
 from pytest import fixture
 
+from enosimulator.backend.database import Database
 from enosimulator.containers import (
     BackendContainer,
     SetupContainer,
@@ -90,6 +91,15 @@ def backend_path():
     return backend_path
 
 
+@fixture
+def schema_database(tmp_path, backend_path):
+    database = Database(str(tmp_path / "database.db"))
+    with open(backend_path + "/schema.sql") as f:
+        database.connect().executescript(f.read())
+    yield database
+    database.close()
+
+
 @fixture
 def setup_container():
     setup_container = SetupContainer()
@@ -205,6 +215,13 @@ def simulation_container():
             ips=ip_addresses,
             teams=teams,
             services=services,
+            versions={
+                "ips": 0,
+                "team": 0,
+                "service": 0,
+                "round_info": 0,
+                "overview": 0,
+            },
         )
     )
     setup_container.configuration.config.from_dict(config)
@@ -227,7 +244,10 @@ def simulation_container():
 
 
 @fixture
-def backend_container(setup_container, simulation_container):
+def backend_container(setup_container, simulation_container, tmp_path, monkeypatch):
+    # The Flask application opens database.db in the working directory
+    monkeypatch.chdir(tmp_path)
+
     thread_lock = providers.Factory(Lock)
     locks = providers.Singleton(
         dict, service=thread_lock, team=thread_lock, round_info=thread_lock
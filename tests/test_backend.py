@@ -1,8 +1,55 @@
+import gzip
+import multiprocessing
 import os
-from sqlite3 import Connection, Row
-from unittest.mock import Mock, patch
+import runpy
+import sqlite3
+from queue import Queue
+from threading import Barrier, Lock, Thread
+from unittest.mock import Mock, call, patch
+from urllib.request import urlopen
 
-from enosimulator.backend.app import FlaskApp
+import numpy as np
+import pytest
+from flask import Flask
+
+from enosimulator.backend.analytics import aggregate, downsample, lttb, summarize
+from enosimulator.backend.app import (
+    CONTAINERINFO_BATCH_CURSOR_QUERY,
+    CONTAINERINFO_BATCH_QUERIES,
+    CONTAINERINFO_CURSOR_QUERY,
+    CONTAINERINFO_QUERIES,
+    CONTAINERINFO_VM_BATCH_CURSOR_QUERY,
+    CONTAINERINFO_VM_BATCH_QUERIES,
+    CONTAINERINFO_VM_CURSOR_QUERY,
+    CONTAINERINFO_VM_QUERIES,
+    VMINFO_BATCH_CURSOR_QUERY,
+    VMINFO_BATCH_QUERIES,
+    VMINFO_CURSOR_QUERY,
+    VMINFO_QUERIES,
+    Aggregate,
+    ApiWorker,
+    ContainerBatch,
+    Containers,
+    Export,
+    Ingest,
+    RoundMetrics,
+    RoundTimings,
+    ScoreHistory,
+    VMBatch,
+    VMs,
+    group_series,
+    history_range,
+    run_worker,
+)
+from enosimulator.backend.cache import ResponseCache
+from enosimulator.backend.database import Database
+from enosimulator.backend.events import EventBroker
+from enosimulator.backend.export import export_arrow, export_chunks, export_csv
+from enosimulator.backend.retention import Retention
+from enosimulator.backend.ringbuffer import StatsBuffer
+from enosimulator.backend.rollup import Rollup, percentile
+from enosimulator.backend.snapshots import SnapshotPublisher
+from enosimulator.backend.writer import DatabaseWriter
 
 
 def test_backend_init_and_run(backend_container):
@@ -19,7 +66,7 @@ def test_backend_init_and_run(backend_container):
     flask_app.app.run.assert_called_once_with(host="0.0.0.0", debug=False)
 
 
-def test_backend_init_db(mock_fs, backend_path, backend_container):
+def test_backend_init_db(backend_container, mock_fs, backend_path):
     backend_container.reset_singletons()
     with patch("backend.app.FlaskApp.init_db") as mock_init_db:
         flask_app = backend_container.flask_app()
@@ -41,7 +88,7 @@ def test_backend_init_db(mock_fs, backend_path, backend_container):
     assert mock_connect.return_value.close.call_count == 1
 
 
-def test_backend_delete_db(mock_fs, backend_container):
+def test_backend_delete_db(backend_container, mock_fs):
     backend_container.reset_singletons()
     with patch("backend.app.FlaskApp.init_db") as mock_init_db:
         flask_app = backend_container.flask_app()
@@ -56,25 +103,1167 @@ def test_backend_delete_db(mock_fs, backend_container):
     assert not os.path.exists("database.db")
 
 
-def test_backend_get_db_connection():
-    with patch("sqlite3.connect") as mock_connect:
-        FlaskApp.get_db_connection()
-    mock_connect.assert_called_once_with("database.db")
+def test_backend_ingest(backend_container):
+    backend_container.reset_singletons()
+    with patch("backend.app.FlaskApp.init_db"):
+        flask_app = backend_container.flask_app()
 
-    conn = FlaskApp.get_db_connection()
+    assert (
+        flask_app.simulation.orchestrator.stat_checker.ingest == flask_app.writer.submit
+    )
+    assert (
+        flask_app.simulation.tracer.write,
+        ["roundtimings"],
+    ) in flask_app.writer.listeners
 
-    assert isinstance(conn, Connection)
-    assert conn.row_factory == Row
+    flask_app.writer = Mock(DatabaseWriter)
+    flask_app.writer.submit.return_value = True
+    IngestApi = Ingest.create_api(flask_app.writer)
 
+    def post(json):
+        with flask_app.app.test_request_context("/ingest", method="POST", json=json):
+            return IngestApi().post()
 
-def test_backend_db_insert_values():
-    test_table_name = "test_table"
-    test_data = {"test_key": "test_value"}
+    test_batch = {
+        "containerinfo": [
+            {
+                "vm": "vulnbox1",
+                "name": "container1",
+                "cpuusage": 0.1,
+                "ramusage": 0.2,
+                "netrx": 0.3,
+                "nettx": 0.4,
+            }
+        ]
+    }
+    assert post({"vminfo": [{"name": "vulnbox1"}]})[1] == 400
+    assert post({"unknown": []})[1] == 400
+    assert post({"containerinfo": ["container1"]})[1] == 400
+    response, status = post(
+        {
+            "containerinfo": [
+                {**test_batch["containerinfo"][0], "id": 1, "vm) VALUES (1); --": 1}
+            ]
+        }
+    )
+    assert status == 400
+    assert response["message"] == "Unknown field"
+    flask_app.writer.submit.assert_not_called()
 
-    with patch("sqlite3.connect") as mock_connect:
-        query, params = FlaskApp.db_insert_values(test_table_name, test_data)
+    response, status = post(test_batch)
+
+    assert status == 200
+    assert response["rows"] == 1
+    flask_app.writer.submit.assert_called_once_with(test_batch)
+
+    flask_app.writer.submit.return_value = False
+    assert post(test_batch)[1] == 503
+
+
+def test_backend_post(backend_container):
+    backend_container.reset_singletons()
+    with patch("backend.app.FlaskApp.init_db"):
+        flask_app = backend_container.flask_app()
+
+    writer = Mock(DatabaseWriter)
+    writer.submit.return_value = True
+
+    def post(api, json):
+        with flask_app.app.test_request_context(method="POST", json=json):
+            return api.create_api(writer, None, None)().post()
+
+    test_vm = {
+        "name": "vulnbox1",
+        "ip": "10.1.1.1",
+        "cpu": "2",
+        "ram": "4",
+        "disk": "40",
+        "status": "online",
+        "uptime": 0,
+        "cpuusage": 0.1,
+        "ramusage": 0.2,
+        "netrx": 0.3,
+        "nettx": 0.4,
+    }
+    test_container = {
+        "vm": "vulnbox1",
+        "name": "container1",
+        "cpuusage": 0.1,
+        "ramusage": 0.2,
+        "netrx": 0.3,
+        "nettx": 0.4,
+    }
+    assert post(VMs, [test_vm])[0]["message"] == "Unknown field"
+    assert post(VMs, {**test_vm, "id": 1})[0]["message"] == "Unknown field"
+    assert post(VMs, {"name": "vulnbox1"})[0]["message"] == "Missing field"
+    assert post(Containers, ["container1"])[0]["message"] == "Unknown field"
+    response, status = post(
+        Containers, [test_container, {**test_container, "vm) VALUES (1); --": 1}]
+    )
+    assert status == 400
+    assert response["message"] == "Unknown field"
+    assert post(Containers, {"vm": "vulnbox1"})[0]["message"] == "Missing field"
+    writer.submit.assert_not_called()
+
+    assert post(VMs, test_vm)[1] == 200
+    assert post(Containers, [test_container])[1] == 200
+    assert writer.submit.call_args_list == [
+        call({"vminfo": [test_vm]}),
+        call({"containerinfo": [test_container]}),
+    ]
+
+
+def test_backend_metrics(backend_container):
+    backend_container.reset_singletons()
+    with patch("backend.app.FlaskApp.init_db"):
+        flask_app = backend_container.flask_app()
+
+    flask_app.simulation.metrics.inc("flags_submitted_total", 3, team="TestTeam1")
+    with flask_app.app.test_request_context("/metrics"):
+        response = flask_app.app.view_functions["metrics"]()
+
+    assert response.mimetype == "text/plain"
+    lines = response.get_data(as_text=True).splitlines()
+    assert "# TYPE enosimulator_round_phase_seconds histogram" in lines
+    assert 'enosimulator_flags_submitted_total{team="TestTeam1"} 3' in lines
+    assert "enosimulator_writer_queue_depth 0" in lines
+    assert "enosimulator_event_queue_depth 0" in lines
+
+
+def test_backend_metrics_with_api_workers(backend_container):
+    backend_container.reset_singletons()
+    with patch("backend.app.FlaskApp.init_db"):
+        flask_app = backend_container.flask_app()
+    flask_app.setup.config.settings.api_workers = 2
+    flask_app.snapshots = Mock(SnapshotPublisher)
+
+    servers = []
+    serve_metrics = flask_app.serve_metrics
+    flask_app.serve_metrics = Mock(side_effect=lambda: servers.append(serve_metrics(0)))
+
+    with patch("backend.app.socket.create_server"), patch(
+        "backend.app.multiprocessing.get_context"
+    ) as get_context:
+        flask_app.run()
+
+    assert get_context.return_value.Process.return_value.start.call_count == 2
+    flask_app.serve_metrics.assert_called_once_with()
+
+    flask_app.simulation.metrics.inc("flags_submitted_total", 3, team="TestTeam1")
+    try:
+        with urlopen(f"http://127.0.0.1:{servers[0].server_port}/metrics") as response:
+            lines = response.read().decode().splitlines()
+    finally:
+        servers[0].shutdown()
+
+    assert 'enosimulator_flags_submitted_total{team="TestTeam1"} 3' in lines
+    assert "enosimulator_writer_queue_depth 0" in lines
+
+
+def test_backend_writer(tmp_path):
+    database = str(tmp_path / "test.db")
+    with sqlite3.connect(database) as conn:
+        conn.execute(
+            "CREATE TABLE test_table (id INTEGER PRIMARY KEY AUTOINCREMENT, vm TEXT, name TEXT, pids INTEGER NOT NULL DEFAULT 0, UNIQUE (vm, name))"
+        )
+
+    writer = DatabaseWriter(
+        Database(database), queue_size=3, batch_size=2, flush_interval=0.01
+    )
+    listener = Mock()
+    writer.subscribe(listener, ["test_table"])
+    writer.perf = Mock()
+
+    assert writer.submit({"test_table": [{"vm": "vulnbox1", "name": "container1"}]})
+    assert not writer.submit(
+        {"test_table": [{"vm": "checker", "name": f"container{i}"} for i in range(3)]}
+    )
+    assert writer.stats()["queue_depth"] == 1
+    assert writer.stats()["rows_dropped"] == 3
+    assert writer.submit(
+        {"test_table": [{"vm": "checker", "name": f"container{i}"} for i in range(2)]}
+    )
+    assert writer.stats()["queue_depth"] == 3
+    listener.assert_not_called()
+
+    writer.start()
+    writer.join()
+
+    assert [
+        row for (batch,), _ in listener.call_args_list for row in batch["test_table"]
+    ] == [
+        {"id": 1, "vm": "vulnbox1", "name": "container1", "pids": 0},
+        {"id": 2, "vm": "checker", "name": "container0", "pids": 0},
+        {"id": 3, "vm": "checker", "name": "container1", "pids": 0},
+    ]
+
+    with sqlite3.connect(database) as conn:
+        rows = conn.execute("SELECT vm, name FROM test_table ORDER BY id").fetchall()
+    assert rows == [
+        ("vulnbox1", "container1"),
+        ("checker", "container0"),
+        ("checker", "container1"),
+    ]
+
+    stats = writer.stats()
+    assert stats["queue_depth"] == 0
+    assert stats["rows_written"] == 3
+    assert stats["batches_written"] == 2
+    assert stats["errors"] == 0
+    assert writer.perf.record.call_count == 2
+    assert writer.perf.record.call_args.args[:3] == ("db_write", database, "")
+
+    assert writer.submit(
+        {
+            "test_table": [
+                {"vm": "checker", "name": "container1"},
+                {"vm": "checker", "name": "container2"},
+            ]
+        }
+    )
+    writer.join()
+
+    with sqlite3.connect(database) as conn:
+        assert conn.execute("SELECT COUNT(*) FROM test_table").fetchone()[0] == 4
+    stats = writer.stats()
+    assert stats["rows_written"] == 4
+    assert stats["rows_rejected"] == 1
+    assert stats["errors"] == 1
+    listener.assert_called_with(
+        {"test_table": [{"id": 4, "vm": "checker", "name": "container2", "pids": 0}]}
+    )
+
+
+def test_backend_database(tmp_path):
+    database = Database(str(tmp_path / "test.db"))
+    writer = database.connect()
+    with writer:
+        writer.execute("CREATE TABLE test_table (vm TEXT, name TEXT)")
+        writer.execute(
+            "INSERT INTO test_table VALUES (?, ?)", ("vulnbox1", "container1")
+        )
+
+    assert writer.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    assert writer.execute("PRAGMA synchronous").fetchone()[0] == 1
+
+    with database.reader() as reader:
+        with pytest.raises(sqlite3.OperationalError):
+            reader.execute("DELETE FROM test_table")
+    with database.reader() as connection:
+        assert connection is reader
+    assert database.query("SELECT * FROM test_table WHERE vm = ?", ("vulnbox1",)) == [
+        {"vm": "vulnbox1", "name": "container1"}
+    ]
+
+    def read():
+        with database.reader() as connection:
+            readers.append(connection)
+            barrier.wait()
+
+    # Threads started per request share the pool instead of keeping a connection each
+    database.readers = Queue(maxsize=2)
+    readers = []
+    barrier = Barrier(4)
+    threads = [Thread(target=read) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(set(map(id, readers))) == 4
+    assert database.readers.qsize() == 2
+
+    database.close()
+    assert database.connections == []
+    assert database.readers.empty()
+
+
+@pytest.mark.parametrize(
+    "query, params, search",
+    [(query, ("vulnbox1", 0), "measuretime>?") for query in VMINFO_QUERIES.values()]
+    + [
+        (query, ("container1", 0), "measuretime>?")
+        for query in CONTAINERINFO_QUERIES.values()
+    ]
+    + [
+        (query, ("vulnbox1", "container1", 0), "measuretime>?")
+        for query in CONTAINERINFO_VM_QUERIES.values()
+    ]
+    + [
+        (query, ('["vulnbox1"]', 0), "name=? AND measuretime>?")
+        for query in VMINFO_BATCH_QUERIES.values()
+    ]
+    + [
+        (query, ('["container1"]', 0), "name=? AND measuretime>?")
+        for query in CONTAINERINFO_BATCH_QUERIES.values()
+    ]
+    + [
+        (query, ("vulnbox1", '["container1"]', 0), "name=? AND measuretime>?")
+        for query in CONTAINERINFO_VM_BATCH_QUERIES.values()
+    ]
+    + [
+        (query, (1, *params), "USING INTEGER PRIMARY KEY (rowid>?)")
+        for query, params in [
+            (VMINFO_CURSOR_QUERY, ("vulnbox1", 0)),
+            (CONTAINERINFO_CURSOR_QUERY, ("container1", 0)),
+            (CONTAINERINFO_VM_CURSOR_QUERY, ("vulnbox1", "container1", 0)),
+            (VMINFO_BATCH_CURSOR_QUERY, ('["vulnbox1"]', 0)),
+            (CONTAINERINFO_BATCH_CURSOR_QUERY, ('["container1"]', 0)),
+            (CONTAINERINFO_VM_BATCH_CURSOR_QUERY, ("vulnbox1", '["container1"]', 0)),
+        ]
+    ],
+)
+def test_backend_query_plan(schema_database, query, params, search):
+    plan = [
+        row["detail"]
+        for row in schema_database.query(f"EXPLAIN QUERY PLAN {query}", params)
+    ]
+
+    assert plan[0].startswith("SEARCH")
+    assert search in plan[0]
+    assert not any(step.startswith("SCAN") and "json_each" not in step for step in plan)
+
+
+def test_backend_cursor(schema_database):
+    database = schema_database
+    connection = database.connect()
+
+    def insert(vm_name, measuretime):
+        with connection:
+            connection.execute(
+                "INSERT INTO vminfo(name, ip, cpu, ram, disk, status, uptime, cpuusage, ramusage, netrx, nettx, measuretime) VALUES (?, '', '', '', '', '', 0, 0, 0, 0, 0, ?)",
+                (vm_name, measuretime),
+            )
+
+    for measuretime in (1000, 2000):
+        insert("vulnbox1", measuretime)
+        insert("vulnbox2", measuretime)
+
+    app = Flask(__name__)
+    VmApi = VMs.create_api(None, database, None)
+    VmBatchApi = VMBatch.create_api(database, None, ["vulnbox1", "vulnbox2"])
+
+    def get(api, query):
+        with app.test_request_context(f"/vminfo?window=2000000000&{query}"):
+            return api().get()
+
+    with patch("enosimulator.backend.app.time", return_value=1000):
+        response = get(VmApi, "name=vulnbox1&since=0")
+        assert [row["id"] for row in response["rows"]] == [3, 1]
+        assert response["cursor"] == 3
+
+        assert get(VmApi, "name=vulnbox1&since=3") == {"rows": [], "cursor": 3}
+        assert get(VmApi, "name=vulnbox1&since=-1")[1] == 400
+        assert get(VmApi, "name=vulnbox1&since=0&resolution=60")[1] == 400
+
+        insert("vulnbox1", 3000)
+        insert("vulnbox2", 3000)
+
+        response = get(VmApi, "name=vulnbox1&since=3")
+        assert [row["id"] for row in response["rows"]] == [5]
+        assert response["cursor"] == 5
+
+        response = get(VmBatchApi, "since=4")
+        assert {
+            name: [row["id"] for row in rows] for name, rows in response["rows"].items()
+        } == {"vulnbox1": [5], "vulnbox2": [6]}
+        assert response["cursor"] == 6
+        assert get(VmBatchApi, "since=4&limit=1")[1] == 400
+
+        insert("vulnbox1", 4000)
+        insert("vulnbox1", 5000)
+
+        response = get(VmApi, "name=vulnbox1&since=0&max_points=3")
+        assert len(response["rows"]) == 3
+        assert response["rows"][0]["id"] == 8 and response["rows"][-1]["id"] == 1
+        assert response["cursor"] == 8
+        assert len(get(VmApi, "name=vulnbox1&max_points=3")) == 3
+        assert get(VmApi, "name=vulnbox1&max_points=2")[1] == 400
+
+
+def test_backend_batch(schema_database):
+    database = schema_database
+    connection = database.connect()
+    with connection:
+        connection.executemany(
+            "INSERT INTO vminfo VALUES (NULL, ?, '', '', '', '', '', 0, ?, 0, 0, 0, ?)",
+            [
+                (f"vulnbox{vm}", measuretime, measuretime)
+                for vm in range(1, 4)
+                for measuretime in (1000, 2000, 3000)
+            ],
+        )
+        connection.executemany(
+            "INSERT INTO containerinfo(vm, name, cpuusage, ramusage, netrx, nettx, measuretime) VALUES (?, ?, 0, 0, 0, 0, ?)",
+            [
+                ("vulnbox1", "container1", 1000),
+                ("vulnbox1", "container1", 2000),
+                ("vulnbox1", "container2", 1000),
+                ("vulnbox2", "container1", 1000),
+            ],
+        )
+
+    app = Flask(__name__)
+    VmBatchApi = VMBatch.create_api(database, None, ["vulnbox1", "vulnbox2"])
+    ContainerBatchApi = ContainerBatch.create_api(database, None)
+
+    def get(api, query):
+        with app.test_request_context(f"/batch?window=2000000000&{query}"):
+            return api().get()
+
+    with patch("enosimulator.backend.app.time", return_value=1000):
+        vms = get(VmBatchApi, "")
+        assert vms.keys() == {"vulnbox1", "vulnbox2"}
+        assert [row["measuretime"] for row in vms["vulnbox1"]] == [3000, 2000, 1000]
+        assert get(VmBatchApi, "names=vulnbox3&limit=1") == {
+            "vulnbox3": [{**vms["vulnbox1"][0], "id": 9, "name": "vulnbox3"}]
+        }
+        assert get(VmBatchApi, "limit=0")[1] == 400
+
+        containers = get(ContainerBatchApi, "")
+        assert {vm: set(names) for vm, names in containers.items()} == {
+            "vulnbox1": {"container1", "container2"},
+            "vulnbox2": {"container1"},
+        }
+        assert len(containers["vulnbox1"]["container1"]) == 2
+        assert list(get(ContainerBatchApi, "vm=vulnbox2")) == ["vulnbox2"]
+        assert get(ContainerBatchApi, "names=container2")["vulnbox1"].keys() == {
+            "container2"
+        }
+        assert get(ContainerBatchApi, "since=0&limit=1")[1] == 400
+
+    database.close()
+
+
+def test_backend_group_series():
+    rows = [
+        {"vm": "vulnbox1", "name": "container1", "measuretime": 2},
+        {"vm": "vulnbox2", "name": "container1", "measuretime": 2},
+        {"vm": "vulnbox1", "name": "container1", "measuretime": 1},
+    ]
+
+    assert group_series(rows, ["vm", "name"]) == {
+        "vulnbox1": {"container1": [rows[0], rows[2]]},
+        "vulnbox2": {"container1": [rows[1]]},
+    }
+    assert group_series(rows, ["name"], limit=1) == {"container1": [rows[0]]}
+
+    metrics = {"cpuusage": 0, "ramusage": 0, "netrx": 0, "nettx": 0}
+    rows = [
+        {"vm": "vulnbox1", "name": "container1", "measuretime": 5 - i, **metrics}
+        for i in range(5)
+    ]
+    grouped = group_series(rows, ["vm", "name"], max_points=3)
+    assert [row["measuretime"] for row in grouped["vulnbox1"]["container1"]] == [
+        5,
+        2,
+        1,
+    ]
+
+
+def test_backend_lttb():
+    x = np.arange(100, dtype=np.float64)
+    y = np.zeros(100)
+    y[37] = 10
+    y[70] = -5
+
+    selected = lttb(x, y, 10)
+    assert len(selected) == 10
+    assert selected[0] == 0 and selected[-1] == 99
+    assert np.all(np.diff(selected) > 0)
+    assert 37 in selected and 70 in selected
+    assert np.array_equal(lttb(x[:5], y[:5], 10), np.arange(5))
+
+    rows = [
+        {
+            "measuretime": 1000 - i,
+            "cpuusage": 0,
+            "ramusage": 50 if i == 42 else 0,
+            "netrx": 0,
+            "nettx": 0,
+        }
+        for i in range(100)
+    ]
+    downsampled = downsample(rows, 5)
+    assert len(downsampled) == 5
+    assert downsampled[0] is rows[0] and downsampled[-1] is rows[-1]
+    assert rows[42] in downsampled
+    assert [row["measuretime"] for row in downsampled] == sorted(
+        (row["measuretime"] for row in downsampled), reverse=True
+    )
+    assert downsample(rows, None) is rows
+
+
+def test_backend_database_migrate(tmp_path, backend_path):
+    path = str(tmp_path / "test.db")
+    with sqlite3.connect(path) as conn:
+        conn.executescript(
+            """
+            CREATE TABLE vminfo (
+                name TEXT NOT NULL, ip TEXT NOT NULL, cpu TEXT NOT NULL,
+                ram TEXT NOT NULL, disk TEXT NOT NULL, status TEXT NOT NULL,
+                uptime REAL NOT NULL, cpuusage REAL NOT NULL, ramusage REAL NOT NULL,
+                netrx REAL NOT NULL, nettx REAL NOT NULL,
+                measuretime DATETIME DEFAULT (datetime('now','localtime')) NOT NULL,
+                PRIMARY KEY (name, measuretime)
+            );
+            CREATE INDEX name_measuretime_vms ON vminfo (name, measuretime);
+            CREATE TABLE containerinfo (
+                name TEXT NOT NULL, cpuusage REAL NOT NULL, ramusage REAL NOT NULL,
+                netrx REAL NOT NULL, nettx REAL NOT NULL,
+                measuretime DATETIME DEFAULT (datetime('now','localtime')) NOT NULL,
+                PRIMARY KEY (name, measuretime)
+            );
+            CREATE INDEX name_measuretime_containers ON containerinfo (name, measuretime);
+            INSERT INTO vminfo VALUES ('vulnbox1', '1.2.3.4', '2', '4', '20', 'online', 1, 0.1, 0.2, 0.3, 0.4, datetime(1700000000, 'unixepoch', 'localtime'));
+            INSERT INTO containerinfo VALUES ('container1', 0.1, 0.2, 0.3, 0.4, datetime(1700000000, 'unixepoch', 'localtime'));
+            """
+        )
+    with open(backend_path + "/schema.sql") as f:
+        schema = f.read()
+
+    database = Database(path)
+
+    assert database.migrate(schema)
+    assert not database.migrate(schema)
+
+    assert database.query("SELECT id, name, measuretime FROM vminfo") == [
+        {"id": 1, "name": "vulnbox1", "measuretime": 1700000000000}
+    ]
+    assert database.query("SELECT vm, name, pids, measuretime FROM containerinfo") == [
+        {
+            "vm": "vulnbox1",
+            "name": "container1",
+            "pids": 0,
+            "measuretime": 1700000000000,
+        }
+    ]
+    database.close()
+
+
+def test_util_migrate_database(tmp_path, backend_path, monkeypatch, capsys):
+    path = str(tmp_path / "database.db")
+    with sqlite3.connect(path) as conn:
+        conn.executescript(
+            """
+            CREATE TABLE vminfo (
+                name TEXT NOT NULL, ip TEXT NOT NULL, cpu TEXT NOT NULL,
+                ram TEXT NOT NULL, disk TEXT NOT NULL, status TEXT NOT NULL,
+                uptime REAL NOT NULL, cpuusage REAL NOT NULL, ramusage REAL NOT NULL,
+                netrx REAL NOT NULL, nettx REAL NOT NULL,
+                measuretime DATETIME NOT NULL
+            );
+            INSERT INTO vminfo VALUES ('vulnbox1', '1.2.3.4', '2', '4', '20', 'online', 1, 0.1, 0.2, 0.3, 0.4, datetime(1700000000, 'unixepoch', 'localtime'));
+            CREATE TABLE rounds (round_id INTEGER NOT NULL, measuretime INTEGER NOT NULL);
+            INSERT INTO rounds VALUES (1, 1700000000000);
+            """
+        )
+
+    script = os.path.join(backend_path, "../../util/migrate_database.py")
+    monkeypatch.setattr("sys.argv", ["migrate_database.py", path])
+    runpy.run_path(script, run_name="__main__")
+    assert capsys.readouterr().out == f"Migrated {path}\n"
+
+    database = Database(path)
+    assert database.query("SELECT round_id, measuretime FROM rounds") == [
+        {"round_id": 1, "measuretime": 1700000000000}
+    ]
+    assert database.query("SELECT name, measuretime FROM vminfo") == [
+        {"name": "vulnbox1", "measuretime": 1700000000000}
+    ]
+    assert database.query("SELECT * FROM scorehistory") == []
+    database.close()
+
+    runpy.run_path(script, run_name="__main__")
+    assert capsys.readouterr().out == f"{path} is already up to date\n"
+
+
+def test_backend_history_range(backend_container):
+    backend_container.reset_singletons()
+    with patch("backend.app.FlaskApp.init_db"):
+        flask_app = backend_container.flask_app()
+
+    def parse(query_string):
+        with flask_app.app.test_request_context(f"/vminfo?{query_string}"):
+            with patch("enosimulator.backend.app.time", return_value=10000):
+                return history_range()
+
+    assert parse("") == ("", 10000000 - 1800000)
+    assert parse("resolution=30&window=60") == ("", 10000000 - 60000)
+    assert parse("resolution=60") == ("1m", 10000000 - 1800000)
+    assert parse("resolution=599&window=3600") == ("1m", 10000000 - 3600000)
+    assert parse("resolution=3600&window=28800") == ("10m", 10000000 - 28800000)
+    with pytest.raises(ValueError):
+        parse("resolution=abc")
+    with pytest.raises(ValueError):
+        parse("window=0")
+
+
+def test_backend_rollup(schema_database):
+    database = schema_database
+    writer = Mock(DatabaseWriter)
+    writer.submit.return_value = False
+    rollup = Rollup(database, writer)
+
+    with database.connect() as conn:
+        conn.executemany(
+            "INSERT INTO containerinfo(vm, name, cpuusage, ramusage, netrx, nettx, measuretime) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            [
+                ("vulnbox1", "container1", i, 1, 2, 3, 600000 + i * 10000)
+                for i in range(1, 21)
+            ],
+        )
+
+    # Buckets refused by a full write queue are rolled up again
+    assert rollup.roll_up(now=780000) == {}
+    assert rollup.watermarks == {}
+
+    writer.submit.reset_mock()
+    writer.submit.return_value = True
+    # Only the buckets that are complete and older than the rollup lag get rolled up
+    batch = rollup.roll_up(now=780000)
+
+    assert list(batch.keys()) == ["containerinfo_1m"]
+    assert [row["measuretime"] for row in batch["containerinfo_1m"]] == [600000]
+    assert batch["containerinfo_1m"][0] == {
+        "vm": "vulnbox1",
+        "name": "container1",
+        "measuretime": 600000,
+        "samples": 5,
+        "cpuusage_min": 1,
+        "cpuusage_avg": 3,
+        "cpuusage_max": 5,
+        "cpuusage_p95": 5,
+        "ramusage_min": 1,
+        "ramusage_avg": 1,
+        "ramusage_max": 1,
+        "ramusage_p95": 1,
+        "netrx_min": 2,
+        "netrx_avg": 2,
+        "netrx_max": 2,
+        "netrx_p95": 2,
+        "nettx_min": 3,
+        "nettx_avg": 3,
+        "nettx_max": 3,
+        "nettx_p95": 3,
+    }
+    writer.submit.assert_called_once_with(batch)
+
+    batch = rollup.roll_up(now=960000)
+
+    assert [row["measuretime"] for row in batch["containerinfo_1m"]] == [
+        660000,
+        720000,
+        780000,
+    ]
+    assert [row["samples"] for row in batch["containerinfo_1m"]] == [6, 6, 3]
+    assert "containerinfo_10m" not in batch
+
+    batch = rollup.roll_up(now=1320000)
+
+    assert batch["containerinfo_10m"][0]["samples"] == 20
+    assert batch["containerinfo_10m"][0]["cpuusage_p95"] == 19
+    database.close()
+
+
+def test_backend_percentile():
+    assert percentile([1], 95) == 1
+    assert percentile(list(range(1, 101)), 95) == 95
+    assert percentile(list(range(1, 101)), 0) == 1
+
+
+def test_backend_retention(schema_database):
+    database = schema_database
+    with database.connect() as conn:
+        conn.executemany(
+            "INSERT INTO containerinfo(vm, name, cpuusage, ramusage, netrx, nettx, measuretime) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            [("vulnbox1", "container1", 1, 1, 1, 1, i * 1000) for i in range(10)],
+        )
+
+    with pytest.raises(ValueError):
+        Retention(database, {"unknown": 60})
+
+    retention = Retention(database, {"containerinfo": 5}, batch_size=2)
+    deleted = retention.prune(now=10000)
+
+    assert deleted["containerinfo"] == 5
+    assert deleted["vminfo"] == 0
+    assert "vminfo_10m" not in deleted
+    assert [
+        row["measuretime"]
+        for row in database.query("SELECT measuretime FROM containerinfo")
+    ] == [5000, 6000, 7000, 8000, 9000]
+    database.close()
+
+
+def test_backend_stats_buffer():
+    with patch("enosimulator.backend.ringbuffer.time", return_value=1000):
+        buffer = StatsBuffer(window=60)
+
+    with patch("enosimulator.backend.ringbuffer.time", return_value=1010):
+        buffer.add(
+            {
+                "vminfo": [{"name": "vulnbox1", "measuretime": 1005000}],
+                "containerinfo": [
+                    {"vm": "vulnbox1", "name": "container1", "measuretime": 1002000},
+                    {"vm": "checker", "name": "container1"},
+                ],
+                "vminfo_1m": [{"name": "vulnbox1", "measuretime": 960000}],
+            }
+        )
+
+        assert buffer.query("vminfo", 999000) is None
+        assert buffer.query("vminfo", 1000000, name="vulnbox1") == [
+            {"name": "vulnbox1", "measuretime": 1005000}
+        ]
+        assert buffer.query("containerinfo", 1000000, name="container1") == [
+            {"vm": "checker", "name": "container1", "measuretime": 1010000},
+            {"vm": "vulnbox1", "name": "container1", "measuretime": 1002000},
+        ]
+        assert buffer.query(
+            "containerinfo", 1000000, vm="vulnbox1", name="container1"
+        ) == [{"vm": "vulnbox1", "name": "container1", "measuretime": 1002000}]
+
+    with patch("enosimulator.backend.ringbuffer.time", return_value=1063):
+        buffer.add({"vminfo": [{"name": "vulnbox1", "measuretime": 1063000}]})
+
+        assert buffer.query("containerinfo", 1003000) == [
+            {"vm": "checker", "name": "container1", "measuretime": 1010000}
+        ]
+        assert ("vminfo_1m", "vulnbox1") not in buffer.series
+
+
+def test_backend_events():
+    setup = Mock()
+    team = Mock()
+    team.to_json.return_value = {"name": "TestTeam", "points": 0}
+    setup.teams = {"TestTeam": team}
+    setup.versions = {"team": 0}
+    simulation = Mock()
+    simulation.round_info.return_value = {"round_id": 1}
+    locks = {"round_info": Lock(), "team": Lock()}
+    broker = EventBroker(setup, simulation, locks)
+
+    broker.check()
+    subscriber = broker.subscribe()
+    assert subscriber.get_nowait() == 'event: round\ndata: {"round_id":1}\n\n'
+    assert (
+        subscriber.get_nowait()
+        == 'event: teams\ndata: {"TestTeam":{"name":"TestTeam","points":0}}\n\n'
+    )
+
+    broker.check()
+    assert subscriber.empty()
+    assert team.to_json.call_count == 1
+
+    team.to_json.return_value = {"name": "TestTeam", "points": 10}
+    setup.versions["team"] += 1
+    simulation.round_info.return_value = {"round_id": 2}
+    broker.check()
+    broker.publish_stats(
+        {"vminfo": [{"name": "vulnbox1"}], "containerinfo": [], "vminfo_1m": [{}]}
+    )
+    stream = broker.stream(subscriber)
+    assert next(stream) == 'event: round\ndata: {"round_id":2}\n\n'
+    assert next(stream).startswith("event: teams")
+    assert next(stream) == 'event: vminfo\ndata: [{"name":"vulnbox1"}]\n\n'
+
+    stream.close()
+    assert subscriber not in broker.subscribers
+
+
+def test_backend_events_failed_check():
+    setup = Mock()
+    setup.teams = dict()
+    setup.versions = {"team": 0}
+    simulation = Mock()
+    simulation.round_info.side_effect = [RuntimeError("Failed"), {"round_id": 1}]
+    locks = {"round_info": Lock(), "team": Lock()}
+    broker = EventBroker(setup, simulation, locks, interval=0.01)
+    subscriber = broker.subscribe()
+
+    broker.start()
+    try:
+        assert subscriber.get(timeout=5) == 'event: round\ndata: {"round_id":1}\n\n'
+    finally:
+        broker.stop()
+    broker.thread.join()
+
+
+def test_backend_events_slow_subscriber():
+    broker = EventBroker(Mock(), Mock(), dict())
+    subscriber = broker.subscribe()
+
+    for _ in range(subscriber.maxsize + 1):
+        broker.publish("vminfo", [])
+
+    assert subscriber not in broker.subscribers
+
+
+def test_backend_response_cache():
+    app = Flask(__name__)
+    cache = ResponseCache()
+    render = Mock(return_value={"TestTeam": {"points": 1}})
+
+    def get(version, headers=dict()):
+        with app.test_request_context("/teams", headers=headers):
+            return cache.response("teams", version, render)
+
+    response = get(1)
+    etag = response.headers["ETag"]
+    assert response.status_code == 200
+    assert response.get_json() == {"TestTeam": {"points": 1}}
+
+    response = get(1, {"Accept-Encoding": "gzip, deflate"})
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert gzip.decompress(response.get_data()) == b'{"TestTeam": {"points": 1}}'
+    assert response.headers["ETag"] == etag
+
+    response = get(1, {"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.get_data() == b""
+    assert render.call_count == 1
+
+    render.return_value = {"TestTeam": {"points": 2}}
+    response = get(2, {"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+    assert response.get_json() == {"TestTeam": {"points": 2}}
+    assert render.call_count == 2
+
+    cache.max_entries = 2
+    with app.test_request_context("/aggregate"):
+        cache.response("aggregate-1", 1, render)
+        cache.response("aggregate-2", 1, render)
+    assert list(cache.entries) == ["aggregate-1", "aggregate-2"]
+
+
+def test_backend_snapshots(schema_database, tmp_path, monkeypatch):
+    # The workers open the database in the working directory
+    monkeypatch.chdir(tmp_path)
+    database = schema_database
+
+    setup = Mock()
+    setup.versions = {
+        "ips": 1,
+        "team": 1,
+        "service": 1,
+        "round_info": 1,
+        "overview": 1,
+    }
+    setup.teams = {"TestTeam": Mock(**{"to_json.return_value": {"points": 1}})}
+    setup.services = dict()
+    setup.ips.public_ip_addresses = {"vulnbox1": "10.1.1.1"}
+    simulation = Mock(**{"round_info.return_value": {"round_id": 1}})
+    simulation.overview = {"round": {"round_id": 1}}
+    simulation.perf.report.return_value = {"round_id": 1, "current": []}
+    locks = {"service": Lock(), "team": Lock(), "round_info": Lock()}
+    publisher = SnapshotPublisher(database, setup, simulation, locks)
+
+    with patch("enosimulator.backend.snapshots.time", return_value=1000):
+        assert publisher.publish() == [
+            "teams",
+            "services",
+            "vmlist",
+            "roundinfo",
+            "overview",
+            "perf",
+        ]
+        assert publisher.publish() == []
+
+        setup.versions["team"] += 1
+        setup.teams["TestTeam"].to_json.return_value = {"points": 2}
+        assert publisher.publish() == ["teams"]
+
+    with patch("enosimulator.backend.snapshots.time", return_value=1001):
+        assert publisher.publish() == ["roundinfo", "perf"]
+
+    worker = ApiWorker("epoch")
+    get_teams = worker.app.view_functions["teamssnapshot"]
+
+    with worker.app.test_request_context("/teams"):
+        response = get_teams()
+    assert response.get_json() == {"TestTeam": {"points": 2}}
+    assert response.headers["ETag"] == '"epoch-teams-2"'
+
+    with worker.app.test_request_context(
+        "/teams", headers={"If-None-Match": '"epoch-teams-2"'}
+    ):
+        assert get_teams().status_code == 304
+
+    with worker.app.test_request_context("/overview"):
+        response = worker.app.view_functions["overviewsnapshot"]()
+    assert response.get_json() == {"round": {"round_id": 1}}
+
+    database.close()
+    worker.database.close()
+
+
+def test_backend_run_worker_shared_listener():
+    receiver, sender = multiprocessing.Pipe(duplex=False)
+    sender.send(b"shared")
+
+    with patch("socket.fromshare", create=True) as fromshare, patch(
+        "enosimulator.backend.app.ApiWorker"
+    ) as api_worker:
+        run_worker(receiver, "epoch")
+
+    fromshare.assert_called_once_with(b"shared")
+    api_worker.assert_called_once_with("epoch")
+    api_worker.return_value.serve.assert_called_once_with(fromshare.return_value)
+
+
+def test_backend_export(schema_database, monkeypatch):
+    monkeypatch.setattr("enosimulator.backend.export.EXPORT_CHUNK_SIZE", 2)
+    database = schema_database
+    connection = database.connect()
+    with connection:
+        connection.executemany(
+            "INSERT INTO rounds VALUES (?, ?)", [(1, 1000), (2, 2000)]
+        )
+        connection.executemany(
+            "INSERT INTO vminfo(name, ip, cpu, ram, disk, status, uptime, cpuusage, ramusage, netrx, nettx, measuretime) VALUES ('vulnbox1', '', '', '', '', '', 0, ?, 0, 0, 0, ?)",
+            [(0.1, 500), (0.2, 1500), (0.3, 2000), (0.4, 2500), (0.5, 3000)],
+        )
+
+    chunks = list(export_chunks(database, "vminfo", 0, 3000))
+    assert [len(rows) for _, rows in chunks] == [2, 2]
+    assert chunks[0][0][:3] == ["round_id", "id", "name"]
+    assert [row[0] for _, rows in chunks for row in rows] == [None, 1, 2, 2]
+
+    lines = "".join(export_csv(database, "vminfo", 1000, 2001)).splitlines()
+    assert lines[0].startswith("round_id,id,name,")
+    assert [line.split(",")[0] for line in lines[1:]] == ["1", "2"]
+
+    ((columns, rows),) = export_chunks(database, "vminfo_1m")
+    assert columns[:3] == ["round_id", "name", "measuretime"] and rows == []
+    with pytest.raises(ValueError):
+        next(export_chunks(database, "snapshots"))
+
+    app = Flask(__name__)
+    get = Export.create_api(database)().get
+    for query in ["table=snapshots", "format=xml", "start=abc"]:
+        with app.test_request_context(f"/export?{query}"):
+            assert get()[1] == 400
+    with app.test_request_context("/export?start=1000&end=2001"):
+        response = get()
+        assert response.mimetype == "text/csv"
+        assert response.headers["Content-Disposition"].endswith("vminfo.csv")
+        assert response.get_data(as_text=True).splitlines() == lines
+
+    database.close()
+
+
+def test_backend_export_arrow(schema_database):
+    pyarrow = pytest.importorskip("pyarrow")
+    database = schema_database
+    connection = database.connect()
+    with connection:
+        connection.execute("INSERT INTO rounds VALUES (1, 1000)")
+        connection.execute(
+            "INSERT INTO vminfo(name, ip, cpu, ram, disk, status, uptime, cpuusage, ramusage, netrx, nettx, measuretime) VALUES ('vulnbox1', '', '', '', '', '', 0, 0.5, 0, 0, 0, 1500)"
+        )
+
+    table = pyarrow.ipc.open_stream(
+        b"".join(export_arrow(database, "vminfo"))
+    ).read_all()
+    assert table.column("round_id").to_pylist() == [1]
+    assert table.column("cpuusage").to_pylist() == [0.5]
+    assert table.schema.field("measuretime").type == pyarrow.int64()
+
+    database.close()
+
+
+def test_backend_score_history(schema_database):
+    database = schema_database
+    connection = database.connect()
+    with connection:
+        connection.executemany(
+            "INSERT INTO scorehistory VALUES (?, ?, ?, 0, 0, 0, 0, 0)",
+            [
+                (round_id, team, round_id * points)
+                for round_id in range(1, 7)
+                for team, points in [("TestTeam1", 1), ("TestTeam2", 2)]
+            ],
+        )
+
+    app = Flask(__name__)
+    get = ScoreHistory.create_api(database)().get
+
+    with app.test_request_context("/scorehistory"):
+        history = get()
+    assert list(history) == ["TestTeam1", "TestTeam2"]
+    assert [row["round_id"] for row in history["TestTeam1"]] == [1, 2, 3, 4, 5, 6]
+
+    with app.test_request_context("/scorehistory?teams=TestTeam2&start=2&end=6&step=2"):
+        history = get()
+    assert list(history) == ["TestTeam2"]
+    assert [row["round_id"] for row in history["TestTeam2"]] == [2, 4, 6]
+    assert [row["points"] for row in history["TestTeam2"]] == [4, 8, 12]
+
+    for query in ["step=0", "start=abc"]:
+        with app.test_request_context(f"/scorehistory?{query}"):
+            assert get()[1] == 400
+
+    database.close()
+
+
+def test_backend_summarize():
+    summary = summarize(np.arange(1, 101, dtype=np.float64))
+    assert summary == {
+        "samples": 100,
+        "min": 1.0,
+        "avg": 50.5,
+        "max": 100.0,
+        "p50": 50.0,
+        "p95": 95.0,
+        "p99": 99.0,
+    }
+    values = [3.0, 1.0, 2.0, 5.0]
+    assert summarize(np.array(values))["p95"] == percentile(sorted(values), 95)
+
+
+def test_backend_aggregate(schema_database):
+    database = schema_database
+    connection = database.connect()
+    with connection:
+        connection.executemany(
+            "INSERT INTO rounds VALUES (?, ?)", [(1, 1000), (2, 2000), (3, 3000)]
+        )
+        connection.executemany(
+            "INSERT INTO vminfo(name, ip, cpu, ram, disk, status, uptime, cpuusage, ramusage, netrx, nettx, measuretime) VALUES (?, '', '', '', '', '', 0, ?, 0, 0, 0, ?)",
+            [
+                ("vulnbox1", 10, 1500),
+                ("vulnbox1", 30, 2500),
+                ("vulnbox1", 20, 2200),
+                ("vulnbox1", 40, 3100),
+                ("checker", 50, 1500),
+            ],
+        )
+        connection.execute(
+            "INSERT INTO containerinfo(vm, name, cpuusage, ramusage, netrx, nettx, measuretime) VALUES ('vulnbox1', 'container1', 0, 0.5, 0, 0, 2500)"
+        )
+
+    aggregates = aggregate(database, "vminfo", "cpuusage", ["vulnbox1"], 2000)
+    assert list(aggregates) == ["vulnbox1"]
+    assert aggregates["vulnbox1"]["samples"] == 3
+    assert aggregates["vulnbox1"]["avg"] == 30
+    assert aggregates["vulnbox1"]["p50"] == 30
+
+    aggregates = aggregate(database, "vminfo", "cpuusage", ["vulnbox1"], 0, True)
+    assert [
+        (summary["round_id"], summary["samples"], summary["max"])
+        for summary in aggregates["vulnbox1"]
+    ] == [(1, 1, 10), (2, 2, 30), (3, 1, 40)]
+
+    aggregates = aggregate(database, "containerinfo", "ramusage", ["container1"], 0)
+    assert aggregates["vulnbox1"]["container1"]["max"] == 0.5
+
+    with pytest.raises(ValueError):
+        aggregate(database, "vminfo", "uptime", ["vulnbox1"], 0)
+
+    app = Flask(__name__)
+    get = Aggregate.create_api(database, ["vulnbox1", "checker"], ResponseCache())().get
+    for query in ["table=rounds", "metric=id", "by=team", "window=0"]:
+        with app.test_request_context(f"/aggregate?{query}"):
+            assert get()[1] == 400
+
+    with patch("enosimulator.backend.app.time", return_value=10), patch(
+        "enosimulator.backend.app.aggregate", wraps=aggregate
+    ) as aggregate_mock:
+        with app.test_request_context("/aggregate?window=10"):
+            response = get()
+        assert set(response.get_json()) == {"vulnbox1", "checker"}
+        with app.test_request_context("/aggregate?window=10"):
+            assert get().get_json() == response.get_json()
+        assert aggregate_mock.call_count == 1
+
+        with connection:
+            connection.execute(
+                "INSERT INTO vminfo(name, ip, cpu, ram, disk, status, uptime, cpuusage, ramusage, netrx, nettx, measuretime) VALUES ('checker', '', '', '', '', '', 0, 70, 0, 0, 0, 3500)"
+            )
+        with app.test_request_context("/aggregate?window=10"):
+            assert get().get_json()["checker"]["max"] == 70
+        assert aggregate_mock.call_count == 2
+
+        with app.test_request_context("/aggregate?table=containerinfo&vm=checker"):
+            assert get().get_json() == {"checker": {}}
+
+    database.close()
+
+
+def test_backend_round_metrics(schema_database):
+    database = schema_database
+    connection = database.connect()
+    with connection:
+        connection.executemany(
+            "INSERT INTO exploitstats VALUES (?, ?, ?, 'CVExchange', 'Flagstore0', 2, 1, 1, 1, 2, 3, 3, 0)",
+            [
+                (1, "TestTeam1", "TestTeam2"),
+                (1, "TestTeam2", "TestTeam1"),
+                (2, "TestTeam1", "TestTeam2"),
+            ],
+        )
+        connection.execute(
+            "INSERT INTO submissionstats VALUES (2, 'TestTeam1', 1, 1, 50, 0)"
+        )
+
+    app = Flask(__name__)
+    get_exploits = RoundMetrics.create_api(database, "exploitstats")().get
+    get_submissions = RoundMetrics.create_api(database, "submissionstats")().get
+
+    with app.test_request_context("/exploitstats"):
+        assert len(get_exploits()) == 3
+    with app.test_request_context("/exploitstats?attacker=TestTeam1&start=2"):
+        assert [(row["round_id"], row["target"]) for row in get_exploits()] == [
+            (2, "TestTeam2")
+        ]
+    with app.test_request_context("/exploitstats?end=abc"):
+        assert get_exploits()[1] == 400
+    with app.test_request_context("/submissionstats?team=TestTeam2"):
+        assert get_submissions() == []
+    with app.test_request_context("/submissionstats?end=2"):
+        assert get_submissions()[0]["duration"] == 50
+
+    database.close()
+
+
+def test_backend_round_timings(schema_database):
+    database = schema_database
+    connection = database.connect()
+    with connection:
+        connection.executemany(
+            "INSERT INTO roundtimings VALUES (?, ?, ?, ?, ?, ?)",
+            [
+                (1, "exploits", "exploits", "", 1000, 500),
+                (2, "exploits", "exploit_batch", "TestTeam1", 2100, 300.5),
+                (2, "state_update", "state_update", "", 2000, 50),
+                (2, "exploits", "exploits", "", 2050, 400),
+            ],
+        )
+
+    app = Flask(__name__)
+    get_timings = RoundTimings.create_api(database)().get
+
+    with app.test_request_context("/roundtimings"):
+        timings = get_timings()
+    assert (timings["round_id"], timings["start"], timings["duration"]) == (
+        2,
+        2000,
+        450,
+    )
+    assert [
+        (span["name"], span["target"], span["offset"]) for span in timings["spans"]
+    ] == [
+        ("state_update", "", 0),
+        ("exploits", "", 50),
+        ("exploit_batch", "TestTeam1", 100),
+    ]
 
-    mock_connect.assert_called_once_with("database.db")
+    with app.test_request_context("/roundtimings?round=1"):
+        assert get_timings()["duration"] == 500
+    with app.test_request_context("/roundtimings?round=3"):
+        assert get_timings()["spans"] == []
+    with app.test_request_context("/roundtimings?round=abc"):
+        assert get_timings()[1] == 400
 
-    assert query == "INSERT INTO test_table(test_key) VALUES (?)"
-    assert params == ("test_value",)
+    database.close()
@@ -0,0 +1,105 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+from .conftest import config, secrets
+
+# Cumulative import time budgets in microseconds for each CLI path, generous enough for loaded machines
+IMPORT_TIME_BUDGETS = {
+    "help": 500_000,
+    "destroy": 1_500_000,
+    "run": 5_000_000,
+}
+# Heavy dependencies that must not be imported on each CLI path
+SCOREBOARD_MODULES = ["bs4", "selenium", "webdriver_manager"]
+SIMULATION_MODULES = ["flask", "flask_restful", "httpx", "paramiko"]
+FORBIDDEN_MODULES = {
+    "help": SCOREBOARD_MODULES + SIMULATION_MODULES,
+    "destroy": SCOREBOARD_MODULES + SIMULATION_MODULES,
+    "run": SCOREBOARD_MODULES,
+}
+
+CLI_PATHS = {
+    "help": """
+import sys
+sys.argv = ["enosimulator", "--help"]
+import main
+try:
+    main.get_args()
+except SystemExit:
+    pass
+""",
+    "destroy": """
+import sys
+sys.argv = ["enosimulator", "-c", "config.json", "-s", "secrets.json", "--destroy"]
+import main
+args = main.get_args()
+from containers import Application
+application = Application()
+application.configuration.config.from_json(args.config)
+application.configuration.secrets.from_json(args.secrets)
+application.setup_container.setup()
+""",
+    "run": """
+import sys
+sys.argv = ["enosimulator", "-c", "config.json", "-s", "secrets.json"]
+import main
+args = main.get_args()
+from containers import Application
+application = Application()
+application.configuration.config.from_json(args.config)
+application.configuration.secrets.from_json(args.secrets)
+application.configuration.verbose.from_value(args.verbose)
+application.configuration.debug.from_value(args.debug)
+application.setup_container.setup()
+application.simulation_container.simulation()
+application.backend_container.flask_app()
+""",
+}
+
+
+def imported_modules(code, cwd):
+    """Runs the code with -X importtime and returns the top level packages of all modules it imported and their cumulative import time."""
+
+    enosimulator_path = os.path.abspath(
+        os.path.join(os.path.dirname(__file__), "../enosimulator")
+    )
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join([enosimulator_path, env.get("PYTHONPATH", "")])
+
+    code += "\nprint('\\n'.join(sys.modules))\n"
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=cwd,
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    assert result.returncode == 0, result.stderr
+
+    import_time = 0
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        # Only count top level imports since nested ones are part of their parent's cumulative time
+        if not name.startswith("  "):
+            import_time += int(cumulative)
+
+    return {module.split(".")[0] for module in result.stdout.splitlines()}, import_time
+
+
+@pytest.mark.parametrize("cli_path", CLI_PATHS.keys())
+def test_cli_startup_imports(tmp_path, cli_path):
+    with open(tmp_path / "config.json", "w") as config_file:
+        json.dump(config, config_file)
+    with open(tmp_path / "secrets.json", "w") as secrets_file:
+        json.dump(secrets, secrets_file)
+
+    modules, import_time = imported_modules(CLI_PATHS[cli_path], tmp_path)
+
+    assert not modules & set(FORBIDDEN_MODULES[cli_path])
+    assert import_time < IMPORT_TIME_BUDGETS[cli_path]
@@ -5,7 +5,7 @@ from unittest.mock import AsyncMock, Mock, patch
 import pytest
 from rich.console import Console
 
-from enosimulator.types_ import Experience, Service, Team
+from enosimulator.types_ import ConfigSettings, Experience, Service, Team
 
 # uncomment to skip all tests for debugging
 # pytestmark = pytest.mark.skip("Already works")
@@ -464,3 +464,27 @@ async def test_setup_destroy(mock_fs, setup_container, test_setup_dir):
     assert not os.path.exists(test_setup_dir + "/hetzner/outputs.tf")
     assert not os.path.exists(test_setup_dir + "/hetzner/variables.tf")
     assert not os.path.exists(test_setup_dir + "/hetzner/versions.tf")
+
+
+def test_config_settings():
+    settings = {
+        "duration-in-minutes": 2,
+        "teams": 3,
+        "services": ["enowars7-service-CVExchange"],
+        "checker-ports": [7331],
+        "simulation-type": "stress-test",
+        "scoreboard-file": "",
+    }
+
+    config_settings = ConfigSettings.from_(
+        {**settings, "stats-retention": {"vminfo": 60, "containerinfo_10m": 0}}
+    )
+    assert config_settings.stats_retention == {"vminfo": 60, "containerinfo_10m": 0}
+
+    for retention in [{"vminfo": -1}, {"vminfo": "60"}, {"vminfo_5m": 60}, []]:
+        with pytest.raises(ValueError, match="Invalid stats retention"):
+            ConfigSettings.from_({**settings, "stats-retention": retention})
+
+    assert config_settings.trace_file == "roundtimings.jsonl"
+    with pytest.raises(ValueError, match="Invalid trace file"):
+        ConfigSettings.from_({**settings, "trace-file": None})
@@ -1,14 +1,20 @@
+import json
 from io import BytesIO
-from unittest.mock import AsyncMock, Mock, patch
+from threading import Event, Thread
+from unittest.mock import AsyncMock, MagicMock, Mock, patch
 
 import jsons
 import pytest
 from enochecker_core import CheckerInfoMessage, CheckerMethod, CheckerTaskMessage
-from httpx import AsyncClient
+from httpx import AsyncClient, HTTPError
 from paramiko import RSAKey, SSHClient
 from rich.console import Console
 from rich.panel import Panel
 
+from enosimulator.simulation.perf import LatencyHistogram
+from enosimulator.simulation.statchecker import SYSTEM_STATS_PROBE
+from enosimulator.simulation.util import measure_time, req_to_json
+
 # uncomment to skip all tests for debugging
 # pytestmark = pytest.mark.skip("Already works")
 
@@ -51,9 +57,8 @@ def test_stat_checker_container_stats(simulation_container):
                 mock_exec_command.return_value = (
                     None,
                     BytesIO(
-                        b"CONTAINER ID        NAME                CPU %               MEM USAGE / LIMIT     MEM %               NET I/O             BLOCK I/O           PIDS\n"
-                        + b"a1b2c3d4e5f6        my_container1       0.07%               4.883MiB / 1.952GiB   0.24%               648B / 0B           12.3MB / 0B         2\n"
-                        + b"b2c3d4e5f6a7        my_container2       0.10%               2.211MiB / 1.952GiB   0.11%               648B / 0B           4.987MB / 0B        2\n"
+                        b'{"Name":"my_container1","CPUPerc":"0.07%","MemPerc":"0.24%","NetIO":"648B / 0B","BlockIO":"12.3MB / 0B","PIDs":"2"}\n'
+                        + b'{"Name":"my_container2","CPUPerc":"0.10%","MemPerc":"0.11%","NetIO":"1.5kB / 2.048kB","BlockIO":"4.987MiB / 0B","PIDs":"3"}\n'
                     ),
                     None,
                 )
@@ -67,18 +72,26 @@ def test_stat_checker_container_stats(simulation_container):
         )
 
     assert stat_checker.container_stats["engine"]["my_container1"] == {
+        "vm": "engine",
         "name": "my_container1",
         "cpuusage": 0.07,
         "ramusage": 0.24,
-        "netrx": 648,
+        "netrx": 0.63,
         "nettx": 0,
+        "blockread": 12011.72,
+        "blockwrite": 0,
+        "pids": 2,
     }
     assert stat_checker.container_stats["engine"]["my_container2"] == {
+        "vm": "engine",
         "name": "my_container2",
         "cpuusage": 0.1,
         "ramusage": 0.11,
-        "netrx": 648,
-        "nettx": 0,
+        "netrx": 1.46,
+        "nettx": 2,
+        "blockread": 5106.69,
+        "blockwrite": 0,
+        "pids": 3,
     }
 
     assert isinstance(stat_panel, Panel)
@@ -88,37 +101,56 @@ def test_stat_checker_system_stats(simulation_container):
     simulation_container.reset_singletons()
     stat_checker = simulation_container.stat_checker()
 
+    probes = [
+        {
+            "cpu": [1000, 0, 500, 8500, 0, 0, 0, 0, 0, 0],
+            "memtotal": 8173568,
+            "memavailable": 6255616,
+            "netrx": 1024000,
+            "nettx": 2048000,
+            "uptime": 100.0,
+            "cores": 8,
+            "disk": 49 * 1024**3,
+        },
+        {
+            "cpu": [1600, 0, 900, 9500, 0, 0, 0, 0, 0, 0],
+            "memtotal": 8173568,
+            "memavailable": 6255616,
+            "netrx": 1638400,
+            "nettx": 2662400,
+            "uptime": 160.0,
+            "cores": 8,
+            "disk": 49 * 1024**3,
+        },
+    ]
+
     with patch.object(RSAKey, "from_private_key_file"):
         with patch.object(SSHClient, "connect") as mock_connect:
             with patch.object(SSHClient, "exec_command") as mock_exec_command:
+                mock_exec_command.side_effect = [
+                    (None, BytesIO(jsons.dumps(probe).encode()), None)
+                    for probe in probes
+                ]
 
-                def return_value(param):
-                    if (
-                        param
-                        == "sar -n DEV 1 1 | grep 'Average' | grep 'eth0' | awk '{print $5, $6}'"
-                    ):
-                        return (
-                            None,
-                            BytesIO(b"0.07 0.24"),
-                            None,
-                        )
-                    else:
-                        return (
-                            None,
-                            BytesIO(b"23.45\n7982\n1873\n2.34\n8\n49G"),
-                            None,
-                        )
-
-                mock_exec_command.side_effect = return_value
-
+                stat_checker._system_stats("engine", "123.32.123.21")
+                first_stats = dict(stat_checker.vm_stats["engine"])
                 stat_panels = stat_checker._system_stats("engine", "123.32.123.21")
 
-        mock_connect.assert_called_once_with(
+        mock_connect.assert_called_with(
             hostname="123.32.123.21",
             username="root",
             pkey=RSAKey.from_private_key_file("/path/to/your/private_key"),
         )
 
+    # The system stats are collected in a single exec per VM
+    assert mock_exec_command.call_count == 2
+    mock_exec_command.assert_called_with(SYSTEM_STATS_PROBE)
+
+    # The first probe yields the averages since boot
+    assert first_stats["cpuusage"] == 15.0
+    assert first_stats["netrx"] == 10.0
+    assert first_stats["nettx"] == 20.0
+
     assert stat_checker.vm_stats["engine"] == {
         "name": "engine",
         "ip": "123.32.123.21",
@@ -126,11 +158,11 @@ def test_stat_checker_system_stats(simulation_container):
         "ram": 7.79,
         "disk": 49,
         "status": "online",
-        "uptime": 1,
-        "cpuusage": 2.34,
-        "ramusage": 23.45,
-        "netrx": 0.07,
-        "nettx": 0.24,
+        "uptime": 2,
+        "cpuusage": 50.0,
+        "ramusage": 23.47,
+        "netrx": 10.0,
+        "nettx": 10.0,
     }
 
     assert isinstance(stat_panels, list)
@@ -139,6 +171,55 @@ def test_stat_checker_system_stats(simulation_container):
     assert isinstance(stat_panels[2], Panel)
 
 
+def test_stat_checker_system_stats_reset(simulation_container):
+    simulation_container.reset_singletons()
+    stat_checker = simulation_container.stat_checker()
+
+    probe = {
+        "cpu": [1000, 0, 500, 8500, 0, 0, 0, 0],
+        "memtotal": 8173568,
+        "memavailable": 6255616,
+        "netrx": 1024000,
+        "nettx": 2048000,
+        "uptime": 100.0,
+        "cores": 8,
+        "disk": 49 * 1024**3,
+    }
+    rebooted_probe = {
+        **probe,
+        "cpu": [60, 0, 40, 900, 0, 0, 0, 0],
+        "netrx": 10240,
+        "nettx": 20480,
+        "uptime": 10.0,
+    }
+    next_probe = {
+        **rebooted_probe,
+        "cpu": [660, 0, 440, 1900, 0, 0, 0, 0],
+        "netrx": 624640,
+        "nettx": 634880,
+        "uptime": 70.0,
+    }
+
+    stat_checker._parse_system_stats("engine", probe)
+    stats = stat_checker._parse_system_stats("engine", rebooted_probe)
+
+    # Counters that went backwards only become the new base
+    assert stats[0] == 23.47
+    assert stats[3] is None
+    assert stats[6] is None
+    assert stats[7] is None
+    assert stat_checker.probes["engine"] == rebooted_probe
+
+    stat_checker._save_system_stats("engine", "123.32.123.21", *stats[:2], *stats[3:])
+    assert stat_checker._analytics_rows()["vminfo"] == []
+
+    stats = stat_checker._parse_system_stats("engine", next_probe)
+
+    assert stats[3] == 50.0
+    assert stats[6] == 10.0
+    assert stats[7] == 10.0
+
+
 @pytest.mark.asyncio
 async def test_stat_checker_system_analytics(simulation_container):
     stat_checker = simulation_container.stat_checker()
@@ -164,28 +245,317 @@ async def test_stat_checker_system_analytics(simulation_container):
     container_stats = {
         "vulnbox1": {
             "test_container": {
+                "vm": "vulnbox1",
                 "name": "test_container",
                 "cpuusage": 0.3,
                 "ramusage": 0.4,
                 "netrx": 0.5,
                 "nettx": 0.6,
             }
-        }
+        },
+        "checker": {
+            "checker_container": {
+                "vm": "checker",
+                "name": "checker_container",
+                "cpuusage": 0.5,
+                "ramusage": 0.6,
+                "netrx": 0.7,
+                "nettx": 0.8,
+            }
+        },
+        "engine": {},
     }
     stat_checker.vm_stats = vm_stats
     stat_checker.container_stats = container_stats
 
     await stat_checker.system_analytics()
 
-    mock_client.post.assert_any_call(
-        "http://localhost:5000/vminfo", json=vm_stats["vulnbox1"]
+    mock_client.post.assert_called_once_with(
+        "http://localhost:5000/ingest",
+        json={
+            "vminfo": [vm_stats["vulnbox1"]],
+            "containerinfo": [
+                container_stats["vulnbox1"]["test_container"],
+                container_stats["checker"]["checker_container"],
+            ],
+        },
     )
-    mock_client.post.assert_any_call(
-        "http://localhost:5000/containerinfo",
-        json=container_stats["vulnbox1"]["test_container"],
+
+    mock_client.post.reset_mock()
+    stat_checker.ingest = Mock()
+
+    await stat_checker.system_analytics()
+
+    assert mock_client.post.call_count == 0
+    stat_checker.ingest.assert_called_once_with(
+        {
+            "vminfo": [vm_stats["vulnbox1"]],
+            "containerinfo": [
+                container_stats["vulnbox1"]["test_container"],
+                container_stats["checker"]["checker_container"],
+            ],
+        }
+    )
+    assert stat_checker.latest_stats == {
+        "vminfo": vm_stats,
+        "containerinfo": {
+            "vulnbox1": container_stats["vulnbox1"],
+            "checker": container_stats["checker"],
+        },
+    }
+
+
+def test_telemetry_collector_buffer(simulation_container):
+    simulation_container.reset_singletons()
+    telemetry_collector = simulation_container.telemetry_collector()
+
+    assert not telemetry_collector.enabled
+
+    telemetry_collector._buffer(
+        "vulnbox1",
+        '[{"time":1.0,"system":{"cores":2},"containers":"raw1"},'
+        + '{"time":6.0,"system":{"cores":2},"containers":"raw2"}]\n',
+    )
+    telemetry_collector._buffer("vulnbox1", "not json\n")
+    telemetry_collector._buffer("vulnbox1", '{"time":11.0}\n')
+    telemetry_collector._buffer(
+        "vulnbox1",
+        '[{"time":11.0,"system":{"cores":2}},"sample",'
+        + '{"time":16.0,"system":{"cores":2},"containers":"raw4"}]\n',
+    )
+
+    assert telemetry_collector.drain_system_samples() == {
+        "vulnbox1": [(1.0, {"cores": 2}), (6.0, {"cores": 2}), (16.0, {"cores": 2})]
+    }
+    assert telemetry_collector.drain_container_samples() == {
+        "vulnbox1": [(1.0, "raw1"), (6.0, "raw2"), (16.0, "raw4")]
+    }
+    assert telemetry_collector.drain_system_samples() == {}
+
+
+def test_telemetry_collector_start(simulation_container):
+    simulation_container.reset_singletons()
+    telemetry_collector = simulation_container.telemetry_collector()
+    telemetry_collector.console = Mock(Console)
+
+    connecting = Event()
+
+    def connect():
+        connecting.wait()
+        raise OSError("Connection refused")
+
+    with patch("paramiko.SSHClient", side_effect=connect) as ssh_client:
+        starts = [
+            Thread(target=telemetry_collector.start, args=({"vulnbox1": "10.1.1.1"},))
+            for _ in range(4)
+        ]
+        for start in starts:
+            start.start()
+        for start in starts:
+            start.join()
+        connecting.set()
+        telemetry_collector.streams["vulnbox1"].join()
+
+    assert ssh_client.call_count == 1
+    telemetry_collector.console.print.assert_called_once()
+    assert "vulnbox1" in telemetry_collector.console.print.call_args.args[0]
+    assert (
+        telemetry_collector.metrics.counters[
+            (
+                "call_errors_total",
+                (("host", "10.1.1.1"), ("operation", "telemetry"), ("service", "")),
+            )
+        ]
+        == 1
     )
 
 
+def test_telemetry_collector_stream_exit(simulation_container):
+    simulation_container.reset_singletons()
+    telemetry_collector = simulation_container.telemetry_collector()
+    telemetry_collector.console = Mock(Console)
+
+    stdout = MagicMock()
+    stdout.__iter__.return_value = iter(
+        ['[{"time":1.0,"system":{"cores":2},"containers":"raw1"}]\n']
+    )
+    stdout.channel.recv_exit_status.return_value = 127
+
+    with patch("paramiko.SSHClient") as ssh_client, patch("paramiko.RSAKey"):
+        client = ssh_client.return_value.__enter__.return_value
+        client.exec_command.return_value = (None, stdout, None)
+        telemetry_collector._stream("vulnbox1", "10.1.1.1")
+
+    assert telemetry_collector.drain_system_samples() == {
+        "vulnbox1": [(1.0, {"cores": 2})]
+    }
+    telemetry_collector.console.print.assert_called_once()
+    assert "status 127" in telemetry_collector.console.print.call_args.args[0]
+    assert (
+        telemetry_collector.metrics.counters[
+            (
+                "call_errors_total",
+                (("host", "10.1.1.1"), ("operation", "telemetry"), ("service", "")),
+            )
+        ]
+        == 1
+    )
+
+
+def test_perf_recorder(simulation_container):
+    simulation_container.reset_singletons()
+    perf = simulation_container.perf()
+
+    assert LatencyHistogram.bucket(15) == (15, 1)
+    assert LatencyHistogram.bucket(1000) == (992, 32)
+
+    perf.rotate(1)
+    for millis in range(1, 101):
+        perf.record("exploit", "10.1.1.1", "CVExchange", millis / 1000)
+    with pytest.raises(ValueError):
+        with perf.measure("ssh_connect", "vulnbox1"):
+            raise ValueError
+
+    report = perf.report()
+    assert report["round_id"] == 1
+    assert [(row["operation"], row["count"]) for row in report["current"]] == [
+        ("exploit", 100),
+        ("ssh_connect", 1),
+    ]
+    exploit = report["current"][0]
+    assert (exploit["min"], exploit["mean"], exploit["max"]) == (1, 50.5, 100)
+    assert 50 <= exploit["p50"] <= 50 * 1.0625
+    assert 99 <= exploit["p99"] <= 99 * 1.0625
+    assert exploit["p99.9"] == 100
+
+    perf.rotate(2)
+    report = perf.report()
+    assert (report["round_id"], report["current"]) == (2, [])
+    assert report["previous_round_id"] == 1
+    assert len(report["previous"]) == 2
+
+    metrics = perf.metrics.render()
+    assert (
+        'enosimulator_call_errors_total{host="vulnbox1",operation="ssh_connect",service=""} 1'
+        in metrics
+    )
+    assert (
+        'enosimulator_call_duration_seconds_bucket{host="10.1.1.1",operation="exploit",service="CVExchange",le="0.05"} 50'
+        in metrics
+    )
+    assert (
+        'enosimulator_call_duration_seconds_count{host="10.1.1.1",operation="exploit",service="CVExchange"} 100'
+        in metrics
+    )
+
+
+def test_round_tracer(simulation_container, tmp_path):
+    simulation_container.reset_singletons()
+    tracer = simulation_container.tracer()
+    tracer.path = str(tmp_path / "roundtimings.jsonl")
+
+    tracer.start_round(3)
+    with tracer.span("stats"):
+        traced = tracer.span("system_stats", "stats", "vulnbox1")
+        assert traced(lambda: "panels")() == "panels"
+
+    spans = tracer.flush()
+    assert [
+        (span["round_id"], span["phase"], span["name"], span["target"])
+        for span in spans
+    ] == [(3, "stats", "system_stats", "vulnbox1"), (3, "stats", "stats", "")]
+    assert spans[1]["duration"] >= spans[0]["duration"]
+    assert (
+        tracer.metrics.histograms[("round_phase_seconds", (("phase", "stats"),))][2]
+        == 1
+    )
+    assert tracer.flush() == []
+
+    tracer.write({"roundtimings": spans})
+    tracer.write({"roundtimings": spans[:1]})
+    with open(tracer.path) as f:
+        assert [json.loads(line) for line in f] == spans + spans[:1]
+
+    tracer.path = ""
+    tracer.write({"roundtimings": spans})
+
+
+def test_metrics_registry(simulation_container):
+    simulation_container.reset_singletons()
+    metrics = simulation_container.metrics()
+
+    metrics.collect(lambda: {"writer_queue_depth": 3})
+    metrics.inc("flags_submitted_total", 2, team='Team "1"')
+    metrics.observe("event_loop_lag_seconds", 0.02)
+    metrics.observe("event_loop_lag_seconds", 200)
+
+    lines = metrics.render().splitlines()
+    assert "# TYPE enosimulator_writer_queue_depth gauge" in lines
+    assert "enosimulator_writer_queue_depth 3" in lines
+    assert 'enosimulator_flags_submitted_total{team="Team \\"1\\""} 2' in lines
+    assert 'enosimulator_event_loop_lag_seconds_bucket{le="0.01"} 0' in lines
+    assert 'enosimulator_event_loop_lag_seconds_bucket{le="0.025"} 1' in lines
+    assert 'enosimulator_event_loop_lag_seconds_bucket{le="120"} 1' in lines
+    assert 'enosimulator_event_loop_lag_seconds_bucket{le="+Inf"} 2' in lines
+    assert "enosimulator_event_loop_lag_seconds_count 2" in lines
+
+
+@pytest.mark.asyncio
+async def test_stat_checker_telemetry_stats(simulation_container):
+    simulation_container.reset_singletons()
+    stat_checker = simulation_container.stat_checker()
+    stat_checker.telemetry.enabled = True
+    stat_checker.telemetry.start = Mock()
+    mock_client = Mock(AsyncClient)
+    stat_checker.client = mock_client
+
+    probe = {
+        "cpu": [1000, 0, 500, 8500, 0, 0, 0, 0],
+        "memtotal": 8173568,
+        "memavailable": 6255616,
+        "netrx": 1024000,
+        "nettx": 2048000,
+        "uptime": 100.0,
+        "cores": 8,
+        "disk": 49 * 1024**3,
+    }
+    docker_stats = '{"Name":"my_container1","CPUPerc":"0.07%","MemPerc":"0.24%","NetIO":"648B / 0B","BlockIO":"12.3MB / 0B","PIDs":"2"}\n'
+    stat_checker.telemetry._buffer(
+        "vulnbox1",
+        jsons.dumps(
+            [
+                {"time": 1700000000.0, "system": probe, "containers": docker_stats},
+                {"time": 1700000005.0, "system": probe, "containers": docker_stats},
+            ]
+        ),
+    )
+
+    ip_addresses = {"vulnbox1": "234.123.12.32", "engine": "123.32.23.21"}
+    container_panels = stat_checker.check_containers(ip_addresses)
+    system_panels = stat_checker.check_system(ip_addresses)
+
+    stat_checker.telemetry.start.assert_called_with(ip_addresses)
+    assert isinstance(container_panels["vulnbox1"], Panel)
+    assert isinstance(system_panels["vulnbox1"][0], Panel)
+
+    vm_rows = stat_checker.telemetry_rows["vminfo"]
+    assert [row["name"] for row in vm_rows] == ["vulnbox1", "vulnbox1", "engine"]
+    assert vm_rows[0]["cpuusage"] == 15.0
+    assert vm_rows[1]["cpuusage"] == 0.0
+    assert vm_rows[1]["measuretime"] == measure_time(1700000005.0)
+    assert vm_rows[2]["status"] == "offline"
+    assert len(stat_checker.telemetry_rows["containerinfo"]) == 2
+    container_rows = stat_checker.telemetry_rows["containerinfo"]
+
+    await stat_checker.system_analytics()
+
+    mock_client.post.assert_called_once_with(
+        "http://localhost:5000/ingest",
+        json={"vminfo": vm_rows, "containerinfo": container_rows},
+    )
+    assert stat_checker.telemetry_rows == {"vminfo": [], "containerinfo": []}
+
+
 @pytest.mark.asyncio
 async def test_orchestrator_update_teams(simulation_container):
     simulation_container.reset_singletons()
@@ -289,6 +659,7 @@ def test_orchestrator_parse_scoreboard(simulation_container):
     assert orchestrator.setup.teams["TestTeam1"].gain == 99.3
     assert orchestrator.setup.teams["TestTeam2"].gain == 23.9
     assert orchestrator.setup.teams["TestTeam3"].gain == 20.3
+    assert orchestrator.setup.versions["team"] == 1
 
 
 def test_orchestrator_create_exploit_requests(simulation_container):
@@ -408,46 +779,107 @@ async def test_orchestrator_send_exploit_requests(simulation_container):
         ),
     }
 
+    mock_client.post.return_value.status_code = 200
     mock_client.post.return_value.content = '{"result": "OK", "message": "", "attack_info": "12", "flag": "ENO123123123123"}'
 
     flags = await orchestrator._send_exploit_requests(
         orchestrator.setup.teams["TestTeam1"], exploit_requests
     )
-    # just some calls so the linter doesn't complain about unused variables
-    flags.append(1)
-    flags.pop()
 
-    # TODO: - seems like calls are not being counted since the function is called in a task (fix?)
+    assert mock_client.post.call_count == 2
+    mock_client.post.assert_any_call(
+        "http://234.123.12.32:7331",
+        data=req_to_json(
+            exploit_requests[("TestTeam2", "CVExchange", "Flagstore0", "12")]
+        ),
+        headers={"Content-Type": "application/json"},
+        timeout=10,
+    )
+    mock_client.post.assert_any_call(
+        "http://234.123.12.32:7331",
+        data=req_to_json(
+            exploit_requests[("TestTeam2", "CVExchange", "Flagstore1", "13")]
+        ),
+        headers={"Content-Type": "application/json"},
+        timeout=10,
+    )
 
-    # assert mock_client.post.call_count == 2
-    # mock_client.post.assert_any_call(
-    #     "http://234.123.12.32:7331",
-    #     data=req_to_json(
-    #         exploit_requests[("TestTeam2", "CVExchange", "Flagstore0", "12")]
-    #     ),
-    #     headers={"Content-Type": "application/json"},
-    #     timeout=10,
-    # )
-    # mock_client.post.assert_any_call(
-    #     "http://234.123.12.32:7331",
-    #     data=req_to_json(
-    #         exploit_requests[("TestTeam2", "CVExchange", "Flagstore1", "13")]
-    #     ),
-    #     headers={"Content-Type": "application/json"},
-    #     timeout=10,
-    # )
+    assert flags == ["ENO123123123123", "ENO123123123123"]
+
+    metrics = orchestrator.exploit_metrics()
+    assert [
+        (row["attacker"], row["target"], row["flagstore"], row["requests"], row["ok"])
+        for row in metrics
+    ] == [
+        ("TestTeam1", "TestTeam2", "Flagstore0", 1, 1),
+        ("TestTeam1", "TestTeam2", "Flagstore1", 1, 1),
+    ]
+    assert metrics[0]["latency_min"] <= metrics[0]["latency_p95"]
+    assert orchestrator.exploit_metrics() == []
+    assert (
+        orchestrator.perf.histograms[("exploit", "234.123.12.32", "CVExchange")].count
+        == 2
+    )
+    assert (
+        orchestrator.metrics.counters[
+            ("exploit_results_total", (("result", "OK"), ("service", "CVExchange")))
+        ]
+        == 2
+    )
 
-    # assert flags == ["ENO123123123123", "ENO123123123123"]
+    mock_client.post.side_effect = HTTPError("timeout")
+    flags = await orchestrator._send_exploit_requests(
+        orchestrator.setup.teams["TestTeam1"], exploit_requests
+    )
+    assert flags == []
+    assert [row["ok"] for row in orchestrator.exploit_metrics()] == [0, 0]
+    assert (
+        orchestrator.metrics.counters[
+            ("exploit_requests_total", (("service", "CVExchange"),))
+        ]
+        == 4
+    )
+    assert (
+        orchestrator.metrics.counters[
+            (
+                "call_errors_total",
+                (
+                    ("host", "234.123.12.32"),
+                    ("operation", "exploit"),
+                    ("service", "CVExchange"),
+                ),
+            )
+        ]
+        == 2
+    )
+
+    ok_response = Mock(status_code=200, content=mock_client.post.return_value.content)
+    mock_client.post.side_effect = [ok_response, Mock(status_code=200, content="{")]
+    flags = await orchestrator._send_exploit_requests(
+        orchestrator.setup.teams["TestTeam1"], exploit_requests
+    )
+    assert flags == ["ENO123123123123"]
+    assert [row["ok"] for row in orchestrator.exploit_metrics()] == [1, 0]
+
+    mock_client.post.side_effect = [ok_response, Mock(status_code=500, content="")]
+    flags = await orchestrator._send_exploit_requests(
+        orchestrator.setup.teams["TestTeam1"], exploit_requests
+    )
+    assert flags == ["ENO123123123123"]
+    assert [row["ok"] for row in orchestrator.exploit_metrics()] == [1, 0]
 
 
 @pytest.mark.asyncio
-async def test_simulation_run(simulation_container):
+async def test_simulation_run(simulation_container, tmp_path):
     simulation_container.reset_singletons()
     simulation = simulation_container.simulation()
+    simulation.tracer.path = str(tmp_path / "roundtimings.jsonl")
+    simulation.tracer.write = Mock()
+    simulation.ingest = Mock()
 
     simulation.orchestrator.update_team_info = AsyncMock()
     simulation.orchestrator.parse_scoreboard = Mock()
-    simulation.orchestrator.get_round_info = AsyncMock()
+    simulation.orchestrator.get_round_info = AsyncMock(return_value=1)
     simulation.orchestrator.collect_system_analytics = AsyncMock()
 
     simulation._scoreboard_available = AsyncMock()
@@ -456,6 +888,9 @@ async def test_simulation_run(simulation_container):
     simulation._exploit_all_teams = AsyncMock()
     simulation._system_analytics = Mock()
     simulation._submit_all_flags = Mock()
+    simulation._record_scores = Mock()
+    simulation._update_overview = AsyncMock()
+    simulation._record_metrics = Mock()
     simulation._print_system_analytics = Mock()
 
     simulation._system_analytics.return_value = [Panel("test"), [Panel("test2")]]
@@ -473,8 +908,156 @@ async def test_simulation_run(simulation_container):
     assert simulation._exploit_all_teams.call_count == 2
     assert simulation._system_analytics.call_count == 2
     assert simulation._submit_all_flags.call_count == 2
+    assert simulation._record_scores.call_count == 2
+    assert simulation._update_overview.call_count == 2
+    assert simulation.overview["round"]["round_id"] == 1
+    assert simulation.overview["vms"]["vulnbox1"] == {}
+    assert simulation.overview["leaderboard"] == []
+    assert simulation._record_metrics.call_count == 2
     assert simulation._print_system_analytics.call_count == 2
 
+    histograms = simulation.metrics.histograms
+    assert histograms[("round_duration_seconds", ())][2] == 2
+    assert histograms[("round_phase_seconds", (("phase", "exploits"),))][2] == 2
+    assert histograms[("round_phase_seconds", (("phase", "stats"),))][2] == 2
+
+    timings = [
+        batch["roundtimings"]
+        for (batch,), _ in simulation.ingest.call_args_list
+        if "roundtimings" in batch
+    ]
+    assert len(timings) == 2
+    assert [span["phase"] for span in timings[0]] == [
+        "round_info",
+        "state_update",
+        "scoreboard",
+        "stats",
+        "exploits",
+        "submission",
+        "printing",
+        "analytics_upload",
+    ]
+    # The trace file is only written once the database writer stored the spans
+    simulation.tracer.write.assert_not_called()
+
+
+def test_simulation_record_scores(simulation_container):
+    simulation_container.reset_singletons()
+    simulation = simulation_container.simulation()
+    simulation.round_id = 7
+    simulation.setup.teams["TestTeam1"].points = 12.5
+    simulation.ingest = Mock()
+
+    simulation._record_scores([["10.1.1.1", ["flag1", "flag2"]], ["10.1.2.1", []]])
+
+    ((batch,), _) = simulation.ingest.call_args
+    rows = {row["team"]: row for row in batch["scorehistory"]}
+    assert rows.keys() == simulation.setup.teams.keys()
+    assert rows["TestTeam1"]["round_id"] == 7
+    assert rows["TestTeam1"]["points"] == 12.5
+    assert rows["TestTeam1"]["exploiting"] == 2
+    assert rows["TestTeam1"]["patched"] == 0
+    assert rows["TestTeam1"]["flags"] == 2
+    assert rows["TestTeam2"]["flags"] == 0
+
+
+def test_simulation_submit_all_flags(simulation_container):
+    simulation_container.reset_singletons()
+    simulation = simulation_container.simulation()
+
+    def submit_flags(team_address, flags):
+        if team_address == "10.1.2.1":
+            raise Exception("SSH connection failed")
+
+    simulation.orchestrator.submit_flags = Mock(side_effect=submit_flags)
+
+    submissions = simulation._submit_all_flags(
+        [["10.1.1.1", ["flag1", "flag2"]], ["10.1.2.1", ["flag3"]], ["10.1.3.1", []]]
+    )
+
+    assert simulation.orchestrator.submit_flags.call_count == 2
+    assert [
+        (submission["team"], submission["flags"], submission["ok"])
+        for submission in submissions
+    ] == [("TestTeam1", 2, True), ("TestTeam2", 1, False)]
+    assert sorted(
+        (span["phase"], span["name"], span["target"])
+        for span in simulation.tracer.spans
+    ) == [
+        ("submission", "submit", "TestTeam1"),
+        ("submission", "submit", "TestTeam2"),
+    ]
+    assert simulation.metrics.counters == {
+        ("flags_submitted_total", (("team", "TestTeam1"),)): 2,
+        ("flag_submission_failures_total", (("team", "TestTeam2"),)): 1,
+    }
+
+
+def test_simulation_record_metrics(simulation_container):
+    simulation_container.reset_singletons()
+    simulation = simulation_container.simulation()
+    simulation.round_id = 4
+    simulation.orchestrator.exploit_metrics = Mock(return_value=[{"requests": 2}])
+
+    simulation._record_metrics([{"team": "TestTeam1", "flags": 2}])
+    assert simulation.orchestrator.exploit_metrics.call_count == 1
+
+    simulation.ingest = Mock()
+    simulation._record_metrics([{"team": "TestTeam1", "flags": 2}])
+
+    ((batch,), _) = simulation.ingest.call_args
+    assert batch["exploitstats"][0]["requests"] == 2
+    assert batch["exploitstats"][0]["round_id"] == 4
+    assert batch["submissionstats"][0]["team"] == "TestTeam1"
+    assert batch["submissionstats"][0]["round_id"] == 4
+
+
+@pytest.mark.asyncio
+async def test_simulation_update_overview(simulation_container):
+    simulation_container.reset_singletons()
+    simulation = simulation_container.simulation()
+    simulation.round_id = 3
+    simulation.setup.teams["TestTeam2"].points = 5.0
+    simulation.orchestrator.latest_stats = Mock(
+        return_value={
+            "vminfo": {"vulnbox1": {"name": "vulnbox1", "cpuusage": 10}},
+            "containerinfo": {
+                "vulnbox1": {
+                    "container1": {
+                        "vm": "vulnbox1",
+                        "name": "container1",
+                        "cpuusage": 1,
+                    },
+                    "container2": {
+                        "vm": "vulnbox1",
+                        "name": "container2",
+                        "cpuusage": 9,
+                    },
+                }
+            },
+        }
+    )
+
+    version = simulation.setup.versions["overview"]
+    await simulation._update_overview([["10.1.1.1", ["flag1"]], ["10.1.2.1", []]])
+
+    overview = simulation.overview
+    assert overview["round"]["round_id"] == 3
+    assert overview["vms"]["vulnbox1"] == {"name": "vulnbox1", "cpuusage": 10}
+    assert overview["vms"]["checker"] == {}
+    assert [stats["name"] for stats in overview["top_containers"]] == [
+        "container2",
+        "container1",
+    ]
+    assert overview["leaderboard"][0] == {
+        "name": "TestTeam2",
+        "points": 5.0,
+        "gain": 0.0,
+    }
+    assert overview["totals"]["flags"] == 1
+    assert overview["totals"]["exploiting"] >= 2
+    assert simulation.setup.versions["overview"] == version + 1
+
 
 @pytest.mark.asyncio
 async def test_simulation_update_teams(simulation_container):
@@ -0,0 +1,120 @@
+import os
+import sqlite3
+import sys
+import tempfile
+from threading import Event, Thread
+from time import perf_counter, sleep
+
+sys.path.append(
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "../enosimulator")
+)
+
+from backend.database import Database  # noqa: E402
+
+# Compares concurrent read/write throughput of the old access pattern (a new connection
+# in rollback journal mode per query) with the tuned Database class used by the backend.
+
+DURATION = 5
+READERS = 4
+VMS = 10
+ROWS_PER_WRITE = 12
+QUERY = "SELECT * FROM vminfo WHERE name = ? ORDER BY measuretime DESC LIMIT 360"
+INSERT = "INSERT INTO vminfo(name, cpuusage, measuretime) VALUES (?, ?, ?)"
+
+
+def create_database(path):
+    connection = sqlite3.connect(path)
+    connection.executescript(
+        """
+        CREATE TABLE vminfo (
+            name TEXT NOT NULL,
+            cpuusage REAL NOT NULL,
+            measuretime INTEGER NOT NULL,
+            PRIMARY KEY (name, measuretime)
+        );
+        """
+    )
+    connection.executemany(
+        INSERT, [(f"vm{i % VMS}", 0.5, i) for i in range(VMS * 1000)]
+    )
+    connection.commit()
+    connection.close()
+
+
+def run(read, write):
+    stop = Event()
+    counts = {"reads": 0, "writes": 0, "errors": 0}
+
+    def reader(index):
+        while not stop.is_set():
+            try:
+                read((f"vm{index % VMS}",))
+                counts["reads"] += 1
+            except sqlite3.OperationalError:
+                counts["errors"] += 1
+
+    def writer():
+        measuretime = VMS * 1000
+        while not stop.is_set():
+            rows = [
+                (f"vm{i % VMS}", 0.5, measuretime + i) for i in range(ROWS_PER_WRITE)
+            ]
+            measuretime += ROWS_PER_WRITE
+            try:
+                write(rows)
+                counts["writes"] += len(rows)
+            except sqlite3.OperationalError:
+                counts["errors"] += 1
+
+    threads = [Thread(target=reader, args=(i,)) for i in range(READERS)]
+    threads.append(Thread(target=writer))
+    started = perf_counter()
+    for thread in threads:
+        thread.start()
+    sleep(DURATION)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    elapsed = perf_counter() - started
+
+    return {name: round(count / elapsed) for name, count in counts.items()}
+
+
+def baseline(path):
+    def read(params):
+        with sqlite3.connect(path) as connection:
+            connection.execute(QUERY, params).fetchall()
+
+    def write(rows):
+        for row in rows:
+            with sqlite3.connect(path) as connection:
+                connection.execute(INSERT, row)
+
+    return run(read, write)
+
+
+def tuned(path):
+    database = Database(path)
+    connection = database.connect()
+
+    def read(params):
+        database.query(QUERY, params)
+
+    def write(rows):
+        with connection:
+            connection.executemany(INSERT, rows)
+
+    results = run(read, write)
+    database.close()
+    return results
+
+
+if __name__ == "__main__":
+    with tempfile.TemporaryDirectory() as directory:
+        for name, benchmark in (("baseline", baseline), ("tuned", tuned)):
+            path = os.path.join(directory, f"{name}.db")
+            create_database(path)
+            results = benchmark(path)
+            print(
+                f"{name:<10}{results['reads']:>10} reads/s{results['writes']:>10} rows written/s{results['errors']:>8} errors/s"
+            )
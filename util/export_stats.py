@@ -0,0 +1,38 @@
+import argparse
+import os
+import sys
+
+sys.path.append(
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "../enosimulator")
+)
+
+from backend.database import Database  # noqa: E402
+from backend.export import EXPORT_FORMATS, EXPORT_TABLES  # noqa: E402
+
+# Exports the stats recorded in a database.db file, labeled with their round ids.
+# Usage: python export_stats.py [-d path/to/database.db] [-t vminfo] [-f csv] [-o vminfo.csv]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Export the stats recorded during a simulation"
+    )
+    parser.add_argument("-d", "--database", default="database.db")
+    parser.add_argument("-t", "--table", choices=EXPORT_TABLES, default="vminfo")
+    parser.add_argument("-f", "--format", choices=list(EXPORT_FORMATS), default="csv")
+    parser.add_argument("-o", "--output", help="defaults to <table>.<extension>")
+    parser.add_argument("--start", type=int, default=0)
+    parser.add_argument("--end", type=int, default=2**63 - 1)
+    args = parser.parse_args()
+
+    if not os.path.exists(args.database):
+        sys.exit(f"{args.database} does not exist")
+
+    export, _, extension = EXPORT_FORMATS[args.format]
+    output = args.output or f"{args.table}.{extension}"
+    database = Database(args.database)
+    with open(output, "wb") as f:
+        for chunk in export(database, args.table, args.start, args.end):
+            f.write(chunk.encode() if isinstance(chunk, str) else chunk)
+    database.close()
+    print(f"Exported {args.table} to {output}")
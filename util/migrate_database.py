@@ -0,0 +1,31 @@
+import os
+import sys
+
+sys.path.append(
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "../enosimulator")
+)
+
+from backend.database import Database  # noqa: E402
+
+# Migrates a database.db file created by an older version of the simulator in place.
+# Usage: python migrate_database.py [path/to/database.db]
+
+SCHEMA_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "../enosimulator/backend/schema.sql"
+)
+
+
+if __name__ == "__main__":
+    path = sys.argv[1] if len(sys.argv) > 1 else "database.db"
+    if not os.path.exists(path):
+        sys.exit(f"{path} does not exist")
+
+    with open(SCHEMA_PATH) as f:
+        schema = f.read()
+
+    database = Database(path)
+    if database.migrate(schema):
+        print(f"Migrated {path}")
+    else:
+        print(f"{path} is already up to date")
+    database.close()